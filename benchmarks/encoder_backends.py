@@ -0,0 +1,50 @@
+"""
+Encoding throughput and output parity of the sentence encoder backends on CPU.
+
+    python benchmarks/encoder_backends.py [--sentences 2000] [--threads 0] [--batch-size 64]
+
+ONNX backends need `pip install "sentence-transformers[onnx]"`; backends that fail to
+load are reported and skipped.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.encoders import ENCODER_BACKENDS, EncoderConfig, load_encoder, parity
+from game.model_registry import DEFAULT_ENCODER_NAME
+
+SUBJECTS = ["The innkeeper", "A hooded stranger", "The captain of the guard", "Your sister", "The old wizard"]
+VERBS = ["remembers", "is hiding", "sold", "lost", "swore to protect"]
+OBJECTS = ["the silver key", "a map of the catacombs", "the king's seal", "a cursed blade", "the ferry ledger"]
+
+def sentences(count: int):
+    return [f"{SUBJECTS[i % 5]} {VERBS[(i // 5) % 5]} {OBJECTS[(i // 25) % 5]} near milestone {i}." for i in range(count)]
+
+def run(count: int, threads: int, batch_size: int, name: str = DEFAULT_ENCODER_NAME):
+    texts = sentences(count)
+    reference, baseline = None, None
+    print(f"{count} sentences, {name}, threads={threads or 'default'}, batch_size={batch_size}")
+    for backend in ENCODER_BACKENDS:
+        config = EncoderConfig(backend=backend, threads=threads, batch_size=batch_size, verify=False)
+        encoder = load_encoder(name, config=config)
+        if encoder.backend != backend:
+            continue
+        encoder.encode(texts[:batch_size])  # Warm-up
+        started = time.perf_counter()
+        encoder.encode(texts)
+        rate = count / (time.perf_counter() - started)
+        if reference is None:
+            reference, baseline = encoder, rate
+        print(f"  {backend:<11} {rate:8.0f} sentences/s  {rate / baseline:5.2f}x  "
+              f"min cosine vs torch {parity(reference, encoder, texts[:200]):.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    run(args.sentences, args.threads, args.batch_size)
@@ -0,0 +1,57 @@
+"""
+Measures the memory cost of a large memory bank, in bytes per fact.
+
+    python benchmarks/memory_footprint.py [--facts 100000]
+
+Facts are inserted with synthetic embeddings, so no encoding happens; the numbers
+cover the Python objects and the MemoryManager bookkeeping (lookup dicts, tag
+index, relevance columns, knowledge graph) but not the vector index itself.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.memory import MemoryFact, MemoryManager
+
+TAGS = ["lore", "npc", "town", "quest", "item", "combat", "dialogue", "faction"]
+
+def measure(count: int):
+    texts = [f"Fact {i}: the keeper of gate {i % 977} remembers the flood of year {i % 313}." for i in range(count)]
+    manager = MemoryManager()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    # Fresh tag strings per fact, as loading a JSON save produces them.
+    facts = [MemoryFact(fact=text, tags=["".join(TAGS[i % 8]), "".join(TAGS[(i * 3) % 8])])
+             for i, text in enumerate(texts)]
+    objects = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    manager._insert_facts(facts, np.zeros((count, 8), dtype='float32'))
+    stored = tracemalloc.get_traced_memory()[0] - before
+    before = tracemalloc.get_traced_memory()[0]
+    graph = manager.graph
+    manager.graph = None
+    del graph
+    graph_bytes = before - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    [fact.to_dict() for fact in facts]
+    to_dict_seconds = time.perf_counter() - started
+
+    print(f"{count} facts")
+    print(f"  fact objects:          {objects / count:8.1f} bytes/fact")
+    print(f"  manager bookkeeping:   {stored / count:8.1f} bytes/fact (knowledge graph {graph_bytes / count:.1f})")
+    print(f"  to_dict():             {to_dict_seconds:8.2f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--facts", type=int, default=100_000)
+    measure(parser.parse_args().facts)
@@ -0,0 +1,76 @@
+"""
+Recall versus memory for the vector index's storage modes.
+
+    python benchmarks/vector_storage.py [--vectors 100000] [--dim 384] [--kind flat]
+
+Uses clustered synthetic unit vectors shaped like sentence embeddings. For each
+storage mode it reports the in-memory size of the index (store plus approximate
+index), recall@10 against exact search, and query latency, both without
+re-ranking and with re-ranking against exact vectors restored from a sidecar.
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.vector_index import STORAGE_KINDS, IndexConfig, VectorIndex
+
+def clustered(count: int, dim: int, seed: int) -> np.ndarray:
+    # Topic clusters plus variation along a few dozen shared directions, since real
+    # sentence embeddings have a much lower intrinsic dimension than their size.
+    rng, shared = np.random.default_rng(seed), np.random.default_rng(42)
+    centers = shared.standard_normal((max(8, count // 250), dim))
+    basis = shared.standard_normal((48, dim)) / np.sqrt(48)
+    vectors = (centers[rng.integers(0, len(centers), count)] + rng.standard_normal((count, 48)) @ basis
+               + 0.1 * rng.standard_normal((count, dim))).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def resident_bytes(index: VectorIndex) -> int:
+    size = faiss.serialize_index(index._store).nbytes
+    if index._ann is not None:
+        size += faiss.serialize_index(index._ann).nbytes
+    return size
+
+def recall_and_latency(index: VectorIndex, queries: np.ndarray, truth: np.ndarray, k: int):
+    index.search(queries[0], k)  # Quantize and build outside the timing
+    started = time.perf_counter()
+    found = np.vstack([index.search(query, k)[1] for query in queries])
+    elapsed = (time.perf_counter() - started) / len(queries)
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return recall, elapsed * 1000
+
+def run(count: int, dim: int, kind: str, queries_count: int = 200, k: int = 10):
+    data, queries = clustered(count, dim, 0), clustered(queries_count, dim, 1)
+    ids = np.arange(count, dtype='int64')
+    exact = VectorIndex(dim, IndexConfig(kind="flat"))
+    exact.add(data, ids)
+    truth = exact.search(queries, k)[1]
+
+    print(f"{count} x {dim} vectors, kind={kind}, recall@{k} over {queries_count} queries")
+    print(f"{'storage':<8} {'MB':>8} {'bytes/vec':>10} {'recall':>7} {'ms/q':>6}   {'reranked':>8} {'ms/q':>6}")
+    for storage in STORAGE_KINDS:
+        config = IndexConfig(kind=kind, storage=storage, promote_at=count, rerank=0)
+        plain = VectorIndex(dim, config)
+        plain.add(data, ids)
+        recall, latency = recall_and_latency(plain, queries, truth, k)
+        size = resident_bytes(plain)
+
+        # What a load from a save sidecar gets: the same index plus exact vectors to re-rank with.
+        reranking = VectorIndex.restore(dim, IndexConfig(kind=kind, storage=storage, promote_at=count),
+                                        ids, plain.serialize(), data)
+        reranked, reranked_latency = recall_and_latency(reranking, queries, truth, k)
+        print(f"{storage:<8} {size / 2**20:8.1f} {size / count:10.1f} {recall:7.3f} {latency:6.2f}"
+              f"   {reranked:8.3f} {reranked_latency:6.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--kind", default="flat", choices=("flat", "hnsw", "ivf_flat"))
+    args = parser.parse_args()
+    run(args.vectors, args.dim, args.kind)
@@ -0,0 +1,146 @@
+import dataclasses
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+class ColumnField:
+    """
+    A float attribute that lives in a ColumnStore row while its object is attached to
+    one, and on the object itself otherwise.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.private = f"_{name}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        columns = _store_of(obj)
+        if columns is None:
+            return getattr(obj, self.private)
+        return float(columns.data[self.name][obj._slot])
+
+    def __set__(self, obj, value):
+        columns = _store_of(obj)
+        if columns is None:
+            object.__setattr__(obj, self.private, value)
+        else:
+            columns.data[self.name][obj._slot] = value
+
+def _store_of(obj) -> Optional["ColumnStore"]:
+    return getattr(obj, "_columns", None)
+
+def columnar(*names: str):
+    """
+    Class decorator, applied outside @dataclass, that turns the named fields into
+    ColumnFields and rebuilds the class with __slots__ (no per-instance __dict__).
+    """
+    def wrap(cls):
+        field_names = [f.name for f in dataclasses.fields(cls)]
+        cls_dict = dict(cls.__dict__)
+        # Class-level defaults would clash with the slots; __init__ already holds them.
+        for name in field_names:
+            cls_dict.pop(name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+        cls_dict["__slots__"] = tuple(n for n in field_names if n not in names) + tuple(f"_{n}" for n in names) + ("_columns", "_slot")
+        slotted = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        slotted.__qualname__ = cls.__qualname__
+        for name in names:
+            setattr(slotted, name, ColumnField(name))
+        return slotted
+    return wrap
+
+class ColumnStore:
+    """
+    Scalar attributes of many objects kept in contiguous float64 numpy columns, so
+    that bulk updates (decay, relevance boosts, threshold scans) are single array
+    expressions instead of per-object attribute writes. Attached objects own a row
+    (slot); released rows are reused.
+    """
+    def __init__(self, columns: Tuple[str, ...], capacity: int = 64):
+        self.columns = columns
+        self.data = {name: np.zeros(capacity) for name in columns}
+        self._live = np.zeros(capacity, dtype=bool)
+        self._owners: List[Optional[object]] = [None] * capacity
+        self._free: List[int] = []
+        self._size = 0  # Rows ever handed out; slots >= _size are unused
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def _grow(self, needed: int):
+        capacity = len(self._live)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in self.columns:
+            column = np.zeros(new_capacity)
+            column[:capacity] = self.data[name]
+            self.data[name] = column
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:capacity] = self._live
+        self._live = live
+        self._owners.extend([None] * (new_capacity - capacity))
+
+    def attach(self, obj):
+        """Moves obj's column attributes into a row. Attaching an attached object is a no-op."""
+        current = _store_of(obj)
+        if current is self:
+            return
+        if current is not None:
+            current.detach(obj)
+        values = [getattr(obj, name) for name in self.columns]
+        if self._free:
+            slot = self._free.pop()
+        else:
+            self._grow(self._size + 1)
+            slot = self._size
+            self._size += 1
+        for name, value in zip(self.columns, values):
+            self.data[name][slot] = value
+            # The row is authoritative now; don't keep a second boxed float per object.
+            object.__delattr__(obj, f"_{name}")
+        self._live[slot] = True
+        self._owners[slot] = obj
+        obj._columns, obj._slot = self, slot
+
+    def attach_many(self, objs: Iterable):
+        objs = list(objs)
+        self._grow(self._size + len(objs))
+        for obj in objs:
+            self.attach(obj)
+
+    def detach(self, obj):
+        """Copies obj's values back onto it and releases its row."""
+        if _store_of(obj) is not self:
+            return
+        slot = obj._slot
+        values = [float(self.data[name][slot]) for name in self.columns]
+        obj._columns, obj._slot = None, -1
+        for name, value in zip(self.columns, values):
+            setattr(obj, name, value)
+        self._live[slot] = False
+        self._owners[slot] = None
+        self._free.append(slot)
+
+    def live_slots(self) -> np.ndarray:
+        return np.flatnonzero(self._live[:self._size])
+
+    def slots(self, objs: Iterable) -> np.ndarray:
+        return np.fromiter((obj._slot for obj in objs), dtype=np.int64)
+
+    def owners(self, slots: Iterable[int]) -> list:
+        return [self._owners[slot] for slot in slots]
+
+    def decay(self, value: str, timestamp: str, rate: float, now: float):
+        """value = max(0, value - (now - timestamp) * rate) for every attached row, in one pass."""
+        live = self._live[:self._size]
+        values = self.data[value][:self._size]
+        elapsed = now - self.data[timestamp][:self._size][live]
+        values[live] = np.maximum(0.0, values[live] - elapsed * rate)
+
+    def touch(self, slots: np.ndarray, value: str, increment: float, timestamp: str, now: float):
+        """Adds increment to value and stamps timestamp for the given rows."""
+        np.add.at(self.data[value], slots, increment)
+        self.data[timestamp][slots] = now
@@ -0,0 +1,109 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .tokens import TokenCounter
+
+@dataclass
+class ContextCandidate:
+    """A piece of text competing for a place in one section of the prompt."""
+    section: str
+    text: str
+    priority: float
+    order: float = 0.0  # Position within the section once packed (lower comes first)
+    label: str = ""
+    tokens: int = 0
+
+@dataclass
+class PackReport:
+    """What the packer kept and dropped, per section."""
+    budgets: Dict[str, int] = field(default_factory=dict)
+    used: Dict[str, int] = field(default_factory=dict)
+    included: List[ContextCandidate] = field(default_factory=list)
+    dropped: List[ContextCandidate] = field(default_factory=list)
+    truncated: List[ContextCandidate] = field(default_factory=list)
+
+    def dropped_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for candidate in self.dropped:
+            counts[candidate.section] = counts.get(candidate.section, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        parts = [f"dropped {count} {section}" for section, count in self.dropped_counts().items()]
+        if self.truncated:
+            parts.append(f"{len(self.truncated)} truncated")
+        return ", ".join(parts)
+
+class ContextPacker:
+    """
+    Fills per-section token budgets from ranked candidates.
+    Sections listed in in_order_sections are taken strictly by priority and stop at the
+    first candidate that does not fit (used for story history, which must stay contiguous).
+    Every other section is filled greedily by priority per token. Budget a section leaves
+    unused is then offered to the remaining candidates of the density-packed sections.
+    """
+    def __init__(self, token_counter: TokenCounter, in_order_sections: Tuple[str, ...] = ("history",)):
+        self.token_counter = token_counter
+        self.in_order_sections = in_order_sections
+
+    def pack(self, candidates: List[ContextCandidate], budgets: Dict[str, int]) -> Tuple[Dict[str, List[ContextCandidate]], PackReport]:
+        report = PackReport(budgets=dict(budgets), used={section: 0 for section in budgets})
+        packed: Dict[str, List[ContextCandidate]] = {section: [] for section in budgets}
+        leftovers: List[ContextCandidate] = []
+
+        by_section: Dict[str, List[ContextCandidate]] = {section: [] for section in budgets}
+        for candidate in candidates:
+            candidate.tokens = self.token_counter.count(candidate.text)
+            by_section.setdefault(candidate.section, []).append(candidate)
+
+        for section, items in by_section.items():
+            budget = budgets.get(section, 0)
+            report.used.setdefault(section, 0)
+            packed.setdefault(section, [])
+            if section in self.in_order_sections:
+                items.sort(key=lambda c: c.priority, reverse=True)
+                for position, candidate in enumerate(items):
+                    if report.used[section] + candidate.tokens > budget:
+                        if not packed[section] and candidate.tokens > 0 and budget > 0:
+                            # Nothing fits yet: keep the tail of the top candidate rather than nothing.
+                            candidate.text = self._truncate(candidate.text, budget)
+                            candidate.tokens = self.token_counter.count(candidate.text)
+                            packed[section].append(candidate)
+                            report.used[section] += candidate.tokens
+                            report.truncated.append(candidate)
+                            position += 1
+                        report.dropped.extend(items[position:])
+                        break
+                    packed[section].append(candidate)
+                    report.used[section] += candidate.tokens
+            else:
+                items.sort(key=lambda c: c.priority / max(c.tokens, 1), reverse=True)
+                for candidate in items:
+                    if report.used[section] + candidate.tokens <= budget:
+                        packed[section].append(candidate)
+                        report.used[section] += candidate.tokens
+                    else:
+                        leftovers.append(candidate)
+
+        # Spend whatever the sections left over on the best remaining candidates.
+        spare = sum(budgets.values()) - sum(report.used.values())
+        leftovers.sort(key=lambda c: c.priority / max(c.tokens, 1), reverse=True)
+        for candidate in leftovers:
+            if candidate.tokens <= spare:
+                packed[candidate.section].append(candidate)
+                report.used[candidate.section] += candidate.tokens
+                spare -= candidate.tokens
+            else:
+                report.dropped.append(candidate)
+
+        for section in packed:
+            packed[section].sort(key=lambda c: c.order)
+            report.included.extend(packed[section])
+        return packed, report
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Keeps the most recent part of text that fits in budget tokens."""
+        while text and self.token_counter.count(text) > budget:
+            keep = int(len(text) * budget / self.token_counter.count(text) * 0.95)
+            text = text[-keep:] if keep > 0 else ""
+        return text
@@ -0,0 +1,39 @@
+from typing import Hashable
+
+import numpy as np
+
+from .lru_cache import LRUCache
+
+class EmbeddingCache:
+    """
+    A bounded LRU of query embeddings keyed by (model id, normalized text), so a query
+    that was encoded recently (a /retry, a repeated "look around", several retrievals
+    in one turn) skips the encoder's forward pass. Whitespace is the only thing
+    normalized away; anything else could change what the encoder sees.
+    """
+    def __init__(self, maxsize: int = 2048):
+        self.cache = LRUCache(maxsize)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def encode(self, model, model_id: Hashable, text: str) -> np.ndarray:
+        """Returns the (1, dim) embedding of text, encoding it with model only on a miss."""
+        key = (model_id, self.normalize(text))
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = np.array(model.encode([key[1]]), dtype='float32').reshape(1, -1)
+            # Cached arrays are shared between callers.
+            embedding.flags.writeable = False
+            self.cache.put(key, embedding)
+        return embedding
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+# Shared by every MemoryManager, so managers rebuilt by loads and undo/redo keep the cache warm.
+query_embeddings = EmbeddingCache()
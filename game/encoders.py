@@ -0,0 +1,117 @@
+import os
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+# Dynamically quantized ONNX export shipped in the sentence-transformers model repos.
+# AVX2 kernels run on practically every x86-64 CPU.
+ONNX_INT8_FILE = "onnx/model_qint8_avx2.onnx"
+# Sentences used to compare a backend's output with the PyTorch reference.
+PARITY_TEXTS = (
+    "The old lighthouse keeper hid the key beneath the loose floorboard.",
+    "A cold wind blows through the ruined abbey.",
+    "The merchant owes the thieves' guild three hundred gold.",
+    "Wolves have been seen near the northern pass.",
+    "look around",
+    "Who rules the city now that the king is dead?",
+)
+
+@dataclass(frozen=True)
+class EncoderConfig:
+    """How the sentence encoder runs: backend, CPU threads and batching."""
+    backend: str = "torch"  # torch, torch-int8 (dynamic int8 Linear layers), onnx or onnx-int8
+    threads: int = 0  # Intra-op threads (0 = the runtime's default)
+    batch_size: int = 64
+    # Compare a non-default backend's embeddings with PyTorch's when it loads, and fall
+    # back to PyTorch if any cosine similarity is below tolerance.
+    verify: bool = True
+    tolerance: float = 0.98
+    onnx_file: str = ONNX_INT8_FILE
+
+    def __post_init__(self):
+        if self.backend not in ENCODER_BACKENDS:
+            raise ValueError(f"Unknown encoder backend '{self.backend}'. Expected one of {', '.join(ENCODER_BACKENDS)}.")
+
+    @classmethod
+    def from_env(cls) -> "EncoderConfig":
+        """Reads ENCODER_BACKEND, ENCODER_THREADS, ENCODER_BATCH_SIZE and ENCODER_VERIFY."""
+        return cls(backend=os.getenv("ENCODER_BACKEND", "torch"),
+                   threads=int(os.getenv("ENCODER_THREADS", "0")),
+                   batch_size=int(os.getenv("ENCODER_BATCH_SIZE", "64")),
+                   verify=os.getenv("ENCODER_VERIFY", "1").lower() not in ("0", "false", "no"))
+
+class Encoder:
+    """A loaded sentence encoder that always encodes with its configured batch size."""
+    def __init__(self, model, backend: str, batch_size: int = 64):
+        self.model = model
+        self.backend = backend
+        self.batch_size = batch_size
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), batch_size=self.batch_size, show_progress_bar=False,
+                                            convert_to_numpy=True), dtype='float32')
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+def parity(reference, candidate, texts: Iterable[str] = PARITY_TEXTS) -> float:
+    """Returns the lowest cosine similarity between two encoders' embeddings of texts."""
+    texts = list(texts)
+    expected, actual = reference.encode(texts), candidate.encode(texts)
+    expected = expected / np.linalg.norm(expected, axis=1, keepdims=True)
+    actual = actual / np.linalg.norm(actual, axis=1, keepdims=True)
+    return float(np.min(np.sum(expected * actual, axis=1)))
+
+def _load_torch(name: str, revision: Optional[str], config: EncoderConfig):
+    from sentence_transformers import SentenceTransformer
+    if config.threads:
+        import torch
+        torch.set_num_threads(config.threads)
+    return SentenceTransformer(name, revision=revision)
+
+def _load_backend(name: str, revision: Optional[str], config: EncoderConfig):
+    from sentence_transformers import SentenceTransformer
+    if config.backend == "torch-int8":
+        import torch
+        model = _load_torch(name, revision, config)
+        # Swaps every Linear layer for a dynamically quantized int8 one; activations stay float.
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    if config.threads:
+        options.intra_op_num_threads = config.threads
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": options}
+    if config.backend == "onnx-int8":
+        model_kwargs["file_name"] = config.onnx_file
+    return SentenceTransformer(name, revision=revision, backend="onnx", model_kwargs=model_kwargs)
+
+def load_encoder(name: str, revision: Optional[str] = None, config: Optional[EncoderConfig] = None,
+                 torch_encoder: Optional[Callable[[], Encoder]] = None) -> Encoder:
+    """
+    Loads an encoder with the configured backend. Falls back to plain PyTorch, with a
+    warning, when the backend's packages or model files are missing or its output
+    drifts from PyTorch's by more than config.tolerance. torch_encoder supplies that
+    PyTorch encoder, which is also the parity reference; the registry passes its
+    shared one, so verifying never loads a second copy. By default a new one is loaded.
+    """
+    config = config or EncoderConfig()
+    if config.backend == "torch":
+        return Encoder(_load_torch(name, revision, config), "torch", config.batch_size)
+    if torch_encoder is None:
+        torch_encoder = lambda: Encoder(_load_torch(name, revision, config), "torch", config.batch_size)
+    try:
+        encoder = Encoder(_load_backend(name, revision, config), config.backend, config.batch_size)
+    except (ImportError, OSError, TypeError, ValueError) as e:
+        print(f"WARN: Could not load the {config.backend} encoder backend ({e}). Using PyTorch instead.")
+        return torch_encoder()
+    if config.verify:
+        reference = torch_encoder()
+        similarity = parity(reference, encoder)
+        if similarity < config.tolerance:
+            print(f"WARN: The {config.backend} encoder backend's embeddings differ from PyTorch's "
+                  f"(cosine {similarity:.3f} < {config.tolerance}). Using PyTorch instead.")
+            return reference
+    return encoder
@@ -0,0 +1,120 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from .model_registry import DEFAULT_NLP_NAME, get_nlp, registry
+
+# Named-entity types worth a node in the knowledge graph. Numbers, dates and the like
+# (CARDINAL, DATE, MONEY, ...) would link unrelated facts that share "two" or "today".
+ENTITY_LABELS = frozenset({"PERSON", "NORP", "FAC", "ORG", "GPE", "LOC", "PRODUCT", "EVENT", "WORK_OF_ART", "LAW", "LANGUAGE"})
+# Pipeline components NER needs; the tagger, parser, lemmatizer etc. are disabled.
+NER_COMPONENTS = ("tok2vec", "ner")
+# Co-occurrence edges grow with the square of the entities in a text, so only the first
+# few of a long text are linked to each other.
+MAX_LINKED_ENTITIES = 12
+# How long a save waits for extractions that are still running.
+FLUSH_TIMEOUT = 5.0
+
+@dataclass
+class Extraction:
+    """The entities found in one submitted text."""
+    text: str
+    kind: str  # "fact" or "story"
+    entities: List[str]
+
+class EntityExtractor:
+    """
+    Runs spaCy NER over new facts and story turns on a background thread, so the turn
+    loop only pays for putting texts on a queue. Whatever is queued when the thread
+    wakes up goes through one nlp.pipe call, with every component NER does not need
+    disabled. n_process > 1 hands the batches to spaCy's worker processes, which only
+    pays off for large imports. Results go to the outbox each submission names; the
+    thread never touches a MemoryManager.
+    """
+    def __init__(self, nlp, batch_size: int = 64, n_process: int = 1, labels=ENTITY_LABELS):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.labels = labels
+        self.disabled = [name for name in nlp.pipe_names if name not in NER_COMPONENTS]
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.docs = 0
+        self.seconds = 0.0
+
+    @classmethod
+    def from_env(cls, nlp) -> "EntityExtractor":
+        """Reads ENTITY_WORKERS (spaCy processes) and ENTITY_BATCH_SIZE."""
+        return cls(nlp, batch_size=int(os.getenv("ENTITY_BATCH_SIZE", "64")),
+                   n_process=max(1, int(os.getenv("ENTITY_WORKERS", "1"))))
+
+    def extract(self, texts: Sequence[str]) -> List[List[str]]:
+        """Returns the entity names found in each text, in order, without duplicates."""
+        started = time.perf_counter()
+        found = []
+        for doc in self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process, disable=self.disabled):
+            names = []
+            for ent in doc.ents:
+                name = " ".join(ent.text.split())
+                if name and name not in names and (not self.labels or ent.label_ in self.labels):
+                    names.append(name)
+            found.append(names)
+        with self._lock:
+            self.docs += len(found)
+            self.seconds += time.perf_counter() - started
+        return found
+
+    def submit(self, texts: Sequence[str], outbox: "queue.SimpleQueue", kind: str = "fact") -> int:
+        """Queues texts for extraction; an Extraction per text is put on outbox. Returns how many were queued."""
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            return 0
+        self._start()
+        self._queue.put((texts, kind, outbox))
+        return len(texts)
+
+    def join(self):
+        """Blocks until everything submitted so far has been extracted."""
+        self._queue.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="entity-extractor", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            # Anything else already waiting shares the pipe() call.
+            while sum(len(job[0]) for job in jobs) < self.batch_size:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            texts = [text for job in jobs for text in job[0]]
+            try:
+                found = self.extract(texts)
+            except Exception as e:
+                print(f"WARN: Entity extraction failed ({e}).")
+                found = [[] for _ in texts]
+            position = 0
+            for job_texts, kind, outbox in jobs:
+                for text in job_texts:
+                    outbox.put(Extraction(text, kind, found[position]))
+                    position += 1
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"docs": self.docs, "seconds": self.seconds,
+                    "docs_per_second": self.docs / self.seconds if self.seconds else 0.0,
+                    "pending": self._queue.unfinished_tasks}
+
+def get_entity_extractor(name: str = DEFAULT_NLP_NAME) -> EntityExtractor:
+    """Returns the process-wide extractor for the given spaCy pipeline, so managers share its thread."""
+    return registry.get_or_load(("entities", name, None), lambda: EntityExtractor.from_env(get_nlp(name)))
@@ -1,16 +1,23 @@
-from .player import Player
-from .memory import MemoryManager
-from .world_db import get_default_world, Location
+import copy
 
 from .player import Player
 from .memory import MemoryManager
+from .undo import TurnDelta, UndoHistory
 from .world_db import get_default_world, Location, World
 
+# Top-level attributes watched by the undo engine. Objects such as the world are
+# compared by identity, so an unchanged world is shared rather than copied.
+UNDO_TRACKED_FIELDS = (
+    "world", "memory_manager", "current_location_key", "safety_level", "api_tier",
+    "api_calls", "total_input_tokens", "total_output_tokens",
+)
+
 class GameState:
-    def __init__(self, api_tier: str = "free"):
+    def __init__(self, api_tier: str = "free", world: World = None):
         self.player = Player()
+        # Models come from the shared registry, so a warm-up (game/warmup.py) makes this instant.
         self.memory_manager = MemoryManager()
-        self.world = get_default_world()
+        self.world = world if world is not None else get_default_world()
         self.story_history = []
         self.current_location_key = "tavern"
         self.safety_level = "high"
@@ -18,9 +25,11 @@ class GameState:
         self.api_calls = 0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        self._state_history = []
-        self._current_state_index = -1
         self._max_history_size = 10
+        self._undo_history = UndoHistory(self._max_history_size)
+        self._checkpoint = None
+        self._history_shadow = []
+        self._journal = None
 
     def to_dict(self):
         return {
@@ -37,10 +46,10 @@ class GameState:
         }
 
     @classmethod
-    def from_dict(cls, data):
+    def from_dict(cls, data, vectors=None):
         game_state = cls(api_tier=data.get("api_tier", "free"))
         game_state.player = Player.from_dict(data["player"])
-        game_state.memory_manager = MemoryManager.from_dict(data["memory_manager"])
+        game_state.memory_manager = MemoryManager.from_dict(data["memory_manager"], vectors=vectors)
         game_state.world = World.from_dict(data["world"])
         game_state.story_history = data["story_history"]
         game_state.current_location_key = data["current_location_key"]
@@ -51,48 +60,168 @@ class GameState:
         return game_state
 
     def _save_snapshot(self):
-        if self._current_state_index < len(self._state_history) - 1:
-            self._state_history = self._state_history[:self._current_state_index + 1]
-        
-        # --- MODIFIED: Use to_dict for faster snapshots ---
-        snapshot = self.to_dict() 
-        
-        self._state_history.append(snapshot)
-        self._current_state_index = len(self._state_history) - 1
-        if len(self._state_history) > self._max_history_size:
-            self._state_history.pop(0)
-            self._current_state_index -= 1
-
-    def _load_snapshot(self, index):
-        if 0 <= index < len(self._state_history):
-            snapshot_dict = self._state_history[index]
-            
-            # --- MODIFIED: Reconstruct state from dict ---
-            new_state = GameState.from_dict(snapshot_dict)
-            self.player = new_state.player
-            self.memory_manager = new_state.memory_manager
-            self.world = new_state.world
-            self.story_history = new_state.story_history
-            self.current_location_key = new_state.current_location_key
-            self.safety_level = new_state.safety_level
-            self.api_tier = new_state.api_tier
-            self.api_calls = new_state.api_calls
-            self.total_input_tokens = new_state.total_input_tokens
-            self.total_output_tokens = new_state.total_output_tokens
-            
-            self._current_state_index = index
-            return True
-        return False
+        """
+        Records an undo checkpoint. Only the changes since the previous checkpoint are
+        stored, so the cost depends on what happened this turn rather than campaign size.
+        """
+        if self._checkpoint is None:
+            self._history_shadow = list(self.story_history)
+            self._take_checkpoint()
+            return
+
+        delta = self._capture_delta()
+        if not delta.is_empty():
+            self._undo_history.push(delta)
+            self._journal_delta(delta)
+
+    def _take_checkpoint(self):
+        self._checkpoint = {
+            "fields": {name: getattr(self, name) for name in UNDO_TRACKED_FIELDS},
+            "player": copy.deepcopy(self.player.to_dict()),
+            "story_history": self.story_history,
+        }
+        self.memory_manager.track_changes()
+
+    def _capture_delta(self) -> TurnDelta:
+        """Diffs the live state against the last checkpoint and moves the checkpoint forward."""
+        checkpoint = self._checkpoint
+        delta = TurnDelta()
+
+        for name in UNDO_TRACKED_FIELDS:
+            old, new = checkpoint["fields"][name], getattr(self, name)
+            if old is not new and old != new:
+                delta.fields[name] = (old, new)
+                checkpoint["fields"][name] = new
+
+        player_now = self.player.to_dict()
+        for key, value in player_now.items():
+            old = checkpoint["player"].get(key)
+            if value != old:
+                new = copy.deepcopy(value)
+                delta.player[key] = (old, new)
+                checkpoint["player"][key] = new
+
+        # Story history is append-mostly: check the boundary entry and only diff the tail.
+        shadow, history = self._history_shadow, self.story_history
+        n = len(shadow)
+        if history is checkpoint["story_history"] and len(history) >= n and (n == 0 or history[n - 1] is shadow[-1]):
+            start = n
+        else:
+            start = 0
+            limit = min(n, len(history))
+            while start < limit and history[start] == shadow[start]:
+                start += 1
+        if start < n or start < len(history):
+            delta.history_start = start
+            delta.history_removed = shadow[start:]
+            delta.history_added = history[start:]
+            shadow[start:] = delta.history_added
+        checkpoint["story_history"] = history
+
+        owner = delta.fields.get("memory_manager", (self.memory_manager,))[0]
+        delta.memory_changes = owner.drain_changes()
+        delta.memory_owner = owner
+        self.memory_manager.track_changes()
+        return delta
+
+    def _apply_delta(self, delta: TurnDelta, reverse: bool = False):
+        """Applies a delta (or reverts it) in place and moves the checkpoint to the result."""
+        changes = reversed(delta.memory_changes) if reverse else delta.memory_changes
+        for change in changes:
+            delta.memory_owner.apply_change(change, reverse=reverse)
+
+        for name, (old, new) in delta.fields.items():
+            setattr(self, name, old if reverse else new)
+
+        for key, (old, new) in delta.player.items():
+            setattr(self.player, key, copy.deepcopy(old if reverse else new))
+
+        if delta.history_removed or delta.history_added:
+            tail = delta.history_removed if reverse else delta.history_added
+            self.story_history[delta.history_start:] = tail
+            self._history_shadow[delta.history_start:] = tail
+
+        self._take_checkpoint()
+
+    def _discard_pending_changes(self):
+        """Rolls back anything that happened since the last checkpoint."""
+        pending = self._capture_delta()
+        if not pending.is_empty():
+            self._apply_delta(pending, reverse=True)
 
     def undo(self):
-        if self._current_state_index > 0:
-            return self._load_snapshot(self._current_state_index - 1)
-        return False
+        if self._checkpoint is None or not self._undo_history.can_undo():
+            return False
+        self._discard_pending_changes()
+        delta = self._undo_history.step_back()
+        self._apply_delta(delta, reverse=True)
+        self._journal_delta(delta, reverse=True)
+        return True
 
     def redo(self):
-        if self._current_state_index < len(self._state_history) - 1:
-            return self._load_snapshot(self._current_state_index + 1)
-        return False
+        if self._checkpoint is None or not self._undo_history.can_redo():
+            return False
+        self._discard_pending_changes()
+        delta = self._undo_history.step_forward()
+        self._apply_delta(delta)
+        self._journal_delta(delta)
+        return True
+
+    def enable_journal(self):
+        """Starts (or restarts) collecting JSON records of every checkpoint, undo and redo."""
+        self._journal = []
+        # Boosts and entity merges so far are part of whatever base comes with this journal.
+        self.memory_manager.drain_usage()
+
+    def drain_journal(self) -> list:
+        """Returns the journal records collected since the last call."""
+        if not self._journal:
+            return []
+        records, self._journal = self._journal, []
+        return records
+
+    def _journal_delta(self, delta: TurnDelta, reverse: bool = False):
+        """Appends a JSON-safe, forward-only description of an applied delta to the journal."""
+        if self._journal is None:
+            return
+        record = {}
+        fields = {}
+        for name, (old, new) in delta.fields.items():
+            value = old if reverse else new
+            fields[name] = value.to_dict() if hasattr(value, "to_dict") else value
+        if fields:
+            record["fields"] = fields
+        if delta.player:
+            record["player"] = {key: (old if reverse else new) for key, (old, new) in delta.player.items()}
+        if delta.history_removed or delta.history_added:
+            record["history"] = {
+                "start": delta.history_start,
+                "entries": delta.history_removed if reverse else delta.history_added,
+            }
+        # A swapped memory manager is serialized in full, which already includes its changes.
+        if delta.memory_changes and "memory_manager" not in fields:
+            changes = reversed(delta.memory_changes) if reverse else delta.memory_changes
+            record["memory"] = [delta.memory_owner.change_to_record(c, reverse=reverse) for c in changes]
+        # Relevance boosts and entity merges are not part of the delta (undo keeps them),
+        # so they are journaled separately, after the changes they may refer to.
+        usage = self.memory_manager.drain_usage()
+        if usage and "memory_manager" not in fields:
+            record["memory"] = record.get("memory", []) + usage
+        self._journal.append(record)
+
+    def apply_journal_record(self, record: dict):
+        """Replays a record produced by the journal on top of this state."""
+        self.memory_manager.apply_records(record.get("memory", []))
+        for name, value in record.get("fields", {}).items():
+            if name == "world":
+                value = World.from_dict(value)
+            elif name == "memory_manager":
+                value = MemoryManager.from_dict(value)
+            setattr(self, name, value)
+        for key, value in record.get("player", {}).items():
+            setattr(self.player, key, value)
+        if "history" in record:
+            self.story_history[record["history"]["start"]:] = record["history"]["entries"]
 
     def get_current_location_object(self) -> Location | None:
         return self.world.get_location(self.current_location_key)
@@ -107,6 +236,7 @@ class GameState:
 
     def add_to_story(self, text):
         self.story_history.append(text)
+        self.memory_manager.observe_story(text)
 
     def get_current_story(self):
         if not self.story_history:
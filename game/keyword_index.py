@@ -0,0 +1,46 @@
+import re
+from typing import Dict, List, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase words, ignoring punctuation."""
+    return _WORD.findall(text.lower())
+
+class KeywordIndex:
+    """
+    Exact, case-insensitive whole-word phrase lookup for large sets of keywords.
+    Phrases are bucketed by their first word, so finding the phrases in a text costs
+    one dict probe per word of the text (plus a comparison per phrase starting with
+    that word), no matter how many phrases are indexed.
+    """
+    def __init__(self):
+        # first word -> {phrase words: keys that use the phrase}
+        self._buckets: Dict[str, Dict[Tuple[str, ...], Set[int]]] = {}
+        self._max_words = 0
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def add(self, phrase: str, key: int) -> bool:
+        """Indexes phrase under key. Returns False if the phrase has no words to match on."""
+        words = tuple(tokenize(phrase))
+        if not words:
+            return False
+        self._buckets.setdefault(words[0], {}).setdefault(words, set()).add(key)
+        self._max_words = max(self._max_words, len(words))
+        return True
+
+    def lookup(self, text: str) -> Set[int]:
+        """Returns the keys of every indexed phrase that occurs in text."""
+        found: Set[int] = set()
+        words = tokenize(text)
+        buckets = self._buckets
+        for i, word in enumerate(words):
+            bucket = buckets.get(word)
+            if bucket is None:
+                continue
+            for phrase, keys in bucket.items():
+                if len(phrase) == 1 or tuple(words[i:i + len(phrase)]) == phrase:
+                    found.update(keys)
+        return found
@@ -0,0 +1,339 @@
+import base64
+import io
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Edge changes are buffered until they exceed this many, or this fraction of the
+# compacted edges, and are then folded into the arrays in one pass.
+COMPACT_MIN_CHANGES = 1024
+COMPACT_FRACTION = 0.25
+
+class KnowledgeGraph:
+    """
+    An undirected graph of string-labelled nodes (facts, tags, ...) stored as integer
+    ids. Each label is held once, in the label table; adjacency is a CSR pair of numpy
+    arrays (row offsets and sorted neighbour ids), so an edge costs 8 bytes instead of
+    a pair of dict entries. Edge changes go to a small buffer that is folded into the
+    arrays once it grows past COMPACT_FRACTION of the graph, which also renumbers the
+    ids densely. The methods MemoryManager needs mirror networkx's (has_node,
+    add_edge, neighbors, degree, ...); to_networkx() gives a full networkx copy.
+    """
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._labels: List[Optional[str]] = []  # None for removed nodes
+        self._types = array('b')
+        self._type_names: List[str] = [""]
+        self._degree = array('i')
+        # Compacted adjacency: neighbours of node u are _indices[_indptr[u]:_indptr[u + 1]]
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        # Changes since the last compaction
+        self._added: Dict[int, Set[int]] = {}
+        self._removed: Set[Tuple[int, int]] = set()
+        self._changes = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self._ids
+
+    def has_node(self, label: str) -> bool:
+        return label in self._ids
+
+    def number_of_nodes(self) -> int:
+        return len(self._ids)
+
+    def number_of_edges(self) -> int:
+        return sum(self._degree) // 2
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def edges(self) -> List[Tuple[str, str]]:
+        labels = self._labels
+        return [(labels[u], labels[v]) for u in range(len(labels)) if labels[u] is not None
+                for v in self._neighbor_ids(u) if u < v]
+
+    def node_type(self, label: str) -> str:
+        return self._type_names[self._types[self._ids[label]]]
+
+    def _type_code(self, node_type: Optional[str]) -> int:
+        node_type = node_type or ""
+        try:
+            return self._type_names.index(node_type)
+        except ValueError:
+            self._type_names.append(node_type)
+            return len(self._type_names) - 1
+
+    def add_node(self, label: str, type: Optional[str] = None) -> int:
+        """Adds a node, or updates its type if it exists. Returns its id."""
+        node = self._ids.get(label)
+        if node is None:
+            node = len(self._labels)
+            self._ids[label] = node
+            self._labels.append(label)
+            self._types.append(self._type_code(type))
+            self._degree.append(0)
+        elif type is not None:
+            self._types[node] = self._type_code(type)
+        return node
+
+    def add_nodes_from(self, labels: Iterable[str], type: Optional[str] = None):
+        for label in labels:
+            self.add_node(label, type)
+
+    def remove_node(self, label: str):
+        node = self._ids.pop(label, None)
+        if node is None:
+            return
+        for other in list(self._neighbor_ids(node)):
+            self._remove_edge_ids(node, other)
+        self._labels[node] = None
+        self._types[node] = 0
+        self._maybe_compact()
+
+    def neighbors(self, label: str) -> List[str]:
+        return [self._labels[v] for v in self._neighbor_ids(self._ids[label])]
+
+    def degree(self, label: str) -> int:
+        return self._degree[self._ids[label]]
+
+    def _base_row(self, node: int) -> np.ndarray:
+        if node + 1 >= len(self._indptr):
+            return self._indices[:0]
+        return self._indices[self._indptr[node]:self._indptr[node + 1]]
+
+    def _neighbor_ids(self, node: int) -> List[int]:
+        row = self._base_row(node).tolist()
+        if self._removed:
+            row = [v for v in row if (min(node, v), max(node, v)) not in self._removed]
+        added = self._added.get(node)
+        return row + sorted(added) if added else row
+
+    def _in_base(self, u: int, v: int) -> bool:
+        row = self._base_row(u)
+        position = np.searchsorted(row, v)
+        return position < len(row) and row[position] == v
+
+    def _has_edge_ids(self, u: int, v: int) -> bool:
+        if v in self._added.get(u, ()):
+            return True
+        return (min(u, v), max(u, v)) not in self._removed and self._in_base(u, v)
+
+    def has_edge(self, a: str, b: str) -> bool:
+        u, v = self._ids.get(a), self._ids.get(b)
+        return u is not None and v is not None and self._has_edge_ids(u, v)
+
+    def add_edge(self, a: str, b: str):
+        """Adds an edge, adding either node (untyped) if it is missing."""
+        u, v = self.add_node(a), self.add_node(b)
+        if u == v or self._has_edge_ids(u, v):
+            return
+        pair = (min(u, v), max(u, v))
+        if pair in self._removed:
+            self._removed.discard(pair)
+        else:
+            self._added.setdefault(u, set()).add(v)
+            self._added.setdefault(v, set()).add(u)
+        self._degree[u] += 1
+        self._degree[v] += 1
+        self._changes += 1
+        self._maybe_compact()
+
+    def add_edges_from(self, pairs: Iterable[Tuple[str, str]]):
+        for a, b in pairs:
+            self.add_edge(a, b)
+
+    def remove_edge(self, a: str, b: str):
+        if not self.has_edge(a, b):
+            raise KeyError(f"No edge between {a!r} and {b!r}.")
+        self._remove_edge_ids(self._ids[a], self._ids[b])
+        self._maybe_compact()
+
+    def _remove_edge_ids(self, u: int, v: int):
+        added = self._added.get(u)
+        if added is not None and v in added:
+            added.discard(v)
+            self._added[v].discard(u)
+            for node in (u, v):
+                if not self._added[node]:
+                    del self._added[node]
+        else:
+            self._removed.add((min(u, v), max(u, v)))
+        self._degree[u] -= 1
+        self._degree[v] -= 1
+        self._changes += 1
+
+    def _maybe_compact(self):
+        if self._changes > max(COMPACT_MIN_CHANGES, COMPACT_FRACTION * len(self._indices)):
+            self.compact()
+
+    def compact(self):
+        """Folds buffered edge changes into the CSR arrays and renumbers live nodes densely."""
+        n = len(self._labels)
+        counts = np.diff(self._indptr)
+        src = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+        dst = self._indices.astype(np.int64)
+        keep = src < dst
+        src, dst = src[keep], dst[keep]
+        if self._removed:
+            removed = np.array([u * n + v for u, v in self._removed], dtype=np.int64)
+            keep = ~np.isin(src * n + dst, removed)
+            src, dst = src[keep], dst[keep]
+        added = [(u, v) for u, others in self._added.items() for v in others if u < v]
+        if added:
+            pairs = np.array(added, dtype=np.int64)
+            src, dst = np.concatenate([src, pairs[:, 0]]), np.concatenate([dst, pairs[:, 1]])
+
+        live = np.array([label is not None for label in self._labels], dtype=bool)
+        new_ids = np.cumsum(live) - 1
+        src, dst = new_ids[src], new_ids[dst]
+        self._labels = [label for label in self._labels if label is not None]
+        self._ids = {label: node for node, label in enumerate(self._labels)}
+        self._types = array('b', np.frombuffer(self._types, dtype=np.int8)[live].tobytes())
+        self._set_adjacency(len(self._labels), src, dst)
+
+    def _set_adjacency(self, n: int, src: np.ndarray, dst: np.ndarray):
+        """Builds the CSR arrays from undirected edges given once each."""
+        rows, cols = np.concatenate([src, dst]), np.concatenate([dst, src])
+        order = np.lexsort((cols, rows))
+        counts = np.bincount(rows, minlength=n)
+        self._indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._indptr[1:])
+        self._indices = cols[order].astype(np.int32)
+        self._degree = array('i', counts.astype(np.int32).tobytes())
+        self._added, self._removed, self._changes = {}, set(), 0
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        """
+        Returns a shortest path of labels from source to target, or None if they are
+        not connected. Bidirectional breadth-first search over the CSR arrays: each
+        step expands the smaller frontier with vectorized row gathers.
+        """
+        if source not in self._ids or target not in self._ids:
+            return None
+        if source == target:
+            return [source]
+        # Nodes added since the last compaction, even edgeless ones, have no CSR row yet.
+        if self._changes or len(self._indptr) - 1 != len(self._labels):
+            self.compact()
+        s, t = self._ids[source], self._ids[target]
+        n = len(self._labels)
+        # Per search side: the previous node on the path (-1 at the root) and the depth (-1 unvisited)
+        parents = [np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)]
+        depths = [np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)]
+        depths[0][s], depths[1][t] = 0, 0
+        frontiers, levels = [np.array([s]), np.array([t])], [0, 0]
+        indptr, indices = self._indptr, self._indices
+        while len(frontiers[0]) and len(frontiers[1]):
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            frontier = frontiers[side]
+            starts, lengths = indptr[frontier], indptr[frontier + 1] - indptr[frontier]
+            total = int(lengths.sum())
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+            found, via = indices[offsets].astype(np.int64), np.repeat(frontier, lengths)
+            fresh = depths[side][found] == -1
+            found, first = np.unique(found[fresh], return_index=True)
+            levels[side] += 1
+            parents[side][found] = via[fresh][first]
+            depths[side][found] = levels[side]
+            met = found[depths[1 - side][found] >= 0]
+            if len(met):
+                # The other side may have reached these nodes at different depths.
+                return self._join(parents, int(met[np.argmin(depths[1 - side][met])]))
+            frontiers[side] = found
+        return None
+
+    def _join(self, parents: List[np.ndarray], meeting: int) -> List[str]:
+        path = []
+        for side in (0, 1):
+            node, half = meeting, [meeting]
+            while parents[side][node] >= 0:
+                node = int(parents[side][node])
+                half.append(node)
+            path = half[::-1] if side == 0 else path + half[1:]
+        return [self._labels[node] for node in path]
+
+    def to_networkx(self):
+        """Returns an equivalent networkx.Graph (labels as nodes, 'type' attributes)."""
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from((label, {"type": self.node_type(label)} if self.node_type(label) else {}) for label in self._ids)
+        graph.add_edges_from(self.edges)
+        return graph
+
+    @classmethod
+    def from_networkx(cls, graph) -> "KnowledgeGraph":
+        knowledge = cls()
+        for label, attributes in graph.nodes(data=True):
+            knowledge.add_node(label, attributes.get("type"))
+        src = np.fromiter((knowledge._ids[a] for a, _ in graph.edges()), dtype=np.int64, count=graph.number_of_edges())
+        dst = np.fromiter((knowledge._ids[b] for _, b in graph.edges()), dtype=np.int64, count=graph.number_of_edges())
+        knowledge._set_adjacency(len(knowledge._labels), src, dst)
+        return knowledge
+
+    def to_bytes(self, shared_labels: Sequence[str] = ()) -> bytes:
+        """
+        Serializes the graph as compressed numpy arrays. Labels that appear in
+        shared_labels (e.g. the fact texts, which the save already contains) are stored
+        as positions in that sequence instead of as text.
+        """
+        self.compact()
+        positions = {label: i for i, label in enumerate(shared_labels)}
+        refs = np.array([positions.get(label, -1) for label in self._labels], dtype=np.int64)
+        inline = [label.encode("utf-8") for label, ref in zip(self._labels, refs) if ref < 0]
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            indptr=self._indptr, indices=self._indices,
+            types=np.frombuffer(self._types, dtype=np.int8),
+            type_names=np.frombuffer("\0".join(self._type_names).encode("utf-8"), dtype=np.uint8),
+            refs=refs,
+            inline_lengths=np.array([len(label) for label in inline], dtype=np.int64),
+            inline=np.frombuffer(b"".join(inline), dtype=np.uint8),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, shared_labels: Sequence[str] = ()) -> "KnowledgeGraph":
+        arrays = np.load(io.BytesIO(data))
+        knowledge = cls()
+        blob, offset, labels = arrays["inline"].tobytes(), 0, []
+        inline_lengths = iter(arrays["inline_lengths"].tolist())
+        for ref in arrays["refs"].tolist():
+            if ref >= 0:
+                labels.append(shared_labels[ref])
+            else:
+                length = next(inline_lengths)
+                labels.append(blob[offset:offset + length].decode("utf-8"))
+                offset += length
+        knowledge._labels = labels
+        knowledge._ids = {label: node for node, label in enumerate(labels)}
+        knowledge._types = array('b', arrays["types"].tobytes())
+        knowledge._type_names = arrays["type_names"].tobytes().decode("utf-8").split("\0")
+        knowledge._indptr, knowledge._indices = arrays["indptr"], arrays["indices"]
+        knowledge._degree = array('i', np.diff(knowledge._indptr).astype(np.int32).tobytes())
+        return knowledge
+
+    def to_dict(self, shared_labels: Sequence[str] = ()) -> Dict[str, Any]:
+        """A JSON-safe wrapper around to_bytes()."""
+        return {"format": "csr", "data": base64.b64encode(self.to_bytes(shared_labels)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], shared_labels: Sequence[str] = ()) -> "KnowledgeGraph":
+        """Reads to_dict() output, or the networkx node-link data older saves contain."""
+        if not data:
+            return cls()
+        if data.get("format") == "csr":
+            return cls.from_bytes(base64.b64decode(data["data"]), shared_labels)
+        import networkx as nx
+        if "edges" in data:
+            return cls.from_networkx(nx.node_link_graph(data, edges="edges"))
+        if "links" in data:
+            return cls.from_networkx(nx.node_link_graph(data, edges="links"))
+        return cls.from_networkx(nx.node_link_graph(data))
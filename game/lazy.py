@@ -0,0 +1,46 @@
+import importlib
+import threading
+import types
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module until one of its attributes is used, then imports it and
+    forwards everything to it. Lets heavyweight dependencies (faiss, the Gemini SDK)
+    stay out of startup; a missing package only fails where it is actually needed.
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a proxy for the named module that imports it on first attribute access."""
+    return LazyModule(name)
+
+def is_loaded(module) -> bool:
+    """False for a lazy proxy whose module has not been imported yet, True otherwise."""
+    return not isinstance(module, LazyModule) or module.is_loaded
@@ -1,13 +1,21 @@
 from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Iterable, Optional, Any, Set, Tuple, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import faiss
+import hashlib
+import queue
+import sys
 import time
-import networkx as nx
-import spacy
-from thefuzz import fuzz
 
+from .model_registry import DEFAULT_ENCODER_NAME, get_encoder, get_nlp
+from .trigger_index import TriggerIndex
+from .vector_index import IndexConfig, VectorIndex
+from .columns import ColumnStore, columnar
+from .embedding_cache import EmbeddingCache, query_embeddings
+from .encoders import EncoderConfig
+from .knowledge_graph import KnowledgeGraph
+from .entities import FLUSH_TIMEOUT, MAX_LINKED_ENTITIES, EntityExtractor, Extraction, get_entity_extractor
+
+@columnar("relevance", "last_activated")
 @dataclass
 class StoryCard:
     """A conditional memory that is activated by specific trigger words with weights."""
@@ -22,11 +30,16 @@ class StoryCard:
     last_activated: float = field(default_factory=time.time)
 
     def to_dict(self):
-        return asdict(self)
+        return {"name": self.name, "entry": self.entry, "triggers": dict(self.triggers),
+                "dependencies": list(self.dependencies), "unlocks": list(self.unlocks),
+                "negative_triggers": list(self.negative_triggers), "activation_threshold": self.activation_threshold,
+                "relevance": self.relevance, "last_activated": self.last_activated}
 
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        card = cls(**data)
+        card.triggers = {sys.intern(trigger): weight for trigger, weight in card.triggers.items()}
+        return card
 
 @dataclass
 class StoryCardTemplate:
@@ -42,6 +55,7 @@ class StoryCardTemplate:
     def from_dict(cls, data):
         return cls(**data)
 
+@columnar("relevance", "last_accessed")
 @dataclass
 class MemoryFact:
     """A fact in the memory bank with relevance scoring and tags."""
@@ -49,15 +63,24 @@ class MemoryFact:
     relevance: float = 1.0
     last_accessed: float = field(default_factory=time.time)
     tags: List[str] = field(default_factory=list)
+    # Stable id of the fact's vector in the index, assigned by MemoryManager (-1 until stored)
+    fact_id: int = -1
 
     def to_dict(self):
-        return asdict(self)
+        return {"fact": self.fact, "relevance": self.relevance, "last_accessed": self.last_accessed,
+                "tags": list(self.tags), "fact_id": self.fact_id}
 
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        fact_obj = cls(**data)
+        fact_obj.tags = intern_tags(fact_obj.tags)
+        return fact_obj
 
-@dataclass
+def intern_tags(tags: List[str]) -> List[str]:
+    """Returns tags with each string interned, so a tag shared by many facts is stored once."""
+    return [sys.intern(tag) for tag in tags]
+
+@dataclass(slots=True)
 class FusedMemory:
     """A memory that has been processed by the contextual fusion system."""
     source: str
@@ -65,6 +88,34 @@ class FusedMemory:
     priority: float
     explanation: str
 
+@dataclass
+class MemoryChange:
+    """A structural change to the memory system, recorded so it can be undone or redone."""
+    kind: str  # add_fact, remove_fact, fact_tags, add_card, remove_card, activate_card or card_threshold
+    target: Any  # The MemoryFact, StoryCard or card name that changed
+    key: Optional[str] = None
+    embedding: Optional[np.ndarray] = None
+    old: Any = None
+    new: Any = None
+
+@dataclass
+class IngestReport:
+    """The outcome of a bulk add_many() call."""
+    added: int = 0
+    duplicates: int = 0  # Exact copies of stored facts (or of earlier facts in the same call)
+    rejected: int = 0  # Near-duplicates dropped by dedup_mode="reject"
+    merged: int = 0  # Near-duplicates folded into a stored fact by dedup_mode="merge"
+    seconds: float = 0.0
+
+    @property
+    def facts_per_second(self) -> float:
+        total = self.added + self.duplicates + self.rejected + self.merged
+        return total / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.added} added, {self.duplicates} duplicates, {self.rejected} rejected, {self.merged} merged "
+                f"in {self.seconds:.2f}s ({self.facts_per_second:.0f} facts/s)")
+
 class ContextualFusion:
     """Handles the fusion of memories from different sources."""
     def fuse(self, facts: List[Tuple[MemoryFact, str]], active_cards: List[Tuple[StoryCard, str]]) -> List[FusedMemory]:
@@ -95,20 +146,84 @@ class MemoryManager:
     Manages the AI's long-term memory, including a memory bank with semantic search,
     a knowledge graph, and story cards, inspired by the systems used in AI Dungeon.
     """
-    def __init__(self, model_name='all-MiniLM-L6-v2', decay_rate=0.01, fuzzy_threshold=80):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name=DEFAULT_ENCODER_NAME, decay_rate=0.01, fuzzy_threshold=80, dedup_mode=None, dedup_threshold=0.95, index_config: Optional[IndexConfig] = None,
+                 query_cache: Optional[EmbeddingCache] = None, encoder_config: Optional[EncoderConfig] = None, extract_entities: bool = True):
+        # Models come from the process-wide registry on first use, so building a manager
+        # is cheap and never waits for a warm-up still loading them (see game/warmup.py).
+        # The encoder backend is a deployment setting (ENCODER_* variables), not saved state.
+        self.model_name = model_name
+        self.encoder_config = encoder_config or EncoderConfig.from_env()
+        self._model = None
+        # Recent query embeddings, shared process-wide by default
+        self.query_cache = query_cache if query_cache is not None else query_embeddings
         self.memory_bank: List[MemoryFact] = []
+        # Which vector index backs the memory bank, and when it switches to approximate search
+        self.index_config = index_config or IndexConfig()
+        # Exact-text lookup kept alongside memory_bank for O(1) duplicate checks
+        self._facts_by_text: Dict[str, MemoryFact] = {}
+        # fact_id -> fact, for turning index search results back into facts
+        self._facts_by_id: Dict[int, MemoryFact] = {}
+        self._next_fact_id = 0
+        # Inverted tag index: lowercased tag -> ids of the facts carrying it
+        self._tag_index: Dict[str, Set[int]] = {}
+        # Relevance bookkeeping for stored facts and cards, kept in numpy columns so that
+        # decay and boosts are array operations
+        self._fact_columns = ColumnStore(("relevance", "last_accessed"))
+        self._card_columns = ColumnStore(("relevance", "last_activated"))
+        # Near-duplicate handling for new facts: None (off), "reject" or "merge",
+        # applied when cosine similarity to the closest stored fact >= dedup_threshold.
+        self.dedup_mode = dedup_mode
+        self.dedup_threshold = dedup_threshold
         self.index = None
         self.story_cards: Dict[str, StoryCard] = {}
         self.active_card_names: List[str] = []
         self.story_card_templates: Dict[str, StoryCardTemplate] = {}
         self.decay_rate = decay_rate
-        self.graph = nx.Graph()
-        self.nlp = spacy.load('en_core_web_sm')
+        self.graph = KnowledgeGraph()
+        self._nlp = None
+        # Named entities in new facts and story turns become graph nodes. Extraction runs
+        # on a shared background thread; finished results are merged by apply_entities().
+        self.extract_entities = extract_entities
+        self._entity_extractor = None
+        self._extracted: "queue.SimpleQueue[Extraction]" = queue.SimpleQueue()
+        self._extractions_pending = 0
         self.fuzzy_threshold = fuzzy_threshold
         self.fusion = ContextualFusion()
+        self._trigger_index = TriggerIndex(fuzzy_threshold)
+        self._change_log: Optional[List[MemoryChange]] = None
+        # Fact ids and card keys whose relevance went up, and entity results merged, since
+        # the last drain_usage(). Undo does not revert these, but a save journal needs them.
+        self._usage: Optional[Tuple[Set[int], Set[str], List[Extraction]]] = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_encoder(self.model_name, config=self.encoder_config)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = get_nlp()
+        return self._nlp
+
+    @property
+    def entity_extractor(self) -> Optional[EntityExtractor]:
+        if self._entity_extractor is None and self.extract_entities:
+            self._entity_extractor = get_entity_extractor()
+        return self._entity_extractor
+
+    @entity_extractor.setter
+    def entity_extractor(self, extractor: Optional[EntityExtractor]):
+        self._entity_extractor = extractor
+        self.extract_entities = extractor is not None
 
     def to_dict(self):
+        self.apply_entities(wait=True, timeout=FLUSH_TIMEOUT)
         return {
             "memory_bank": [fact.to_dict() for fact in self.memory_bank],
             "story_cards": {name: card.to_dict() for name, card in self.story_cards.items()},
@@ -116,35 +231,370 @@ class MemoryManager:
             "story_card_templates": {name: template.to_dict() for name, template in self.story_card_templates.items()},
             "decay_rate": self.decay_rate,
             "fuzzy_threshold": self.fuzzy_threshold,
-            "graph": nx.node_link_data(self.graph, edges="edges")
+            "dedup_mode": self.dedup_mode,
+            "dedup_threshold": self.dedup_threshold,
+            "index_config": self.index_config.to_dict(),
+            "model_name": self.model_name,
+            # Fact nodes are stored as positions in memory_bank rather than as text.
+            "graph": self.graph.to_dict(shared_labels=[fact.fact for fact in self.memory_bank])
         }
 
     @classmethod
-    def from_dict(cls, data):
-        manager = cls(decay_rate=data["decay_rate"], fuzzy_threshold=data["fuzzy_threshold"])
+    def from_dict(cls, data, vectors: Optional[Tuple[Dict[str, Any], Any, Any]] = None):
+        """
+        Rebuilds a manager from to_dict() output. If vectors (meta, index_bytes, embeddings)
+        from a save sidecar are given and match this bank, they are used instead of re-encoding.
+        """
+        manager = cls(model_name=data.get("model_name", DEFAULT_ENCODER_NAME), decay_rate=data["decay_rate"], fuzzy_threshold=data["fuzzy_threshold"],
+                      dedup_mode=data.get("dedup_mode"), dedup_threshold=data.get("dedup_threshold", 0.95),
+                      index_config=IndexConfig.from_dict(data["index_config"]) if data.get("index_config") else None)
         manager.memory_bank = [MemoryFact.from_dict(f) for f in data["memory_bank"]]
+        manager._facts_by_text = {f.fact: f for f in manager.memory_bank}
+        # Saves from before fact ids get them in bank order.
+        for fact_obj in manager.memory_bank:
+            manager._assign_fact_id(fact_obj)
+        manager._facts_by_id = {f.fact_id: f for f in manager.memory_bank}
+        for fact_obj in manager.memory_bank:
+            manager._index_fact_tags(fact_obj, fact_obj.tags)
+        manager._fact_columns.attach_many(manager.memory_bank)
         manager.story_cards = {name: StoryCard.from_dict(c) for name, c in data["story_cards"].items()}
+        manager._card_columns.attach_many(manager.story_cards.values())
         manager.active_card_names = data["active_card_names"]
         manager.story_card_templates = {name: StoryCardTemplate.from_dict(t) for name, t in data["story_card_templates"].items()}
+        manager._rebuild_trigger_index()
         
-        graph_data = data.get("graph")
-        if graph_data:
-            if "edges" in graph_data:
-                manager.graph = nx.node_link_graph(graph_data, edges="edges")
-            elif "links" in graph_data:
-                manager.graph = nx.node_link_graph(graph_data, edges="links")
-            else:
-                manager.graph = nx.node_link_graph(graph_data)
-        else:
-            manager.graph = nx.Graph()
+        manager.graph = KnowledgeGraph.from_dict(data.get("graph"), shared_labels=[fact.fact for fact in manager.memory_bank])
 
-        manager._rebuild_index()
+        if vectors is None or not manager.load_vectors(*vectors):
+            manager._rebuild_index()
         return manager
 
+    def vector_fingerprint(self) -> Dict[str, Any]:
+        """Identifies the encoder and the exact facts the current embeddings were computed from."""
+        digest = hashlib.blake2b(digest_size=16)
+        for fact in self.memory_bank:
+            digest.update(f"{fact.fact_id}:{fact.fact}".encode("utf-8"))
+            digest.update(b"\0")
+        return {
+            "model": self.model_name,
+            "dim": self.model.get_sentence_embedding_dimension(),
+            "count": len(self.memory_bank),
+            "facts": digest.hexdigest(),
+        }
+
+    def export_vectors(self) -> Optional[Tuple[Dict[str, Any], np.ndarray, np.ndarray]]:
+        """
+        Captures the embeddings matrix and the serialized search index for a save sidecar.
+        Returns (meta, embeddings, index_bytes), or None when the bank is empty.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return None
+        # Rows follow memory_bank order, so the ids can be recovered from the JSON save.
+        embeddings = self.index.reconstruct_batch(self._fact_ids())
+        if self.index_config.sidecar_dtype == "float16":
+            embeddings = embeddings.astype(np.float16)
+        index_bytes = self.index.serialize()
+        return self.vector_fingerprint(), embeddings, index_bytes
+
+    def load_vectors(self, meta: Dict[str, Any], index_bytes=None, embeddings=None) -> bool:
+        """
+        Installs persisted vectors if their fingerprint matches this bank and encoder.
+        index_bytes and embeddings may be memory-mapped arrays. Returns False if the
+        caller has to re-encode instead.
+        """
+        if not meta or meta != self.vector_fingerprint():
+            return False
+        index = VectorIndex.restore(meta["dim"], self.index_config, self._fact_ids(), index_bytes, embeddings)
+        if index is None:
+            return False
+        self.index = index
+        return True
+
+
+    def track_changes(self):
+        """Starts recording structural changes so the undo engine can replay them."""
+        if self._change_log is None:
+            self._change_log = []
+
+    def drain_changes(self) -> List[MemoryChange]:
+        """Returns the changes recorded since the last call and clears the log."""
+        if not self._change_log:
+            return []
+        changes, self._change_log = self._change_log, []
+        return changes
+
+    def drain_usage(self) -> List[Dict[str, Any]]:
+        """
+        Returns journal records (see apply_record) for the relevance boosts and entity
+        merges since the last call, and keeps tracking them. Records carry the values
+        as they are now, so replaying one twice is harmless.
+        """
+        if self._usage is None:
+            self._usage = (set(), set(), [])
+            return []
+        fact_ids, card_keys, extractions = self._usage
+        self._usage = (set(), set(), [])
+        records = []
+        facts = [self._facts_by_id[i] for i in fact_ids if i in self._facts_by_id]
+        if facts:
+            records.append({"op": "fact_usage", "facts": [[f.fact, f.relevance, f.last_accessed] for f in facts]})
+        cards = [(key, self.story_cards[key]) for key in card_keys if key in self.story_cards]
+        if cards:
+            records.append({"op": "card_usage", "cards": [[key, c.relevance, c.last_activated] for key, c in cards]})
+        records.extend({"op": "entities", "text": e.text, "kind": e.kind, "entities": e.entities} for e in extractions)
+        return records
+
+    def _record(self, change: MemoryChange):
+        if self._change_log is not None:
+            self._change_log.append(change)
+
+    def apply_change(self, change: MemoryChange, reverse: bool = False):
+        """Re-applies (or, with reverse=True, reverts) a recorded change in place without re-encoding."""
+        kind = change.kind
+        if kind in ("add_fact", "remove_fact"):
+            if (kind == "add_fact") != reverse:
+                self._insert_fact(change.target, change.embedding)
+            else:
+                self._delete_fact(change.target)
+        elif kind == "fact_tags":
+            self._set_fact_tags(change.target, change.old if reverse else change.new)
+        elif kind in ("add_card", "remove_card"):
+            if (kind == "add_card") != reverse:
+                self._store_card(change.key, change.target)
+            else:
+                self._drop_card(change.key)
+        elif kind == "activate_card":
+            if reverse:
+                self._deactivate_card(change.target)
+            else:
+                self.active_card_names.append(change.target)
+        elif kind == "card_threshold":
+            change.target.activation_threshold = change.old if reverse else change.new
+
+    def _deactivate_card(self, name: str):
+        """Removes the most recent activation of a card."""
+        if name in self.active_card_names:
+            idx = len(self.active_card_names) - 1 - self.active_card_names[::-1].index(name)
+            del self.active_card_names[idx]
+
+    def change_to_record(self, change: MemoryChange, reverse: bool = False) -> Dict[str, Any]:
+        """Serializes a change (or its inverse) as a JSON-safe operation for the save journal."""
+        kind = change.kind
+        if kind in ("add_fact", "remove_fact"):
+            if (kind == "add_fact") != reverse:
+                return {"op": "add_fact", "fact": change.target.to_dict()}
+            return {"op": "remove_fact", "fact": change.target.fact}
+        if kind == "fact_tags":
+            return {"op": "fact_tags", "fact": change.target.fact, "tags": change.old if reverse else change.new}
+        if kind in ("add_card", "remove_card"):
+            if (kind == "add_card") != reverse:
+                return {"op": "add_card", "key": change.key, "card": change.target.to_dict()}
+            return {"op": "remove_card", "key": change.key}
+        if kind == "activate_card":
+            return {"op": "deactivate_card" if reverse else "activate_card", "name": change.target}
+        return {"op": "card_threshold", "key": change.key, "value": change.old if reverse else change.new}
+
+    def apply_records(self, records: List[Dict[str, Any]]):
+        """Replays a sequence of operations, encoding runs of added facts in one batch."""
+        pending: List[MemoryFact] = []
+        for record in records:
+            if record["op"] == "add_fact":
+                pending.append(MemoryFact.from_dict(record["fact"]))
+                continue
+            if pending:
+                self._insert_facts(pending, self.model.encode([f.fact for f in pending]))
+                pending = []
+            self.apply_record(record)
+        if pending:
+            self._insert_facts(pending, self.model.encode([f.fact for f in pending]))
+
+    def apply_record(self, record: Dict[str, Any]):
+        """Replays an operation produced by change_to_record."""
+        op = record["op"]
+        if op == "add_fact":
+            fact_obj = MemoryFact.from_dict(record["fact"])
+            self._insert_fact(fact_obj, self.model.encode([fact_obj.fact]))
+        elif op == "remove_fact":
+            fact_obj = self._facts_by_text.get(record["fact"])
+            if fact_obj is not None:
+                self._delete_fact(fact_obj)
+        elif op == "fact_tags":
+            fact_obj = self._facts_by_text.get(record["fact"])
+            if fact_obj is not None:
+                self._set_fact_tags(fact_obj, record["tags"])
+        elif op == "add_card":
+            card = StoryCard.from_dict(record["card"])
+            self._store_card(record["key"], card)
+        elif op == "remove_card":
+            self._drop_card(record["key"])
+        elif op == "activate_card":
+            self.active_card_names.append(record["name"])
+        elif op == "deactivate_card":
+            self._deactivate_card(record["name"])
+        elif op == "card_threshold":
+            card = self.story_cards.get(record["key"])
+            if card is not None:
+                card.activation_threshold = record["value"]
+        elif op == "fact_usage":
+            for fact, relevance, last_accessed in record["facts"]:
+                fact_obj = self._facts_by_text.get(fact)
+                if fact_obj is not None:
+                    fact_obj.relevance, fact_obj.last_accessed = relevance, last_accessed
+        elif op == "card_usage":
+            for key, relevance, last_activated in record["cards"]:
+                card = self.story_cards.get(key)
+                if card is not None:
+                    card.relevance, card.last_activated = relevance, last_activated
+        elif op == "entities":
+            self._merge_entities(Extraction(record["text"], record["kind"], record["entities"]))
+
+    def _insert_fact(self, fact_obj: MemoryFact, embedding: np.ndarray):
+        """Adds an already-encoded fact to the bank, the index and the knowledge graph."""
+        self._insert_facts([fact_obj], embedding)
+
+    def _insert_facts(self, fact_objs: List[MemoryFact], embeddings: np.ndarray):
+        """Adds already-encoded facts with one index call and one pass over the graph."""
+        if not fact_objs:
+            return
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32').reshape(len(fact_objs), -1)
+        self.memory_bank.extend(fact_objs)
+        for fact_obj in fact_objs:
+            # Re-inserted facts (undo, redo, journal replay) keep their id.
+            self._assign_fact_id(fact_obj)
+            fact_obj.tags = intern_tags(fact_obj.tags)
+            self._facts_by_text[fact_obj.fact] = fact_obj
+            self._facts_by_id[fact_obj.fact_id] = fact_obj
+            self._index_fact_tags(fact_obj, fact_obj.tags)
+        self._fact_columns.attach_many(fact_objs)
+        if self.index is None:
+            self._initialize_index(embeddings.shape[1])
+        self.index.add(embeddings, np.array([f.fact_id for f in fact_objs], dtype='int64'))
+
+        self.graph.add_nodes_from((fact_obj.fact for fact_obj in fact_objs), type='fact')
+        self.graph.add_nodes_from({tag for fact_obj in fact_objs for tag in fact_obj.tags}, type='tag')
+        self.graph.add_edges_from((fact_obj.fact, tag) for fact_obj in fact_objs for tag in fact_obj.tags)
+        self._queue_entities([fact_obj.fact for fact_obj in fact_objs], "fact")
+
+    def _queue_entities(self, texts: List[str], kind: str):
+        if self.entity_extractor is not None:
+            self._extractions_pending += self.entity_extractor.submit(texts, self._extracted, kind)
+
+    def observe_story(self, text: str):
+        """Queues a story turn for entity extraction."""
+        self._queue_entities([text], "story")
+
+    def apply_entities(self, wait: bool = False, timeout: Optional[float] = None) -> int:
+        """
+        Merges finished extractions into the graph: an 'entity' node per name, an edge
+        from each fact to the entities it mentions, and edges between entities named in
+        the same fact or turn. With wait, first blocks (up to timeout) until everything
+        this manager queued is done. Returns the number of texts merged.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        merged = 0
+        while self._extractions_pending:
+            try:
+                if wait:
+                    result = self._extracted.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                else:
+                    result = self._extracted.get_nowait()
+            except queue.Empty:
+                break
+            self._extractions_pending -= 1
+            merged += 1
+            self._merge_entities(result)
+        return merged
+
+    def _merge_entities(self, result: Extraction):
+        # Facts removed since they were queued contribute nothing.
+        if result.kind == "fact" and result.text not in self._facts_by_text:
+            return
+        if self._usage is not None:
+            self._usage[2].append(result)
+        names = [name for name in result.entities if name != result.text][:MAX_LINKED_ENTITIES]
+        for name in names:
+            if not self.graph.has_node(name):
+                self.graph.add_node(name, type='entity')
+            if result.kind == "fact":
+                self.graph.add_edge(result.text, name)
+        self.graph.add_edges_from((a, b) for i, a in enumerate(names) for b in names[i + 1:])
+
+    def _delete_fact(self, fact_obj: MemoryFact) -> np.ndarray:
+        """Removes a fact from the bank, the index and the graph, returning its embedding."""
+        return self._delete_facts([fact_obj])[0]
+
+    def _delete_facts(self, fact_objs: List[MemoryFact]) -> np.ndarray:
+        """
+        Removes facts from the bank, the index and the graph in one pass, returning their
+        embeddings. The index only tombstones the ids, so nothing is re-encoded or rebuilt.
+        """
+        ids = np.array([f.fact_id for f in fact_objs], dtype='int64')
+        embeddings = self.index.reconstruct_batch(ids)
+        doomed = {id(f) for f in fact_objs}
+        self.memory_bank = [f for f in self.memory_bank if id(f) not in doomed]
+        for fact_obj in fact_objs:
+            if self._facts_by_text.get(fact_obj.fact) is fact_obj:
+                del self._facts_by_text[fact_obj.fact]
+            self._facts_by_id.pop(fact_obj.fact_id, None)
+            self._unindex_fact_tags(fact_obj, fact_obj.tags)
+            self._fact_columns.detach(fact_obj)
+        self.index.remove(ids)
+
+        for fact_obj in fact_objs:
+            if self.graph.has_node(fact_obj.fact):
+                neighbours = list(self.graph.neighbors(fact_obj.fact))
+                self.graph.remove_node(fact_obj.fact)
+                for tag in neighbours:
+                    if self.graph.degree(tag) == 0:
+                        self.graph.remove_node(tag)
+        return embeddings
+
+    def _index_fact_tags(self, fact_obj: MemoryFact, tags: List[str]):
+        for tag in tags:
+            self._tag_index.setdefault(tag.lower(), set()).add(fact_obj.fact_id)
+
+    def _unindex_fact_tags(self, fact_obj: MemoryFact, tags: List[str]):
+        for tag in tags:
+            ids = self._tag_index.get(tag.lower())
+            if ids is not None:
+                ids.discard(fact_obj.fact_id)
+                if not ids:
+                    del self._tag_index[tag.lower()]
+
+    def _ids_with_tags(self, tags: List[str]) -> np.ndarray:
+        """Returns the ids of the facts carrying every one of tags (case-insensitive)."""
+        posting_lists = [self._tag_index.get(tag.lower(), set()) for tag in set(tags)]
+        posting_lists.sort(key=len)
+        ids = set(posting_lists[0])
+        for posting in posting_lists[1:]:
+            ids &= posting
+        return np.fromiter(sorted(ids), dtype='int64', count=len(ids))
+
+    def _assign_fact_id(self, fact_obj: MemoryFact):
+        if fact_obj.fact_id < 0:
+            fact_obj.fact_id = self._next_fact_id
+        self._next_fact_id = max(self._next_fact_id, fact_obj.fact_id + 1)
+
+    def _fact_ids(self) -> np.ndarray:
+        return np.array([f.fact_id for f in self.memory_bank], dtype='int64')
+
+    def _set_fact_tags(self, fact_obj: MemoryFact, tags: List[str]):
+        """Replaces a stored fact's tags, keeping the knowledge graph in step."""
+        for tag in set(fact_obj.tags) - set(tags):
+            if self.graph.has_edge(fact_obj.fact, tag):
+                self.graph.remove_edge(fact_obj.fact, tag)
+                if self.graph.degree(tag) == 0:
+                    self.graph.remove_node(tag)
+        self._unindex_fact_tags(fact_obj, fact_obj.tags)
+        fact_obj.tags = intern_tags(tags)
+        self._index_fact_tags(fact_obj, fact_obj.tags)
+        for tag in fact_obj.tags:
+            self.graph.add_node(tag, type='tag')
+            self.graph.add_edge(fact_obj.fact, tag)
 
     def _initialize_index(self, dimensions: int):
-        """Initializes the FAISS index."""
-        self.index = faiss.IndexFlatL2(dimensions)
+        """Initializes the vector index."""
+        self.index = VectorIndex(dimensions, self.index_config)
 
     def _rebuild_index(self):
         """Rebuilds the FAISS index from the current memory bank."""
@@ -155,27 +605,145 @@ class MemoryManager:
         dimensions = self.model.get_sentence_embedding_dimension()
         self._initialize_index(dimensions)
         embeddings = self.model.encode([fact.fact for fact in self.memory_bank])
-        self.index.add(embeddings)
+        self.index.add(embeddings, self._fact_ids())
 
-    def add_to_memory_bank(self, fact: str, tags: Optional[List[str]] = None):
+    def add_to_memory_bank(self, fact: str, tags: Optional[List[str]] = None) -> Optional[MemoryFact]:
         """
         Adds a fact to the long-term memory bank, creating a vector embedding for it,
         and adds it to the knowledge graph.
+        Returns the stored fact: the new one, or the existing one it duplicates or was
+        merged into. Returns None if it was rejected as a near-duplicate.
         """
-        if fact not in [f.fact for f in self.memory_bank]:
-            tags = tags or []
-            new_fact = MemoryFact(fact=fact, tags=tags)
-            self.memory_bank.append(new_fact)
-            
-            embedding = self.model.encode([fact])
-            if self.index is None:
-                self._initialize_index(embedding.shape[1])
-            self.index.add(embedding)
-            
-            self.graph.add_node(fact, type='fact')
-            for tag in tags:
-                self.graph.add_node(tag, type='tag')
-                self.graph.add_edge(fact, tag)
+        existing = self._facts_by_text.get(fact)
+        if existing is not None:
+            return existing
+        tags = tags or []
+        embedding = self.model.encode([fact])
+        if self.dedup_mode:
+            similar = self._find_near_duplicate(embedding)
+            if similar is not None:
+                if self.dedup_mode == "merge":
+                    merged_tags = similar.tags + [t for t in tags if t not in similar.tags]
+                    if merged_tags != similar.tags:
+                        self._record(MemoryChange("fact_tags", similar, old=list(similar.tags), new=merged_tags))
+                        self._set_fact_tags(similar, merged_tags)
+                    return similar
+                return None
+        new_fact = MemoryFact(fact=fact, tags=tags)
+        self._insert_fact(new_fact, embedding)
+        self._record(MemoryChange("add_fact", new_fact, embedding=embedding[0]))
+        return new_fact
+
+    def add_many(self, facts: Iterable[Union[str, Tuple[str, List[str]]]], tags: Optional[List[str]] = None, batch_size: int = 256) -> IngestReport:
+        """
+        Bulk version of add_to_memory_bank for importing large sets of facts.
+        facts holds strings or (fact, tags) pairs; tags applies to plain strings. Facts are
+        encoded batch_size at a time, and each batch is added to the index and the graph
+        in one go. Duplicates and dedup_mode are handled as add_to_memory_bank would.
+        """
+        report = IngestReport()
+        start = time.perf_counter()
+        batch: List[MemoryFact] = []
+        for item in facts:
+            if isinstance(item, str):
+                text, fact_tags = item, tags
+            else:
+                text, fact_tags = item
+            batch.append(MemoryFact(fact=text, tags=list(fact_tags or [])))
+            if len(batch) >= batch_size:
+                self._ingest_batch(batch, report)
+                batch = []
+        self._ingest_batch(batch, report)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _ingest_batch(self, batch: List[MemoryFact], report: IngestReport):
+        fresh: Dict[str, MemoryFact] = {}
+        for fact_obj in batch:
+            if fact_obj.fact in self._facts_by_text or fact_obj.fact in fresh:
+                report.duplicates += 1
+            else:
+                fresh[fact_obj.fact] = fact_obj
+        if not fresh:
+            return
+        new_facts = list(fresh.values())
+        embeddings = np.ascontiguousarray(self.model.encode([f.fact for f in new_facts]), dtype='float32')
+
+        if self.dedup_mode:
+            keep = self._dedup_batch(new_facts, embeddings, report)
+            new_facts = [new_facts[i] for i in keep]
+            embeddings = embeddings[keep]
+
+        self._insert_facts(new_facts, embeddings)
+        for fact_obj, embedding in zip(new_facts, embeddings):
+            self._record(MemoryChange("add_fact", fact_obj, embedding=embedding))
+        report.added += len(new_facts)
+
+    def _dedup_batch(self, new_facts: List[MemoryFact], embeddings: np.ndarray, report: IngestReport) -> List[int]:
+        """
+        Applies dedup_mode to a batch, comparing each fact with the stored facts (one
+        batched search) and with the facts kept earlier in the same batch. Returns the
+        positions of the facts to insert.
+        """
+        norms = np.linalg.norm(embeddings, axis=1)
+        norms[norms == 0] = 1.0
+        unit = embeddings / norms[:, None]
+        stored_similarity = np.full(len(new_facts), -1.0)
+        stored_ids = np.full(len(new_facts), -1)
+        if self.index is not None and self.index.ntotal > 0:
+            _, indices = self.index.search(embeddings, 1)
+            stored_ids = indices[:, 0]
+            found = stored_ids != -1
+            if found.any():
+                neighbours = self.index.reconstruct_batch(stored_ids[found])
+                neighbour_norms = np.linalg.norm(neighbours, axis=1)
+                neighbour_norms[neighbour_norms == 0] = 1.0
+                stored_similarity[found] = np.einsum("ij,ij->i", unit[found], neighbours / neighbour_norms[:, None])
+
+        keep: List[int] = []
+        for i, fact_obj in enumerate(new_facts):
+            target, best, in_batch = None, self.dedup_threshold, False
+            if stored_similarity[i] >= best:
+                target, best = self._facts_by_id[int(stored_ids[i])], stored_similarity[i]
+            if keep:
+                similarities = unit[keep] @ unit[i]
+                j = int(np.argmax(similarities))
+                if similarities[j] >= best:
+                    target, in_batch = new_facts[keep[j]], True
+            if target is None:
+                keep.append(i)
+            elif self.dedup_mode == "merge":
+                merged_tags = target.tags + [t for t in fact_obj.tags if t not in target.tags]
+                if merged_tags != target.tags:
+                    if in_batch:
+                        # Not inserted yet, so its add_fact change will carry the merged tags.
+                        target.tags = merged_tags
+                    else:
+                        self._record(MemoryChange("fact_tags", target, old=list(target.tags), new=merged_tags))
+                        self._set_fact_tags(target, merged_tags)
+                report.merged += 1
+            else:
+                report.rejected += 1
+        return keep
+
+    def _find_near_duplicate(self, embedding: np.ndarray) -> Optional[MemoryFact]:
+        """
+        Returns the stored fact closest to embedding if its cosine similarity reaches
+        dedup_threshold. The L2 nearest neighbour is the cosine nearest neighbour for
+        normalized embeddings, which is what the sentence encoders here produce.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return None
+        query = np.asarray(embedding, dtype='float32').reshape(1, -1)
+        _, indices = self.index.search(query, 1)
+        fact_id = int(indices[0][0])
+        if fact_id == -1:
+            return None
+        neighbour = self.index.reconstruct(fact_id)
+        norms = float(np.linalg.norm(query[0]) * np.linalg.norm(neighbour))
+        if norms == 0 or float(np.dot(query[0], neighbour)) / norms < self.dedup_threshold:
+            return None
+        return self._facts_by_id[fact_id]
 
     def search_memory_bank(self, query: str, k: int = 5, tags: Optional[List[str]] = None) -> List[Tuple[MemoryFact, str]]:
         """
@@ -186,82 +754,105 @@ class MemoryManager:
         if not self.memory_bank or self.index is None:
             return []
 
-        query_embedding = self.model.encode([query])
+        query_embedding = self.query_cache.encode(self.model, (self.model_name, self.encoder_config.backend), query)
         
-        if tags is None:
+        if not tags:
             distances, indices = self.index.search(query_embedding, k)
             results = []
-            current_time = time.time()
-            for i in indices[0]:
-                if i != -1:
-                    fact_obj = self.memory_bank[i]
-                    fact_obj.relevance += 1.0
-                    fact_obj.last_accessed = current_time
-                    explanation = f"Retrieved because it is semantically similar to '{query}' with a relevance of {fact_obj.relevance:.2f}."
-                    results.append((fact_obj, explanation))
+            for fact_obj in self._boost_facts(indices[0]):
+                explanation = f"Retrieved because it is semantically similar to '{query}' with a relevance of {fact_obj.relevance:.2f}."
+                results.append((fact_obj, explanation))
             return results
 
-        search_k = min(self.index.ntotal, k * 10)
-        distances, indices = self.index.search(query_embedding, search_k)
+        # Restrict the search to facts carrying every tag, so rare tags still fill k.
+        allowed = self._ids_with_tags(tags)
+        if len(allowed) == 0:
+            return []
+        distances, indices = self.index.search(query_embedding, k, ids=allowed)
         
         results = []
-        current_time = time.time()
-        tag_set = set(t.lower() for t in tags)
-
-        for i in indices[0]:
-            if i != -1:
-                fact_obj = self.memory_bank[i]
-                fact_tags = set(t.lower() for t in fact_obj.tags)
-                if tag_set.issubset(fact_tags):
-                    fact_obj.relevance += 1.0
-                    fact_obj.last_accessed = current_time
-                    explanation = f"Retrieved because it is semantically similar to '{query}' with tags {tags} and a relevance of {fact_obj.relevance:.2f}."
-                    results.append((fact_obj, explanation))
-                    if len(results) == k:
-                        break
+        for fact_obj in self._boost_facts(indices[0]):
+            explanation = f"Retrieved because it is semantically similar to '{query}' with tags {tags} and a relevance of {fact_obj.relevance:.2f}."
+            results.append((fact_obj, explanation))
         return results
 
+    def _boost_facts(self, ids: np.ndarray) -> List[MemoryFact]:
+        """Marks the facts behind search result ids as used: +1 relevance, accessed now."""
+        hits = [self._facts_by_id[int(i)] for i in ids if i != -1]
+        if hits:
+            self._fact_columns.touch(self._fact_columns.slots(hits), "relevance", 1.0, "last_accessed", time.time())
+            if self._usage is not None:
+                self._usage[0].update(f.fact_id for f in hits)
+        return hits
+
     def reason_about_facts(self, fact1: str, fact2: str) -> Optional[List[str]]:
         """
         Finds a path between two facts in the, showing their relationship.
         """
-        if self.graph.has_node(fact1) and self.graph.has_node(fact2):
-            try:
-                path = nx.shortest_path(self.graph, source=fact1, target=fact2)
-                return path
-            except nx.NetworkXNoPath:
-                return None
-        return None
+        self.apply_entities()
+        return self.graph.shortest_path(fact1, fact2)
 
     def decay_relevance_scores(self):
         """Decays the relevance scores of all facts in the memory bank."""
-        current_time = time.time()
-        for fact_obj in self.memory_bank:
-            time_diff = current_time - fact_obj.last_accessed
-            decay_amount = time_diff * self.decay_rate
-            fact_obj.relevance = max(0, fact_obj.relevance - decay_amount)
+        self._fact_columns.decay("relevance", "last_accessed", self.decay_rate, time.time())
 
     def decay_card_relevance_scores(self):
         """Decays the relevance scores of all story cards."""
-        current_time = time.time()
-        for card in self.story_cards.values():
-            time_diff = current_time - card.last_activated
-            decay_amount = time_diff * self.decay_rate
-            card.relevance = max(0, card.relevance - decay_amount)
+        if len(self._card_columns) != len(self.story_cards):
+            # Cards placed in story_cards directly are picked up here.
+            self._card_columns.attach_many(self.story_cards.values())
+        self._card_columns.decay("relevance", "last_activated", self.decay_rate, time.time())
 
     def prune_memories(self, fact_threshold: float, card_threshold: float):
         """Prunes memories below a given relevance threshold."""
-        self.memory_bank = [fact for fact in self.memory_bank if fact.relevance >= fact_threshold]
-        self._rebuild_index()
-        
-        self.story_cards = {name: card for name, card in self.story_cards.items() if card.relevance >= card_threshold}
+        slots = self._fact_columns.live_slots()
+        low = slots[self._fact_columns.data["relevance"][slots] < fact_threshold]
+        pruned = self._fact_columns.owners(low)
+        if pruned:
+            embeddings = self._delete_facts(pruned)
+            for fact, embedding in zip(pruned, embeddings):
+                self._record(MemoryChange("remove_fact", fact, embedding=embedding))
+
+        for name, card in list(self.story_cards.items()):
+            if card.relevance < card_threshold:
+                self._record(MemoryChange("remove_card", card, key=name))
+                self._drop_card(name)
 
     def create_story_card(self, name: str, entry: str, triggers: Dict[str, float], dependencies: List[str] = [], unlocks: List[str] = [], negative_triggers: List[str] = []):
         """Creates and stores a new StoryCard with weighted triggers, dependencies, unlocks, and negative triggers."""
         card = StoryCard(name=name, entry=entry, triggers={t.lower(): w for t, w in triggers.items()}, dependencies=dependencies, unlocks=unlocks, negative_triggers=negative_triggers)
-        self.story_cards[name.lower()] = card
+        replaced = self.story_cards.get(name.lower())
+        if replaced is not None:
+            self._record(MemoryChange("remove_card", replaced, key=name.lower()))
+        self._store_card(name.lower(), card)
+        self._record(MemoryChange("add_card", card, key=name.lower()))
         return card
 
+    def _store_card(self, key: str, card: StoryCard):
+        replaced = self.story_cards.get(key)
+        if replaced is not None and replaced is not card:
+            self._card_columns.detach(replaced)
+        self.story_cards[key] = card
+        self._index_card_triggers(card)
+        self._card_columns.attach(card)
+
+    def _drop_card(self, key: str):
+        card = self.story_cards.pop(key, None)
+        if card is not None:
+            self._card_columns.detach(card)
+
+    def _index_card_triggers(self, card: StoryCard):
+        for trigger in card.triggers:
+            self._trigger_index.add(trigger)
+        for neg_trigger in card.negative_triggers:
+            self._trigger_index.add(neg_trigger)
+
+    def _rebuild_trigger_index(self):
+        """Recompiles the trigger prefilter, e.g. after the fuzzy threshold changed."""
+        self._trigger_index = TriggerIndex(self.fuzzy_threshold)
+        for card in self.story_cards.values():
+            self._index_card_triggers(card)
+
     def create_story_card_template(self, name: str, name_template: str, entry_template: str, triggers_template: Dict[str, float]):
         """Creates and stores a new StoryCardTemplate."""
         template = StoryCardTemplate(name_template, entry_template, triggers_template)
@@ -290,6 +881,18 @@ class MemoryManager:
         newly_activated_cards = []
         current_time = time.time()
 
+        # Score every trigger of every inactive card up front, once per distinct trigger,
+        # so the loop below only does set lookups. Cards activated mid-loop can make a
+        # card's dependencies met, which is why inactive cards with unmet ones are included.
+        if self._trigger_index.threshold != self.fuzzy_threshold:
+            self._rebuild_trigger_index()
+        pending_triggers = set()
+        for card in self.story_cards.values():
+            if card.name.lower() not in self.active_card_names:
+                pending_triggers.update(card.triggers)
+                pending_triggers.update(card.negative_triggers)
+        matched = self._trigger_index.match(text_lower, pending_triggers)
+
         for card in self.story_cards.values():
             if card.name.lower() in self.active_card_names:
                 continue
@@ -300,7 +903,7 @@ class MemoryManager:
 
             negative_trigger_found = False
             for neg_trigger in card.negative_triggers:
-                if fuzz.partial_ratio(neg_trigger, text_lower) >= self.fuzzy_threshold:
+                if neg_trigger in matched:
                     negative_trigger_found = True
                     break
             if negative_trigger_found:
@@ -309,21 +912,26 @@ class MemoryManager:
             activation_score = 0.0
             activated_triggers = []
             for trigger, weight in card.triggers.items():
-                if fuzz.partial_ratio(trigger, text_lower) >= self.fuzzy_threshold:
+                if trigger in matched:
                     activation_score += weight
                     activated_triggers.append(trigger)
             
             if activation_score >= card.activation_threshold:
                 card.relevance += 1.0
                 card.last_activated = current_time
+                if self._usage is not None:
+                    self._usage[1].add(card.name.lower())
                 explanation = f"Activated because the following triggers were found: {', '.join(activated_triggers)}. Activation score: {activation_score:.2f}."
                 newly_activated_cards.append((card, explanation))
                 self.active_card_names.append(card.name.lower())
+                self._record(MemoryChange("activate_card", card.name.lower()))
 
                 for unlocked_card_name in card.unlocks:
                     unlocked_card = self.story_cards.get(unlocked_card_name.lower())
                     if unlocked_card:
+                        old_threshold = unlocked_card.activation_threshold
                         unlocked_card.activation_threshold *= 0.8
+                        self._record(MemoryChange("card_threshold", unlocked_card, key=unlocked_card_name.lower(), old=old_threshold, new=unlocked_card.activation_threshold))
         
         return newly_activated_cards
 
@@ -331,6 +939,8 @@ class MemoryManager:
         """
         Retrieves and fuses relevant memories from both the Memory Bank and Story Cards.
         """
+        # Entities extracted since the last turn; never waits for ones still running.
+        self.apply_entities()
         facts = self.search_memory_bank(query, k, tags)
         active_cards = self.get_active_cards(query)
         
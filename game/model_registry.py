@@ -0,0 +1,112 @@
+import threading
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .encoders import EncoderConfig
+
+DEFAULT_ENCODER_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_NLP_NAME = 'en_core_web_sm'
+
+ModelKey = Tuple[str, str, Optional[str]]
+
+def _kind_matches(key_kind: str, kind: str) -> bool:
+    """Whether a key's kind falls under kind; "encoder" also covers "encoder:<backend>" keys."""
+    return key_kind == kind or key_kind.startswith(kind + ":")
+
+class ModelRegistry:
+    """
+    A process-wide, thread-safe cache of the heavyweight models used by the memory system.
+    Models are keyed by (kind, name, revision) and loaded at most once, so every
+    MemoryManager (including the ones rebuilt by loads and undo/redo) shares them.
+    """
+    def __init__(self):
+        self._models: Dict[ModelKey, Any] = {}
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lock_for(self, key: ModelKey) -> threading.Lock:
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def get_or_load(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the model stored under key, calling loader to create it on first use.
+        Concurrent callers asking for the same key wait for a single load instead of
+        loading the model twice; different keys load in parallel.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock_for(key):
+            model = self._models.get(key)
+            if model is None:
+                model = loader()
+                self._models[key] = model
+            return model
+
+    def get_encoder(self, name: str = DEFAULT_ENCODER_NAME, revision: Optional[str] = None, config: Optional["EncoderConfig"] = None):
+        """
+        Returns the shared encoder for the given model name and revision, run by the
+        backend in config (PyTorch by default). Each backend is cached separately. Another
+        backend's PyTorch fallback and parity reference is the shared PyTorch encoder.
+        """
+        from .encoders import EncoderConfig, load_encoder
+        config = config or EncoderConfig()
+        if config.backend == "torch":
+            return self.get_or_load(("encoder", name, revision), lambda: load_encoder(name, revision, config))
+        reference = lambda: self.get_encoder(name, revision, replace(config, backend="torch"))
+        return self.get_or_load((f"encoder:{config.backend}", name, revision),
+                                lambda: load_encoder(name, revision, config, reference))
+
+    def get_nlp(self, name: str = DEFAULT_NLP_NAME):
+        """Returns the shared spaCy pipeline for the given package name."""
+        def load():
+            import spacy
+            return spacy.load(name)
+        return self.get_or_load(("nlp", name, None), load)
+
+    def warm(self, encoders: Tuple[str, ...] = (DEFAULT_ENCODER_NAME,), nlp: Tuple[str, ...] = (DEFAULT_NLP_NAME,),
+             config: Optional["EncoderConfig"] = None):
+        """
+        Eagerly loads the given encoders and spaCy pipelines so later lookups are instant.
+        Encoders load with config, by default the ENCODER_* settings MemoryManager uses.
+        """
+        from .encoders import EncoderConfig
+        config = config or EncoderConfig.from_env()
+        for name in encoders:
+            self.get_encoder(name, config=config)
+        for name in nlp:
+            self.get_nlp(name)
+
+    def evict(self, kind: Optional[str] = None, name: Optional[str] = None) -> int:
+        """
+        Drops cached models matching kind and/or name (all models if both are None).
+        kind="encoder" covers every encoder backend.
+        Managers already holding a reference keep working; the next lookup reloads.
+        Returns the number of models evicted.
+        """
+        with self._lock:
+            keys = [key for key in self._models
+                    if (kind is None or _kind_matches(key[0], kind)) and (name is None or key[1] == name)]
+            for key in keys:
+                del self._models[key]
+        return len(keys)
+
+    def is_loaded(self, kind: str, name: str, revision: Optional[str] = None) -> bool:
+        """Whether a model is cached under kind (for "encoder", with any backend), name and revision."""
+        return any(_kind_matches(key[0], kind) and key[1:] == (name, revision) for key in list(self._models))
+
+    def loaded_models(self) -> List[ModelKey]:
+        return list(self._models.keys())
+
+# The registry shared by the whole process.
+registry = ModelRegistry()
+
+def get_encoder(name: str = DEFAULT_ENCODER_NAME, revision: Optional[str] = None, config: Optional["EncoderConfig"] = None):
+    return registry.get_encoder(name, revision, config)
+
+def get_nlp(name: str = DEFAULT_NLP_NAME):
+    return registry.get_nlp(name)
@@ -1,10 +1,17 @@
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
 # Define simplified rate limits for different API tiers (RPM = Requests Per Minute, TPM = Tokens Per Minute)
 # These are based on Gemini 2.5 Pro for paid tiers, and a common free tier estimate.
 
 RATE_LIMITS = {
     "free": {
         "RPM": 15,
-        "TPM": 1000,
+        "TPM": 1_000_000, # Gemini Flash free tier; a single prompt can be several thousand tokens
         "RPD": 1000 # Requests Per Day (estimated for free tier)
     },
     "tier1": { # Based on Gemini 2.5 Pro
@@ -29,3 +36,166 @@ VALID_TIERS = list(RATE_LIMITS.keys())
 def get_rate_limits(tier: str):
     """Returns the rate limits for a given tier."""
     return RATE_LIMITS.get(tier)
+
+# Seconds over which each limit applies. RPD is treated as a bucket refilling over a
+# rolling day, which approximates the API's daily reset.
+LIMIT_PERIODS = {"RPM": 60.0, "TPM": 60.0, "RPD": 86_400.0}
+
+# Priority classes: lower values are served first when calls are queued.
+FOREGROUND = 0
+BACKGROUND = 1
+
+class TokenBucket:
+    """
+    Holds up to capacity units and refills at capacity / period per second. A request
+    larger than the whole bucket waits for a full bucket and leaves it in debt, so the
+    excess delays later requests instead of never being allowed.
+    """
+    def __init__(self, capacity: float, period: float, now: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 if it can be taken now)."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+@dataclass
+class Reservation:
+    """What a granted call was charged, so it can be settled against the real usage."""
+    tokens: int
+    priority: int
+    waited: float
+
+class RateLimiter:
+    """
+    Client-side enforcement of a tier's RPM, TPM and RPD limits, one token bucket each.
+    A call reserves one request and its estimated prompt tokens before it is sent, and
+    settle() corrects the token charge with usage_metadata afterwards. Calls that do
+    not fit wait in a queue ordered by priority, then arrival, so a foreground turn goes
+    ahead of queued background work; only the head of the queue can take capacity.
+    """
+    def __init__(self, limits: Dict[str, int], periods: Dict[str, float] = LIMIT_PERIODS, clock=time.monotonic):
+        self.limits = dict(limits)
+        self.clock = clock
+        now = clock()
+        self.buckets = {name: TokenBucket(limit, periods[name], now) for name, limit in limits.items() if limit}
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[int, int]] = []
+        self._arrivals = itertools.count()
+        self.requests = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.seconds_waited = 0.0
+        self.tokens_reserved = 0
+        self.tokens_used = 0
+
+    @classmethod
+    def for_tier(cls, tier: str) -> "RateLimiter":
+        return cls(get_rate_limits(tier) or RATE_LIMITS["free"])
+
+    def _amounts(self, tokens: int) -> Dict[str, float]:
+        return {"RPM": 1, "TPM": tokens, "RPD": 1}
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        amounts = self._amounts(tokens)
+        return max((bucket.wait_time(amounts[name], now) for name, bucket in self.buckets.items()), default=0.0)
+
+    def wait_estimate(self, tokens: int) -> float:
+        """Seconds a call of this size would wait if nothing were queued ahead of it."""
+        with self._cond:
+            return self._wait_time(tokens, self.clock())
+
+    def acquire(self, tokens: int, priority: int = FOREGROUND, timeout: Optional[float] = None, on_wait=None) -> Optional[Reservation]:
+        """
+        Blocks until the call fits within every limit, then charges it. Returns None if
+        it could not be granted within timeout seconds. on_wait(seconds) is called once
+        if the call has to wait, with the expected wait.
+        """
+        with self._cond:
+            entry = (priority, next(self._arrivals))
+            heapq.heappush(self._queue, entry)
+            started = self.clock()
+            deadline = None if timeout is None else started + timeout
+            notified = False
+            try:
+                while True:
+                    now = self.clock()
+                    wait = None
+                    if self._queue[0] == entry:
+                        wait = self._wait_time(tokens, now)
+                        if wait <= 0:
+                            break
+                    if not notified:
+                        notified = True
+                        self.throttled += 1
+                        if on_wait is not None:
+                            on_wait(wait if wait is not None else self._wait_time(tokens, now))
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            return None
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+                amounts = self._amounts(tokens)
+                for name, bucket in self.buckets.items():
+                    bucket.take(amounts[name], now)
+                waited = now - started
+                self.requests += 1
+                self.seconds_waited += waited
+                self.tokens_reserved += tokens
+                return Reservation(tokens, priority, waited)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def settle(self, reservation: Reservation, actual_tokens: int):
+        """Replaces a reservation's estimated token charge with the count the API reported."""
+        with self._cond:
+            self.tokens_used += actual_tokens
+            bucket = self.buckets.get("TPM")
+            if bucket is not None:
+                now = self.clock()
+                difference = reservation.tokens - actual_tokens
+                if difference > 0:
+                    bucket.give(difference, now)
+                else:
+                    bucket.take(-difference, now)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = self.clock()
+            for bucket in self.buckets.values():
+                bucket._refill(now)
+            return {"requests": self.requests, "throttled": self.throttled, "timeouts": self.timeouts,
+                    "seconds_waited": self.seconds_waited, "queued": len(self._queue),
+                    "available": {name: bucket.level for name, bucket in self.buckets.items()},
+                    "tokens_reserved": self.tokens_reserved, "tokens_used": self.tokens_used}
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(tier: str) -> RateLimiter:
+    """Returns the process-wide limiter for a tier; every caller on the same API key shares its buckets."""
+    with _limiters_lock:
+        if tier not in _limiters:
+            _limiters[tier] = RateLimiter.for_tier(tier)
+        return _limiters[tier]
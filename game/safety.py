@@ -1,35 +1,30 @@
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from .lazy import lazy_import
+
+# The SDK's enums are looked up when settings are first requested, so importing this
+# module (for VALID_LEVELS) does not import the Gemini SDK.
+genai_types = lazy_import("google.generativeai.types")
+
+HARM_CATEGORIES = (
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
+)
 
 # This maps our simple terms to the specific thresholds required by the Google AI API.
-SAFETY_CONFIG = {
-    "high": { # Block even potentially sensitive content
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_LOW_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_LOW_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_LOW_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_LOW_AND_ABOVE,
-    },
-    "mid": { # The default setting for the API
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-    },
-    "low": { # Allow more content, but block the most harmful
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-    },
-    "none": { # Allow all content; this may result in the model refusing to answer if the prompt violates core safety policies.
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-    }
+SAFETY_THRESHOLDS = {
+    "high": "BLOCK_LOW_AND_ABOVE", # Block even potentially sensitive content
+    "mid": "BLOCK_MEDIUM_AND_ABOVE", # The default setting for the API
+    "low": "BLOCK_ONLY_HIGH", # Allow more content, but block the most harmful
+    "none": "BLOCK_NONE", # Allow all content; this may result in the model refusing to answer if the prompt violates core safety policies.
 }
 
-VALID_LEVELS = list(SAFETY_CONFIG.keys())
+VALID_LEVELS = list(SAFETY_THRESHOLDS.keys())
 
 def get_safety_settings(level: str):
     """Returns the API-compatible safety settings for a given level string."""
-    return SAFETY_CONFIG.get(level)
\ No newline at end of file
+    threshold = SAFETY_THRESHOLDS.get(level)
+    if threshold is None:
+        return None
+    block = getattr(genai_types.HarmBlockThreshold, threshold)
+    return {getattr(genai_types.HarmCategory, category): block for category in HARM_CATEGORIES}
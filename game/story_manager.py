@@ -1,11 +1,18 @@
 import os
 import re
-import google.generativeai as genai
 
+from utils.display import print_info, print_error
 from .game_state import GameState
+from .context_packer import ContextCandidate, ContextPacker
 from .safety import get_safety_settings
 from .prompts import get_system_prompt
-from .rate_limits import get_rate_limits
+from .rate_limits import FOREGROUND, get_rate_limiter
+from .tokens import TokenCounter
+from .stream_parser import COMMAND_PATTERN, CommandStreamParser, parse_command
+from .lazy import lazy_import
+
+# The Gemini SDK is the slowest import in the game; it loads when the model is configured.
+genai = lazy_import("google.generativeai")
 
 # --- Constants for Context Management ---
 # Set a practical limit for the model, e.g., Gemini 1.5 Flash has 1M, but we'll use a smaller portion.
@@ -13,21 +20,32 @@ MODEL_TOKEN_LIMIT = 8000
 CONTEXT_HISTORY_TARGET_PERCENT = 0.50 # Try to fill 50% of the remaining context with story history
 CONTEXT_MEMORY_TARGET_PERCENT = 0.25  # And 25% with memory bank
 CONTEXT_CARDS_TARGET_PERCENT = 0.25   # And 25% with story cards
+MEMORY_RETRIEVAL_K = 20 # How many memory bank facts to rank for each turn
+RATE_LIMIT_MAX_WAIT = 120 # Seconds a call may queue for rate-limit capacity before giving up
+
+def create_model(report=print):
+    """Configures the Gemini client from the environment. Returns the model, or None on failure."""
+    try:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            report("WARN: GEMINI_API_KEY environment variable not found.")
+            return None
+        genai.configure(api_key=api_key)
+        model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest")
+        return genai.GenerativeModel(model_name)
+    except Exception as e:
+        report(f"Error during Gemini initialization: {e}")
+        return None
 
 class StoryManager:
-    def __init__(self, game_state: GameState):
+    def __init__(self, game_state: GameState, model=None):
         self.game_state = game_state
-        self.model = None
-        try:
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                print("WARN: GEMINI_API_KEY environment variable not found.")
-                return
-            genai.configure(api_key=api_key)
-            model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest")
-            self.model = genai.GenerativeModel(model_name)
-        except Exception as e:
-            print(f"Error during Gemini initialization: {e}")
+        # A model created ahead of time (see game/warmup.py) is used as is.
+        self.model = model if model is not None else create_model()
+        # Budgeting uses local estimates; the API's real counts only calibrate them.
+        self.token_counter = TokenCounter()
+        self.context_packer = ContextPacker(self.token_counter)
+        self.last_pack_report = None
 
     def start_story(self):
         if not self.game_state.story_history:
@@ -39,17 +57,12 @@ class StoryManager:
     def _parse_ai_response(self, response_text: str):
         clean_text = response_text
         commands = {}
-        command_pattern = r'\[(HEALTH|ITEM|LOCATION|CHECK):\s*([^\]]+)\]'
-        found_commands = re.findall(command_pattern, response_text)
+        found_commands = re.findall(COMMAND_PATTERN, response_text)
         for key, value in found_commands:
-            value = value.strip()
-            if key == "CHECK":
-                parts = value.split()
-                if len(parts) == 2:
-                    commands['CHECK'] = (parts[0].upper(), int(parts[1]))
-            else:
+            value = parse_command(key, value)
+            if value is not None:
                 commands[key] = value
-        clean_text = re.sub(command_pattern, '', clean_text).strip()
+        clean_text = re.sub(COMMAND_PATTERN, '', clean_text).strip()
         return clean_text, commands
 
     def _build_context(self, player_action: str) -> str:
@@ -84,54 +97,54 @@ class StoryManager:
         
         # Calculate remaining token budget
         base_context_str = "\n".join(base_context_list)
-        base_token_count = self.model.count_tokens(base_context_str).total_tokens
+        base_token_count = self.token_counter.count(base_context_str)
         remaining_tokens = MODEL_TOKEN_LIMIT - base_token_count
 
         # 2. Dynamic context (Memories, Cards, History)
-        # Get all potential dynamic content
-        memory_bank = self.game_state.memory_manager.memory_bank
+        # Rank candidates with the memory system instead of sending everything.
         recent_history = self.game_state.story_history
-        
-        # Combine story cards and world info entries
-        active_story_cards = self.game_state.memory_manager.get_active_cards("\n".join(recent_history[-3:]))
-        # For now, we assume all world info is relevant. This could be improved with triggers.
-        active_world_info = world.world_info
-        
-        all_reminders = [f"Player Note: {c[0].entry}" for c in active_story_cards]
-        all_reminders += [f"World Lore: {wi.entry}" for wi in active_world_info]
+        query = "\n".join(recent_history[-3:] + [player_action])
+        fused_memories = self.game_state.memory_manager.retrieve_memories(query, k=MEMORY_RETRIEVAL_K)
+
+        candidates = []
+        for rank, memory in enumerate(fused_memories):
+            if memory.source == "story_card":
+                candidates.append(ContextCandidate("reminders", f"Player Note: {memory.content.entry}", memory.priority, order=rank, label=memory.content.name))
+            else:
+                candidates.append(ContextCandidate("memory", memory.content.fact, memory.priority, order=rank, label=memory.content.fact))
+        # Lore enters the prompt when its triggers appear in the recent story or the current location.
+        lore_text = "\n".join([query, location.name, location.description])
+        for position, wi in enumerate(world.find_world_info(lore_text)):
+            candidates.append(ContextCandidate("reminders", f"World Lore: {wi.entry}", 1.0, order=len(fused_memories) + position, label=wi.name))
+        # History is packed newest first and presented oldest first.
+        for age, entry in enumerate(reversed(recent_history)):
+            candidates.append(ContextCandidate("history", entry, priority=-age, order=-age, label=f"turn -{age + 1}"))
 
         # Allocate budgets
-        history_budget = int(remaining_tokens * CONTEXT_HISTORY_TARGET_PERCENT)
-        memory_budget = int(remaining_tokens * CONTEXT_MEMORY_TARGET_PERCENT)
-        cards_budget = int(remaining_tokens * CONTEXT_CARDS_TARGET_PERCENT)
+        budgets = {
+            "reminders": int(remaining_tokens * CONTEXT_CARDS_TARGET_PERCENT),
+            "memory": int(remaining_tokens * CONTEXT_MEMORY_TARGET_PERCENT),
+            "history": int(remaining_tokens * CONTEXT_HISTORY_TARGET_PERCENT),
+        }
+        packed, report = self.context_packer.pack(candidates, budgets)
+        self.last_pack_report = report
+        if report.dropped or report.truncated:
+            print(f"WARN: Context over budget: {report.summary()}.")
 
         # Fill context according to budget
         final_context = list(base_context_list)
-        
-        # Fill Story Cards & World Info
-        if all_reminders:
-            card_str = "\n".join(all_reminders)
-            if self.model.count_tokens(card_str).total_tokens > cards_budget:
-                print("WARN: Active reminders exceed budget. Truncating.")
+
+        if packed["reminders"]:
+            card_str = "\n".join(c.text for c in packed["reminders"])
             final_context.append(f"--- REMINDERS & LORE ---\n{card_str}")
 
-        # Fill Memory Bank
-        if memory_bank:
-            memory_str = "\n".join([fact.fact for fact in memory_bank])
-            if self.model.count_tokens(memory_str).total_tokens > memory_budget:
-                print("WARN: Memory bank exceeds budget. Truncating.")
+        if packed["memory"]:
+            memory_str = "\n".join(c.text for c in packed["memory"])
             final_context.append(f"--- MEMORY BANK ---\n{memory_str}")
 
-        # Fill History (most recent first)
-        if recent_history:
-            history_str = "\n".join(recent_history[-3:])
-            if self.model.count_tokens(history_str).total_tokens > history_budget:
-                print("WARN: Recent history exceeds budget. Truncating.")
-                # This is a simple truncation, a more sophisticated approach might be needed
-                history_str = history_str[:history_budget]
-
-            if history_str:
-                final_context.append(f"--- RECENT STORY ---\n{history_str}")
+        if packed["history"]:
+            history_str = "\n".join(c.text for c in packed["history"])
+            final_context.append(f"--- RECENT STORY ---\n{history_str}")
 
         # Add player's immediate goal if it exists
         if self.game_state.player.goal:
@@ -143,22 +156,37 @@ class StoryManager:
         
         return "\n\n".join(final_context)
 
-    def process_action(self, action: str):
+    def process_action(self, action: str, on_text=None, on_command=None, priority: int = FOREGROUND):
+        """
+        Sends the action to the AI and returns (story text, commands). With on_text, the
+        response is streamed: on_text receives the narrative as it arrives, with command
+        tags removed, and on_command(key, value) each tag as soon as it is complete.
+        The call first queues, at the given priority, for the API tier's rate limits.
+        """
         if not self.model:
             return "The storyteller is silent. (Reason: AI not configured.)", {}
 
         full_prompt = self._build_context(action)
         
         settings = get_safety_settings(self.game_state.safety_level)
-        tier_limits = get_rate_limits(self.game_state.api_tier)
         generation_config = {"max_output_tokens": 200}
 
+        # Reserve the tier's capacity up front, charged with the local token estimate.
+        rate_limiter = get_rate_limiter(self.game_state.api_tier)
+        reservation = rate_limiter.acquire(self.token_counter.count(full_prompt), priority, timeout=RATE_LIMIT_MAX_WAIT,
+                                           on_wait=lambda seconds: print_info(f"Rate limit reached; waiting about {seconds:.0f}s..."))
+        if reservation is None:
+            return "The storyteller is silent. (Reason: API rate limit reached; try again later.)", {}
+
         try:
             response = self.model.generate_content(
                 contents=[full_prompt],
                 generation_config=generation_config,
-                safety_settings=settings
+                safety_settings=settings,
+                stream=on_text is not None
             )
+            if on_text is not None:
+                self._stream_response(response, on_text, on_command)
 
             self.game_state.api_calls += 1
             if hasattr(response, 'usage_metadata'):
@@ -170,6 +198,8 @@ class StoryManager:
                 else:
                     print("Context Caching: Inactive")
                 self.game_state.total_input_tokens += usage.prompt_token_count
+                self.token_counter.calibrate(full_prompt, usage.prompt_token_count)
+                rate_limiter.settle(reservation, usage.prompt_token_count)
                 self.game_state.total_output_tokens += usage.candidates_token_count
             
             clean_text, commands = self._parse_ai_response(response.text)
@@ -179,3 +209,17 @@ class StoryManager:
 
         except Exception as e:
             return f"The storyteller hesitates... (An error occurred: {e})", {}
+
+    def _stream_response(self, response, on_text, on_command=None):
+        """Consumes a streamed response, passing text and completed commands on as they arrive."""
+        parser = CommandStreamParser()
+        def parsed():
+            for chunk in response:
+                yield parser.feed(chunk.text)
+            yield parser.close()
+        for text, commands in parsed():
+            if text:
+                on_text(text)
+            if on_command is not None:
+                for key, value in commands:
+                    on_command(key, value)
@@ -0,0 +1,81 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+COMMAND_KEYS = ("HEALTH", "ITEM", "LOCATION", "CHECK")
+COMMAND_PATTERN = r'\[(HEALTH|ITEM|LOCATION|CHECK):\s*([^\]]+)\]'
+# An opening bracket still unclosed after this many characters is shown as text.
+MAX_TAG_LENGTH = 200
+
+_command_re = re.compile(COMMAND_PATTERN)
+
+def parse_command(key: str, value: str) -> Optional[object]:
+    """The value a [KEY: value] tag sets, or None if it sets nothing (a malformed CHECK)."""
+    value = value.strip()
+    if key == "CHECK":
+        parts = value.split()
+        if len(parts) != 2:
+            return None
+        return (parts[0].upper(), int(parts[1]))
+    return value
+
+class CommandStreamParser:
+    """
+    Splits a streamed AI response into narrative text and [HEALTH|ITEM|LOCATION|CHECK]
+    commands as chunks arrive. Text is released as soon as it cannot be part of a tag;
+    from an opening bracket that could still start one, it is held back until the tag
+    completes (and is dropped) or turns out to be ordinary text. Fed the whole response,
+    it gives the same commands and, up to surrounding whitespace, the same text as a
+    single regex pass.
+    """
+    def __init__(self):
+        self.raw: List[str] = []
+        self.commands: Dict[str, object] = {}
+        self._pending = ""
+
+    def feed(self, chunk: str) -> Tuple[str, List[Tuple[str, object]]]:
+        """Consumes a chunk. Returns the text that can be shown now and the commands completed by it."""
+        self.raw.append(chunk)
+        self._pending += chunk
+        return self._drain(final=False)
+
+    def close(self) -> Tuple[str, List[Tuple[str, object]]]:
+        """Releases whatever is still held back once the stream has ended."""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> Tuple[str, List[Tuple[str, object]]]:
+        text, completed = [], []
+        pending = self._pending
+        while pending:
+            start = pending.find("[")
+            if start == -1:
+                text.append(pending)
+                pending = ""
+                break
+            text.append(pending[:start])
+            pending = pending[start:]
+            match = _command_re.match(pending)
+            if match:
+                value = parse_command(match.group(1), match.group(2))
+                if value is not None:
+                    self.commands[match.group(1)] = value
+                    completed.append((match.group(1), value))
+                pending = pending[match.end():]
+            elif not final and self._may_become_tag(pending):
+                break
+            else:
+                text.append("[")
+                pending = pending[1:]
+        self._pending = pending
+        return "".join(text), completed
+
+    @staticmethod
+    def _may_become_tag(text: str) -> bool:
+        if "]" in text or len(text) > MAX_TAG_LENGTH:
+            return False
+        body = text[1:]
+        return any(key.startswith(body) or body.startswith(key + ":") for key in COMMAND_KEYS)
+
+    @property
+    def text(self) -> str:
+        """The full response received so far, tags included."""
+        return "".join(self.raw)
@@ -0,0 +1,59 @@
+import hashlib
+import re
+
+from .lru_cache import LRUCache
+
+# Words, numbers and individual punctuation marks, roughly how SentencePiece splits English text.
+_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+class TokenCounter:
+    """
+    Estimates token counts locally so context budgeting needs no API round-trips.
+    Raw estimates are cached by a hash of the text, and a correction ratio is
+    calibrated against the real prompt token counts reported in usage_metadata.
+    """
+    def __init__(self, cache_size: int = 4096, smoothing: float = 0.2, min_ratio: float = 0.5, max_ratio: float = 2.0):
+        self.cache = LRUCache(cache_size)
+        self.smoothing = smoothing
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.ratio = 1.0
+        self.samples = 0
+
+    @staticmethod
+    def _estimate(text: str) -> int:
+        """Uncalibrated estimate: one token per short word, one more per extra four letters."""
+        count = 0
+        for piece in _PIECE_PATTERN.findall(text):
+            count += 1 + (len(piece) - 1) // 4 if piece[0].isalpha() else 1 + (len(piece) - 1) // 3
+        return count
+
+    def raw_count(self, text: str) -> int:
+        """Returns the cached uncalibrated estimate for text."""
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        count = self.cache.get(key)
+        if count is None:
+            count = self._estimate(text)
+            self.cache.put(key, count)
+        return count
+
+    def count(self, text: str) -> int:
+        """Returns the calibrated token estimate for text."""
+        if not text:
+            return 0
+        return max(1, round(self.raw_count(text) * self.ratio))
+
+    def calibrate(self, text: str, actual_tokens: int):
+        """Folds a real token count for text (e.g. usage_metadata.prompt_token_count) into the ratio."""
+        raw = self.raw_count(text)
+        if raw <= 0 or not actual_tokens or actual_tokens <= 0:
+            return
+        observed = min(self.max_ratio, max(self.min_ratio, actual_tokens / raw))
+        if self.samples == 0:
+            self.ratio = observed
+        else:
+            self.ratio += self.smoothing * (observed - self.ratio)
+        self.samples += 1
+
+    def stats(self) -> dict:
+        return dict(self.cache.stats(), ratio=self.ratio, samples=self.samples)
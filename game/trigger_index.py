@@ -0,0 +1,111 @@
+import math
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+
+from .lazy import lazy_import
+
+fuzz = lazy_import("rapidfuzz.fuzz")
+process = lazy_import("rapidfuzz.process")
+
+class TriggerIndex:
+    """
+    A character q-gram inverted index that narrows a text down to the fuzzy triggers
+    that could possibly score >= threshold with fuzz.partial_ratio(trigger, text).
+
+    partial_ratio compares the trigger (length m) against windows of the text no longer
+    than m, so a score of at least r means an indel distance d <= (1 - r) * 2m. Each
+    insertion or deletion destroys at most q of the trigger's (m - q + 1) q-grams, so a
+    match needs at least (m - q + 1) - q * d of them in the text. Triggers with a
+    positive bound are filtered on it; shorter ones are always passed through to the
+    scorer. The filter is lossless: it never drops a trigger the scorer would accept.
+
+    On prose at the default threshold of 80 the bound is loose for short triggers, so
+    match() also scores whatever survives in one batched C call.
+    """
+    def __init__(self, threshold: float, q: int = 2):
+        self.threshold = threshold
+        self.q = q
+        self._triggers: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._required: List[int] = []
+        self._always: Set[str] = set()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._compiled = None
+
+    def __contains__(self, trigger: str) -> bool:
+        return trigger in self._ids or trigger in self._always
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._always)
+
+    def _required_hits(self, length: int) -> int:
+        # Scores are rounded to integers, so anything above threshold - 0.5 counts.
+        min_ratio = (self.threshold - 0.5) / 100
+        max_distance = math.floor((1 - min_ratio) * 2 * length + 1e-9)
+        return (length - self.q + 1) - self.q * max_distance
+
+    def add(self, trigger: str):
+        """Indexes a trigger. Adding the same trigger again is a no-op."""
+        if trigger in self:
+            return
+        required = self._required_hits(len(trigger))
+        if self.threshold <= 0 or len(trigger) < self.q or required <= 0:
+            self._always.add(trigger)
+            return
+        trigger_id = len(self._triggers)
+        self._triggers.append(trigger)
+        self._ids[trigger] = trigger_id
+        self._required.append(required)
+        for i in range(len(trigger) - self.q + 1):
+            gram = trigger[i:i + self.q]
+            posting = self._postings.setdefault(gram, {})
+            posting[trigger_id] = posting.get(trigger_id, 0) + 1
+        self._compiled = None
+
+    def _compile(self):
+        postings = {gram: (np.fromiter(p.keys(), dtype=np.int64, count=len(p)),
+                           np.fromiter(p.values(), dtype=np.int32, count=len(p)))
+                    for gram, p in self._postings.items()}
+        required = np.array(self._required, dtype=np.int32)
+        lengths = np.array([len(t) for t in self._triggers], dtype=np.int64)
+        self._compiled = (postings, required, lengths)
+
+    def candidates(self, text: str) -> Set[str]:
+        """Returns the indexed triggers that may match text; all others certainly do not."""
+        result = set(self._always)
+        if not self._triggers:
+            return result
+        if self._compiled is None:
+            self._compile()
+        postings, required, lengths = self._compiled
+
+        hits = np.zeros(len(self._triggers), dtype=np.int32)
+        q = self.q
+        for gram in {text[i:i + q] for i in range(len(text) - q + 1)}:
+            posting = postings.get(gram)
+            if posting is not None:
+                hits[posting[0]] += posting[1]
+        # When the trigger is longer than the text, partial_ratio slides the text over the
+        # trigger instead, which the bound above does not cover.
+        mask = (hits >= required) | (lengths > len(text))
+        result.update(self._triggers[i] for i in np.flatnonzero(mask))
+        return result
+
+    def match(self, text: str, triggers: Iterable[str]) -> Set[str]:
+        """
+        Returns the triggers that score >= threshold against text, exactly as
+        thefuzz.fuzz.partial_ratio(trigger, text) >= threshold would. Each distinct
+        trigger is scored once; triggers that were never indexed are always scored.
+        """
+        wanted = set(triggers)
+        if not wanted:
+            return set()
+        candidates = self.candidates(text)
+        to_score = [t for t in wanted if t in candidates or t not in self]
+        if not to_score:
+            return set()
+        # thefuzz rounds rapidfuzz's float score to the nearest integer before comparing.
+        scores = process.cdist(to_score, [text], scorer=fuzz.partial_ratio,
+                               score_cutoff=max(self.threshold - 0.5, 0), dtype=np.float64)[:, 0]
+        return {t for t, score in zip(to_score, scores) if int(round(score)) >= self.threshold}
@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+@dataclass
+class TurnDelta:
+    """
+    Everything that changed between two checkpoints of a GameState.
+    Unchanged parts (the world, the memory bank, older history) are never copied;
+    the delta only holds references to what was added, removed or replaced.
+    """
+    # Top-level GameState attributes that changed: name -> (old, new)
+    fields: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    # Player fields that changed: name -> (old, new), values are private copies
+    player: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    # Story history edit: the entries from history_start onwards were replaced
+    history_start: int = 0
+    history_removed: List[str] = field(default_factory=list)
+    history_added: List[str] = field(default_factory=list)
+    # Structural memory changes, in the order they happened, and the manager they apply to
+    memory_changes: List[Any] = field(default_factory=list)
+    memory_owner: Optional[Any] = None
+
+    def is_empty(self) -> bool:
+        return not (self.fields or self.player or self.history_removed or self.history_added or self.memory_changes)
+
+class UndoHistory:
+    """A bounded linear history of TurnDeltas with a cursor separating undo from redo."""
+    def __init__(self, max_size: int = 10):
+        self.max_size = max_size
+        self.deltas: List[TurnDelta] = []
+        self.cursor = 0  # Number of deltas currently applied
+
+    def push(self, delta: TurnDelta):
+        """Records a new delta, discarding anything that could have been redone."""
+        del self.deltas[self.cursor:]
+        self.deltas.append(delta)
+        if len(self.deltas) > self.max_size:
+            self.deltas.pop(0)
+        self.cursor = len(self.deltas)
+
+    def can_undo(self) -> bool:
+        return self.cursor > 0
+
+    def can_redo(self) -> bool:
+        return self.cursor < len(self.deltas)
+
+    def step_back(self) -> TurnDelta:
+        self.cursor -= 1
+        return self.deltas[self.cursor]
+
+    def step_forward(self) -> TurnDelta:
+        delta = self.deltas[self.cursor]
+        self.cursor += 1
+        return delta
@@ -0,0 +1,615 @@
+import math
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .lazy import lazy_import
+
+# faiss takes a noticeable share of startup; it is imported when the first index is built.
+faiss = lazy_import("faiss")
+
+INDEX_KINDS = ("flat", "hnsw", "ivf_flat", "ivf_pq", "auto")
+STORAGE_KINDS = ("float32", "float16", "sq8", "pq")
+SIDECAR_DTYPES = ("float32", "float16")
+# "auto" switches from HNSW to IVF-PQ at this size, where HNSW's memory use starts to hurt.
+AUTO_IVF_PQ_AT = 1_000_000
+# Id-restricted searches covering less than this fraction of the index are answered
+# exactly; filtered graph and cluster walks lose recall when most candidates are excluded.
+SUBSET_EXACT_FRACTION = 0.1
+# Exact subsets up to this size are scored directly; larger ones scan the store with a selector.
+SUBSET_BRUTE_FORCE_MAX = 2048
+# Vectors sampled to train a quantized store's codec (k-means for PQ, value ranges for int8).
+CODEC_TRAINING_SAMPLE = 65_536
+
+@dataclass
+class IndexConfig:
+    """How a VectorIndex searches. Every kind but "flat" uses exact search until promote_at vectors."""
+    kind: str = "auto"  # flat, hnsw, ivf_flat, ivf_pq or auto (HNSW, then IVF-PQ for very large banks)
+    promote_at: int = 20_000
+    # HNSW: graph degree, build quality and search breadth (higher = better recall, slower)
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    # IVF: number of clusters (0 = about 4 * sqrt(n)) and clusters scanned per query
+    nlist: int = 0
+    nprobe: int = 16
+    # IVF-PQ: sub-quantizers (0 = dim / 8) and bits per code
+    pq_m: int = 0
+    pq_bits: int = 8
+    # Deleted vectors are only hidden from searches until this fraction of the index is
+    # deleted; then they are physically removed in one pass.
+    compact_at: float = 0.1
+    # How vectors are held in memory from promote_at on: float32 (exact), float16, sq8
+    # (one byte per dimension) or pq (pq_m bytes per vector). Smaller banks stay float32.
+    storage: str = "float32"
+    # Lossy searches fetch k * rerank candidates and re-score them against exact vectors
+    # where those are available (0 = off).
+    rerank: int = 4
+    # dtype of the embeddings written to save sidecars: float32 or float16
+    sidecar_dtype: str = "float32"
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{self.kind}'. Expected one of {', '.join(INDEX_KINDS)}.")
+        if self.storage not in STORAGE_KINDS:
+            raise ValueError(f"Unknown storage '{self.storage}'. Expected one of {', '.join(STORAGE_KINDS)}.")
+        if self.sidecar_dtype not in SIDECAR_DTYPES:
+            raise ValueError(f"Unknown sidecar dtype '{self.sidecar_dtype}'. Expected one of {', '.join(SIDECAR_DTYPES)}.")
+        # PQ training runs k-means with 2**pq_bits centroids, which needs at least that many vectors.
+        if (self.kind == "ivf_pq" or self.storage == "pq") and self.promote_at < 2 ** self.pq_bits:
+            raise ValueError(f"promote_at={self.promote_at} is too small for PQ codes; "
+                             f"it must be at least 2**pq_bits ({2 ** self.pq_bits}).")
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+class VectorIndex:
+    """
+    A vector index keyed by stable integer ids, with a pluggable search structure.
+    The vectors always live in an ID-mapped store that serves reconstruct(), exact
+    search for small banks, and (re)training. Once the bank reaches
+    config.promote_at vectors, searches go to an approximate index (HNSW, IVF-Flat or
+    IVF-PQ) built from the store. IVF indexes are retrained when the bank has doubled
+    since they were trained.
+    With a quantized config.storage, the store is re-encoded (float16, int8 or PQ
+    codes) at promote_at too, and the approximate index uses the same encoding. Lossy
+    searches fetch config.rerank times more candidates and re-score them against exact
+    vectors: the float32 store, or the (memory-mapped) embeddings the index was
+    restored from, for the ids those cover.
+    remove() only tombstones ids, which searches then skip, so deleting is cheap at
+    any size. Tombstoned rows are physically removed in one batch once they make up
+    config.compact_at of the index, or before the index is saved.
+
+    An HNSW graph cannot drop nodes, so purged ids stay in it as dead entries that
+    searches filter out. When an id is added again, its dead entry is relabelled with
+    a negative id first, so a saved graph stays unambiguous. A replacement index is
+    built on a background thread from a snapshot when dead and missing entries make
+    up config.compact_at of the graph, when an IVF index has doubled past the data
+    its clusters were trained on, or when the wanted structure changes. A later search
+    swaps it in; the current one keeps answering until then. Only the first build, at
+    promote_at, runs in the caller.
+    """
+    def __init__(self, dim: int, config: Optional[IndexConfig] = None):
+        self.d = dim
+        self.config = config or IndexConfig()
+        self._store = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        self._storage = "float32"
+        # Exact vectors behind a quantized store: (sorted ids, their rows, matrix)
+        self._exact: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._ann = None
+        self._ann_kind: Optional[str] = None
+        # The approximate index was built for another store encoding
+        self._ann_outdated = False
+        self._trained_on = 0
+        # Ids (or negative stand-ins) the HNSW graph holds but the store does not, and
+        # live ids it lacks, which are searched exactly
+        self._ann_dead: Set[int] = set()
+        self._ann_missing: Set[int] = set()
+        # A replacement approximate index being built in the background: its future, and
+        # the adds and purges made since its snapshot, to replay when it is swapped in
+        self._rebuild: Optional[Tuple[Future, str]] = None
+        self._rebuild_log: List[Tuple[str, Any, Any]] = []
+        self._rebuild_error: Optional[str] = None
+        self._tombstones: Set[int] = set()
+        self._selector = None
+
+    @property
+    def ntotal(self) -> int:
+        """The number of live (not deleted) vectors."""
+        return self._store.ntotal - len(self._tombstones)
+
+    @property
+    def tombstones(self) -> int:
+        return len(self._tombstones)
+
+    @property
+    def kind(self) -> str:
+        """The structure currently answering searches."""
+        return self._ann_kind if self._ann is not None else "flat"
+
+    @property
+    def storage(self) -> str:
+        """How the stored vectors are currently encoded."""
+        return self._storage
+
+    def _target_kind(self) -> str:
+        kind, n = self.config.kind, self.ntotal
+        if kind == "flat" or n < self.config.promote_at:
+            return "flat"
+        if kind == "auto":
+            return "ivf_pq" if n >= AUTO_IVF_PQ_AT else "hnsw"
+        return kind
+
+    def _target_storage(self) -> str:
+        # A quantized store never goes back to float32; the precision is gone.
+        if self._storage == "float32" and self.ntotal >= self.config.promote_at:
+            return self.config.storage
+        return self._storage
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype='float32').reshape(-1, self.d)
+        ids = np.ascontiguousarray(ids, dtype='int64')
+        revived = self._tombstones.intersection(ids.tolist())
+        if revived:
+            # An id coming back (e.g. an undone delete) must not leave its old row behind.
+            self._purge(revived)
+        self._store.add_with_ids(vectors, ids)
+        self._log_rebuild("add", vectors, ids)
+        if self._ann is not None:
+            # An IVF index outgrowing its clusters keeps taking adds until its retrained
+            # replacement is ready (see _needs_rebuild).
+            self._ann_add(vectors, ids)
+
+    def _ann_add(self, vectors: np.ndarray, ids: np.ndarray):
+        if self._ann_kind == "hnsw":
+            again = self._ann_dead.intersection(ids.tolist())
+            if again:
+                self._relabel_dead(again)
+        self._ann.add_with_ids(vectors, ids)
+
+    def _relabel_dead(self, ids: Set[int]):
+        """Moves the graph's dead entries for ids, which are being added again, to unused negative ids."""
+        labels = faiss.vector_to_array(self._ann.id_map)
+        rows = np.isin(labels, np.fromiter(ids, dtype='int64', count=len(ids)))
+        # -1 means "no result" to faiss, so stand-ins start below it.
+        stand_ins = min(int(labels.min()), -1) - 1 - np.arange(np.count_nonzero(rows), dtype='int64')
+        labels[rows] = stand_ins
+        faiss.copy_array_to_vector(labels, self._ann.id_map)
+        self._ann_dead = (self._ann_dead - ids) | set(stand_ins.tolist())
+        self._selector = None
+
+    def _ann_purge(self, ids: Set[int], selector):
+        if self._ann_kind == "hnsw":
+            # HNSW graphs cannot drop nodes; searches skip them until the graph is rebuilt.
+            self._ann_dead |= ids - self._ann_missing
+            self._ann_missing -= ids
+            self._selector = None
+        else:
+            self._ann.remove_ids(selector)
+
+    def remove(self, ids) -> int:
+        """Deletes vectors by id. Returns the number of ids that were present."""
+        ids = {int(i) for i in ids} - self._tombstones
+        ids = {i for i in ids if self._contains(i)}
+        if not ids:
+            return 0
+        self._tombstones.update(ids)
+        self._selector = None
+        if len(self._tombstones) > self.config.compact_at * self._store.ntotal:
+            self.compact()
+        return len(ids)
+
+    def _contains(self, vector_id: int) -> bool:
+        try:
+            self._store.reconstruct(vector_id)
+        except RuntimeError:
+            return False
+        return True
+
+    def compact(self):
+        """Physically removes tombstoned vectors."""
+        if self._tombstones:
+            self._purge(set(self._tombstones))
+
+    def _purge(self, ids: Set[int]):
+        selector = faiss.IDSelectorBatch(np.fromiter(ids, dtype='int64', count=len(ids)))
+        self._store.remove_ids(selector)
+        self._log_rebuild("purge", set(ids), None)
+        if self._ann is not None:
+            self._ann_purge(ids, selector)
+        self._tombstones -= ids
+        self._selector = None
+
+    def reconstruct(self, vector_id: int) -> np.ndarray:
+        return self.reconstruct_batch(np.array([vector_id]))[0]
+
+    def reconstruct_batch(self, ids: np.ndarray) -> np.ndarray:
+        """Returns the vectors for ids, exact where exact vectors are available."""
+        ids = np.ascontiguousarray(ids, dtype='int64')
+        if self._exact is None:
+            return self._store.reconstruct_batch(ids)
+        known, exact = self._exact_rows(ids)
+        if known.all():
+            return exact
+        vectors = np.empty((len(ids), self.d), dtype='float32')
+        vectors[known] = exact
+        vectors[~known] = self._store.reconstruct_batch(np.ascontiguousarray(ids[~known]))
+        return vectors
+
+    def _exact_rows(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (mask of ids with exact vectors, those vectors as float32)."""
+        sorted_ids, rows, matrix = self._exact
+        positions = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        known = sorted_ids[positions] == ids
+        return known, np.asarray(matrix[rows[positions[known]]], dtype='float32')
+
+    def _all_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Every stored vector (exact where possible) and its id, in store order."""
+        ids = faiss.vector_to_array(self._store.id_map)
+        vectors = self._store.index.reconstruct_n(0, self._store.ntotal)
+        if self._exact is not None:
+            known, exact = self._exact_rows(ids)
+            vectors[known] = exact
+        return vectors, ids
+
+    def search(self, queries: np.ndarray, k: int, ids: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (distances, ids) like faiss; missing results have id -1.
+        If ids is given, only those (live) ids are considered.
+        """
+        queries = np.ascontiguousarray(queries, dtype='float32').reshape(-1, self.d)
+        self._ensure_storage()
+        self._ensure_ann()
+        fetch = k * self.config.rerank if self._reranks() else k
+        if ids is not None:
+            distances, found = self._search_subset(queries, fetch, np.ascontiguousarray(ids, dtype='int64'))
+        elif self._ann is None or fetch >= self.ntotal:
+            selector = self._live_selector()
+            params = faiss.SearchParameters(sel=selector) if selector is not None else None
+            distances, found = self._store.search(queries, fetch, params=params)
+        else:
+            distances, found = self._ann_search(queries, fetch, self._live_selector(), self._ann_missing)
+        if fetch == k:
+            return distances, found
+        return self._rerank(queries, k, distances, found)
+
+    def _reranks(self) -> bool:
+        """Whether searches are lossy and there are exact vectors to re-score them with."""
+        if self.config.rerank <= 1:
+            return False
+        if self._storage != "float32":
+            return self._exact is not None
+        return self._ann is not None and self._ann_kind == "ivf_pq"
+
+    def _rerank(self, queries: np.ndarray, k: int, distances: np.ndarray, found: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        out_distances = np.full((len(queries), k), np.inf, dtype='float32')
+        out_ids = np.full((len(queries), k), -1, dtype='int64')
+        for row, query in enumerate(queries):
+            live = found[row] != -1
+            candidates, scores = found[row][live], distances[row][live].copy()
+            if len(candidates) == 0:
+                continue
+            if self._exact is None:
+                known, exact = np.ones(len(candidates), dtype=bool), self._store.reconstruct_batch(candidates)
+            else:
+                known, exact = self._exact_rows(candidates)
+            scores[known] = np.sum((exact - query) ** 2, axis=1)
+            best = np.argsort(scores, kind="stable")[:k]
+            out_distances[row, :len(best)] = scores[best]
+            out_ids[row, :len(best)] = candidates[best]
+        return out_distances, out_ids
+
+    def _ann_search(self, queries: np.ndarray, k: int, selector, missing) -> Tuple[np.ndarray, np.ndarray]:
+        """Searches the approximate index, plus the given live ids it lacks, exactly."""
+        distances, found = self._ann.search(queries, k, params=self._search_params(k, selector))
+        if missing and self._tombstones:
+            missing = missing - self._tombstones
+        if not missing:
+            return distances, found
+        extra = self._brute_force(queries, k, np.fromiter(missing, dtype='int64', count=len(missing)))
+        distances, found = np.hstack([distances, extra[0]]), np.hstack([found, extra[1]])
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(found, order, axis=1)
+
+    def _search_subset(self, queries: np.ndarray, k: int, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self._ann is not None and len(ids) >= SUBSET_EXACT_FRACTION * self.ntotal and k < len(ids):
+            missing = self._ann_missing.intersection(ids.tolist()) if self._ann_missing else None
+            return self._ann_search(queries, k, faiss.IDSelectorBatch(ids), missing)
+        if len(ids) > SUBSET_BRUTE_FORCE_MAX:
+            return self._store.search(queries, k, params=faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids)))
+        return self._brute_force(queries, k, ids)
+
+    def _brute_force(self, queries: np.ndarray, k: int, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = self.reconstruct_batch(ids)
+        distances = (np.sum(queries ** 2, axis=1)[:, None] - 2 * queries @ vectors.T
+                     + np.sum(vectors ** 2, axis=1)[None, :])
+        top = min(k, len(ids))
+        nearest = np.argpartition(distances, top - 1, axis=1)[:, :top]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        out_distances = np.full((len(queries), k), np.inf, dtype='float32')
+        out_ids = np.full((len(queries), k), -1, dtype='int64')
+        out_distances[:, :top] = np.take_along_axis(distances, nearest, axis=1)
+        out_ids[:, :top] = ids[nearest]
+        return out_distances, out_ids
+
+    def _live_selector(self):
+        """A selector that skips tombstoned ids and dead graph entries, or None when there are none."""
+        excluded = self._tombstones | self._ann_dead if self._ann_dead else self._tombstones
+        if not excluded:
+            return None
+        if self._selector is None:
+            dead = faiss.IDSelectorBatch(np.fromiter(excluded, dtype='int64', count=len(excluded)))
+            # Keep a reference to the wrapped selector; faiss does not own it.
+            self._selector = (faiss.IDSelectorNot(dead), dead)
+        return self._selector[0]
+
+    def _search_params(self, k: int, selector):
+        if self._ann_kind == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=max(self.config.ef_search, k))
+        else:
+            params = faiss.SearchParametersIVF(nprobe=self.config.nprobe)
+        if selector is not None:
+            params.sel = selector
+        return params
+
+    def _ensure_storage(self):
+        target = self._target_storage()
+        if target != self._storage:
+            self.compact()
+            vectors, ids = self._all_vectors()
+            self._store = self._make_store(target, vectors, ids)
+            self._storage = target
+            # The approximate index has to switch to the same encoding.
+            self._ann_outdated = self._ann is not None
+
+    def _make_store(self, storage: str, vectors: np.ndarray, ids: np.ndarray):
+        if storage == "float32":
+            codec = faiss.IndexFlatL2(self.d)
+        elif storage == "pq":
+            codec = faiss.IndexPQ(self.d, self._pq_m(), self._pq_bits(len(vectors)))
+        else:
+            codec = faiss.IndexScalarQuantizer(self.d, _qtype(storage))
+        if not codec.is_trained:
+            codec.train(_sample(vectors, CODEC_TRAINING_SAMPLE))
+        store = faiss.IndexIDMap2(codec)
+        store.add_with_ids(vectors, ids)
+        return store
+
+    def _pq_m(self) -> int:
+        pq_m = self.config.pq_m or max(1, self.d // 8)
+        if self.d % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {self.d}.")
+        return pq_m
+
+    def _pq_bits(self, n: int) -> int:
+        """config.pq_bits, lowered when fewer than 2**pq_bits vectors are there to train on."""
+        return max(1, min(self.config.pq_bits, int(math.log2(max(n, 2)))))
+
+    def _layout(self, kind: str) -> Tuple[str, str]:
+        """(structure, encoding) of the approximate index this config builds for kind."""
+        return ("hnsw" if kind == "hnsw" else "ivf"), ("pq" if kind == "ivf_pq" else self._storage)
+
+    def _ensure_ann(self):
+        self._swap_rebuilt()
+        target = self._target_kind()
+        if target == "flat":
+            self._set_ann(None, None)
+        elif self._ann is None:
+            # Nothing approximate to answer with yet: build it here, once.
+            self.compact()
+            vectors, ids = self._all_vectors()
+            self._set_ann(self._build(target, self._layout(target)[1], vectors, ids), target)
+        elif self._needs_rebuild(target):
+            self._start_rebuild(target)
+
+    def _set_ann(self, index, kind: Optional[str]):
+        self._ann, self._ann_kind = index, kind
+        self._ann_outdated = False
+        self._ann_dead, self._ann_missing = set(), set()
+        self._selector = None
+        self._rebuild, self._rebuild_log = None, []
+        if kind is not None and kind.startswith("ivf"):
+            self._trained_on = index.ntotal
+
+    def _needs_rebuild(self, target: str) -> bool:
+        if self._rebuild is not None or self._rebuild_error is not None:
+            return False
+        if self._ann_outdated or self._ann_kind != target:
+            return True
+        if self._ann_kind.startswith("ivf"):
+            # The clusters were learned from half of today's data or less.
+            return self.ntotal >= 2 * self._trained_on
+        return len(self._ann_dead) + len(self._ann_missing) > self.config.compact_at * max(1, self._ann.ntotal)
+
+    def _start_rebuild(self, kind: str):
+        """Builds a replacement approximate index from a snapshot on a background thread."""
+        self.compact()
+        vectors, ids = self._all_vectors()
+        encoding = self._layout(kind)[1]
+        future: Future = Future()
+        def build():
+            try:
+                future.set_result(self._build(kind, encoding, vectors, ids))
+            except Exception as e:
+                future.set_exception(e)
+        self._rebuild, self._rebuild_log = (future, kind), []
+        threading.Thread(target=build, name="vector-index-rebuild", daemon=True).start()
+
+    def _log_rebuild(self, event: str, first, second):
+        if self._rebuild is not None:
+            self._rebuild_log.append((event, first, second))
+
+    def _swap_rebuilt(self):
+        """Installs a finished background build, replaying the changes made since its snapshot."""
+        if self._rebuild is None or not self._rebuild[0].done():
+            return
+        (future, kind), log = self._rebuild, self._rebuild_log
+        try:
+            index = future.result()
+        except Exception as e:
+            # Keep answering with the current index rather than retrying every search.
+            self._rebuild, self._rebuild_log, self._rebuild_error = None, [], str(e)
+            print(f"WARN: Rebuilding the {kind} index failed ({e}).")
+            return
+        self._set_ann(index, kind)
+        for event, first, second in log:
+            if event == "add":
+                self._ann_add(first, second)
+            else:
+                self._ann_purge(first, faiss.IDSelectorBatch(np.fromiter(first, dtype='int64', count=len(first))))
+
+    def _build(self, kind: str, encoding: str, vectors: np.ndarray, ids: np.ndarray):
+        """Builds an approximate index over vectors. Touches no instance state, so it can run off-thread."""
+        config, n = self.config, len(vectors)
+        if kind == "hnsw":
+            if encoding == "float32":
+                hnsw = faiss.IndexHNSWFlat(self.d, config.hnsw_m)
+            elif encoding == "pq":
+                hnsw = faiss.IndexHNSWPQ(self.d, self._pq_m(), config.hnsw_m, self._pq_bits(n))
+            else:
+                hnsw = faiss.IndexHNSWSQ(self.d, _qtype(encoding), config.hnsw_m)
+            hnsw.hnsw.efConstruction = config.ef_construction
+            if not hnsw.is_trained:
+                hnsw.train(_sample(vectors, CODEC_TRAINING_SAMPLE))
+            index = faiss.IndexIDMap(hnsw)
+        else:
+            # faiss wants at least 39 training points per cluster.
+            nlist = config.nlist or int(4 * math.sqrt(n))
+            nlist = max(1, min(nlist, n // 39))
+            quantizer = faiss.IndexFlatL2(self.d)
+            if encoding == "float32":
+                index = faiss.IndexIVFFlat(quantizer, self.d, nlist)
+            elif encoding == "pq":
+                index = faiss.IndexIVFPQ(quantizer, self.d, nlist, self._pq_m(), self._pq_bits(n))
+            else:
+                index = faiss.IndexIVFScalarQuantizer(quantizer, self.d, nlist, _qtype(encoding))
+            # Train on a sample of the existing vectors; 256 per cluster is plenty for k-means.
+            index.train(_sample(vectors, 256 * nlist))
+        index.add_with_ids(vectors, ids)
+        return index
+
+    def serialize(self) -> np.ndarray:
+        """
+        Serializes the index that answers searches (the approximate one once promoted).
+        Never builds one: an HNSW graph is saved with its dead entries, which restore()
+        works out again from the ids.
+        """
+        self.compact()
+        self._ensure_storage()
+        self._swap_rebuilt()
+        return faiss.serialize_index(self._ann if self._ann is not None else self._store)
+
+    @classmethod
+    def restore(cls, dim: int, config: Optional[IndexConfig], ids: np.ndarray, index_bytes=None, embeddings=None) -> Optional["VectorIndex"]:
+        """
+        Rebuilds an index saved with serialize(). embeddings holds the exact vectors for
+        ids, in the same order (float32 or float16). Either input may be memory-mapped;
+        a quantized index keeps reading exact vectors for re-ranking from embeddings
+        rather than copying them into memory. Returns None if the inputs do not fit.
+        """
+        ids = np.ascontiguousarray(ids, dtype='int64')
+        restored = cls(dim, config)
+        config = restored.config
+        storage = config.storage if len(ids) >= config.promote_at else "float32"
+        if embeddings is not None and embeddings.shape != (len(ids), dim):
+            embeddings = None
+        index = None
+        if index_bytes is not None:
+            try:
+                index = faiss.deserialize_index(np.asarray(index_bytes, dtype='uint8'))
+            except RuntimeError:
+                index = None
+            if index is not None and index.d != dim:
+                index = None
+        graph_ids = None
+        if isinstance(index, faiss.IndexIDMap) and not isinstance(index, faiss.IndexIDMap2):
+            graph_ids = faiss.vector_to_array(index.id_map)
+        elif index is not None and index.ntotal != len(ids):
+            index = None
+        if isinstance(index, faiss.IndexIDMap2) and np.array_equal(np.sort(faiss.vector_to_array(index.id_map)), np.sort(ids)):
+            saved_storage = _encoding_of(faiss.downcast_index(index.index))
+            if saved_storage == storage or embeddings is None:
+                restored._store, restored._storage = index, saved_storage
+                restored._attach_exact(ids, embeddings)
+                return restored
+        if embeddings is None:
+            return None
+        vectors = np.ascontiguousarray(embeddings, dtype='float32')
+        if storage == "float32":
+            restored._store.add_with_ids(vectors, ids)
+        else:
+            restored._store, restored._storage = restored._make_store(storage, vectors, ids), storage
+            restored._attach_exact(ids, embeddings)
+        del vectors
+        target = restored._target_kind()
+        if index is not None and target != "flat" and _layout_of(index) == restored._layout(target):
+            restored._set_ann(index, target)
+            restored._trained_on = len(ids)
+            if graph_ids is not None:
+                # Entries purged after the graph was built, and ids it never got.
+                restored._ann_dead = set(np.setdiff1d(graph_ids, ids).tolist())
+                restored._ann_missing = set(np.setdiff1d(ids, graph_ids).tolist())
+        return restored
+
+    def _attach_exact(self, ids: np.ndarray, embeddings):
+        """Keeps embeddings (rows matching ids) as the exact vectors behind a quantized store."""
+        if self._storage == "float32" or embeddings is None or len(ids) == 0:
+            return
+        order = np.argsort(ids, kind="stable")
+        self._exact = (ids[order], order, embeddings)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "configured": self.config.kind, "ntotal": self.ntotal,
+                "tombstones": len(self._tombstones), "dim": self.d, "storage": self._storage,
+                "exact_vectors": self._exact is not None or self._storage == "float32",
+                "dead_graph_entries": len(self._ann_dead), "rebuilding": self._rebuild is not None,
+                "rebuild_error": self._rebuild_error}
+
+_QTYPE_ATTRS = {"float16": "QT_fp16", "sq8": "QT_8bit"}
+
+def _qtype(encoding: str) -> int:
+    return getattr(faiss.ScalarQuantizer, _QTYPE_ATTRS[encoding])
+
+def _qtype_name(qtype: int) -> Optional[str]:
+    return next((name for name in _QTYPE_ATTRS if _qtype(name) == qtype), None)
+
+def _sample(vectors: np.ndarray, count: int) -> np.ndarray:
+    """At most count rows of vectors, chosen reproducibly."""
+    if len(vectors) <= count:
+        return vectors
+    rows = np.random.default_rng(0).choice(len(vectors), count, replace=False)
+    return vectors[np.sort(rows)]
+
+def _encoding_of(codec) -> Optional[str]:
+    if isinstance(codec, faiss.IndexFlat):
+        return "float32"
+    if isinstance(codec, faiss.IndexScalarQuantizer):
+        return _qtype_name(codec.sq.qtype)
+    if isinstance(codec, faiss.IndexPQ):
+        return "pq"
+    return None
+
+def _layout_of(index) -> Optional[Tuple[str, str]]:
+    """(structure, encoding) of a deserialized approximate index, or None for anything else."""
+    if isinstance(index, faiss.IndexIDMap2):
+        return None
+    if isinstance(index, faiss.IndexIDMap):
+        hnsw = faiss.downcast_index(index.index)
+        if not isinstance(hnsw, faiss.IndexHNSW):
+            return None
+        return "hnsw", _encoding_of(faiss.downcast_index(hnsw.storage))
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf", "pq"
+    if isinstance(index, faiss.IndexIVFScalarQuantizer):
+        return "ivf", _qtype_name(index.sq.qtype)
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf", "float32"
+    return None
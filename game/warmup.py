@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .model_registry import DEFAULT_ENCODER_NAME, DEFAULT_NLP_NAME, get_encoder, get_nlp
+from .world_db import World, get_default_world
+
+class Warmup:
+    """
+    Loads the encoder, the spaCy pipeline and the Gemini client on background threads
+    while the player answers the setup prompts. Models land in the process-wide
+    registry, so a MemoryManager built afterwards finds them there; one built while a
+    load is still running waits for that load instead of starting its own.
+
+    The default world is built up front with its lore index, and its lore and location
+    descriptions are run through both models once, so their first-call overhead is
+    paid here rather than on the first turn. A failed task is only recorded in stats();
+    whatever needed it loads it again the usual way and reports the error then.
+    """
+    def __init__(self, encoder_name: str = DEFAULT_ENCODER_NAME, nlp_name: str = DEFAULT_NLP_NAME,
+                 entities: bool = True, llm: bool = True):
+        self.encoder_name = encoder_name
+        self.nlp_name = nlp_name
+        self.entities = entities
+        self.llm = llm
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._world: Optional[World] = None
+        self._sample_texts: List[str] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> "Warmup":
+        """Starts every task, each on its own thread, and returns immediately."""
+        if self._executor is not None:
+            return self
+        self._world = get_default_world()
+        self._world.reindex_world_info()
+        self._sample_texts = [entry.entry for entry in self._world.world_info]
+        self._sample_texts += [location.description for location in self._world.locations.values()]
+        self._sample_texts = self._sample_texts or [self._world.description]
+        tasks = {"encoder": self._load_encoder, "nlp": self._load_nlp}
+        # Without a key there is no client to build; StoryManager reports that itself.
+        if self.llm and os.getenv("GEMINI_API_KEY"):
+            tasks["llm"] = self._load_llm
+        self._executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="warmup")
+        for name, task in tasks.items():
+            self._futures[name] = self._executor.submit(self._timed, name, task)
+        # Idle threads exit once their task is done.
+        self._executor.shutdown(wait=False)
+        return self
+
+    def _timed(self, name: str, task):
+        started = time.perf_counter()
+        try:
+            return task()
+        except Exception as e:
+            with self._lock:
+                self._errors[name] = str(e)
+            return None
+        finally:
+            with self._lock:
+                self._seconds[name] = time.perf_counter() - started
+
+    def _load_encoder(self):
+        from .encoders import EncoderConfig
+        model = get_encoder(self.encoder_name, config=EncoderConfig.from_env())
+        model.encode(self._sample_texts)
+        return model
+
+    def _load_nlp(self):
+        nlp = get_nlp(self.nlp_name)
+        if self.entities:
+            from .entities import get_entity_extractor
+            get_entity_extractor(self.nlp_name).extract(self._sample_texts)
+        return nlp
+
+    def _load_llm(self):
+        from .story_manager import create_model
+        messages = []
+        model = create_model(report=messages.append)
+        if model is None and messages:
+            raise RuntimeError(messages[-1])
+        return model
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Waits for a task and returns what it loaded, or None if it failed, was not started, or timed out."""
+        future = self._futures.get(name)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except Exception:
+            return None
+
+    def take_world(self) -> World:
+        """Hands out the prepared default world once; later calls build a fresh one."""
+        with self._lock:
+            world, self._world = self._world, None
+        return world if world is not None else get_default_world()
+
+    def done(self) -> bool:
+        return all(future.done() for future in self._futures.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"seconds": dict(self._seconds), "errors": dict(self._errors),
+                    "pending": [name for name, future in self._futures.items() if not future.done()]}
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Optional
 from utils.display import print_info, print_error
+from .keyword_index import KeywordIndex
 
 # --- World Building Blocks ---
 
@@ -9,7 +10,8 @@ class WorldInfoEntry:
     """A piece of lore or information about the world."""
     name: str
     entry: str
-    # Triggers can be used to make this info appear in context, similar to Story Cards
+    # Words or phrases that bring this info into context when they appear in the story.
+    # Entries without triggers are always in context.
     triggers: List[str] = field(default_factory=list)
 
     def to_dict(self):
@@ -83,6 +85,10 @@ class World:
     classes: Dict[str, Class] = field(default_factory=dict)
     locations: Dict[str, Location] = field(default_factory=dict)
     world_info: List[WorldInfoEntry] = field(default_factory=list)
+    # Trigger index over world_info, built lazily and extended as entries are appended
+    _lore_index: Optional[KeywordIndex] = field(default=None, init=False, repr=False, compare=False)
+    _lore_always: List[int] = field(default_factory=list, init=False, repr=False, compare=False)
+    _lore_indexed: int = field(default=0, init=False, repr=False, compare=False)
 
     def to_dict(self):
         return {
@@ -112,6 +118,37 @@ class World:
     def get_location(self, key: str) -> Location | None:
         return self.locations.get(key)
 
+    def add_world_info(self, entry: WorldInfoEntry):
+        self.world_info.append(entry)
+        self._index_world_info()
+
+    def reindex_world_info(self):
+        """Rebuilds the trigger index. Needed after editing or removing existing entries."""
+        self._lore_index = None
+        self._index_world_info()
+
+    def _index_world_info(self):
+        if self._lore_index is None or self._lore_indexed > len(self.world_info):
+            self._lore_index = KeywordIndex()
+            self._lore_always = []
+            self._lore_indexed = 0
+        for position in range(self._lore_indexed, len(self.world_info)):
+            added = [self._lore_index.add(trigger, position) for trigger in self.world_info[position].triggers]
+            if not any(added):
+                self._lore_always.append(position)
+        self._lore_indexed = len(self.world_info)
+
+    def find_world_info(self, text: str) -> List[WorldInfoEntry]:
+        """
+        Returns the entries whose triggers appear in text (whole words, case-insensitive),
+        plus every entry without triggers, in world_info order.
+        """
+        if self._lore_index is None or self._lore_indexed != len(self.world_info):
+            self._index_world_info()
+        positions = self._lore_index.lookup(text)
+        positions.update(self._lore_always)
+        return [self.world_info[position] for position in sorted(positions)]
+
 # --- Default World Definition ---
 
 def get_default_world() -> World:
@@ -1,5 +1,11 @@
 import os
 import sys
+
+if __name__ == "__main__" and "--profile-startup" in sys.argv[1:]:
+    # Reports per-module import times of a fresh `import main`, then exits.
+    from utils.startup_profile import main as profile_startup
+    sys.exit(profile_startup())
+
 print("Starting main.py")
 from dotenv import load_dotenv
 from colorama import init as colorama_init
@@ -11,6 +17,7 @@ from prompt_toolkit.styles import Style as PromptToolkitStyle # Renamed to avoid
 
 from game.game_state import GameState
 from game.story_manager import StoryManager
+from game.warmup import Warmup
 from game.world_db import create_custom_world
 import utils.file_handler as file_handler
 from utils.display import *
@@ -24,6 +31,8 @@ import random # Needed for dice rolls
 # --- Initialize Libraries ---
 colorama_init()
 load_dotenv()
+# Story text is rendered as it is generated unless STREAM_RESPONSES=0.
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1").lower() not in ("0", "false", "no")
 
 # --- Custom Completer for prompt_toolkit ---
 class GameCompleter(Completer):
@@ -109,9 +118,24 @@ def apply_commands(game_state, commands):
         else:
             print_error(f"AI tried to move to an invalid location: {location_key}")
 
+def narrate(story_manager, action):
+    """Runs an action through the AI and shows the story, streaming it into a live panel when enabled."""
+    if not STREAM_RESPONSES or not sys.stdout.isatty():
+        story_text, commands = story_manager.process_action(action)
+        if story_text:
+            print_story("\n" + story_text)
+        return story_text, commands
+    with StoryStream() as stream:
+        story_text, commands = story_manager.process_action(action, on_text=stream.write)
+        # The final text also covers responses that never streamed (errors, no AI configured).
+        stream.finish(story_text)
+    return story_text, commands
+
 # --- Main Game Logic ---
 def main():
     game_state = None
+    # Models and the Gemini client load in the background while the setup prompts run.
+    warmup = Warmup().start()
     print_info("Welcome to StoryForge!")
     print_info("Tip: For the best experience, run in a fullscreen terminal.")
     
@@ -152,7 +176,7 @@ def main():
     if game_state is None:
         if choice == 'load': 
             print_info("Starting a new game instead.")
-        game_state = GameState(api_tier=api_tier_choice)
+        game_state = GameState(api_tier=api_tier_choice, world=warmup.take_world())
         
         if not sys.stdout.isatty():
             world_choice = "default"
@@ -248,11 +272,11 @@ def main():
         game_state.player.health = game_state.player.calculate_max_health()
         print_player_status(game_state.player.display_status())
 
-        story_manager = StoryManager(game_state)
+        story_manager = StoryManager(game_state, model=warmup.result("llm"))
         story_manager.start_story()
         current_story_text = game_state.get_current_story()
     else: # This handles a loaded game
-        story_manager = StoryManager(game_state)
+        story_manager = StoryManager(game_state, model=warmup.result("llm"))
         print_info("\n--- Story Continues ---")
         current_story_text = game_state.get_current_story()
 
@@ -263,8 +287,8 @@ def main():
     last_player_action = None
 
     while True:
-        file_handler.save_game(game_state, "autosave")
         game_state._save_snapshot()
+        file_handler.autosave(game_state)
         print_player_status("\n" + game_state.player.display_status())
         if game_state.player.health <= 0:
             print_game_over("\nYour health is zero. You have fallen.\n--- GAME OVER ---")
@@ -291,18 +315,14 @@ def main():
             if command_result == "quit":
                 break
             elif command_result == "retry":
-                story_text, commands = story_manager.process_action(last_player_action)
+                story_text, commands = narrate(story_manager, last_player_action)
                 apply_commands(game_state, commands)
-                if story_text:
-                    print_story("\n" + story_text)
                 if 'CHECK' in commands:
                     stat, difficulty = commands['CHECK']
                     success, result_text, system_feedback = resolve_stat_check(game_state.player, stat, difficulty)
                     print_info(result_text)
-                    consequence_text, final_commands = story_manager.process_action(system_feedback)
+                    consequence_text, final_commands = narrate(story_manager, system_feedback)
                     apply_commands(game_state, final_commands)
-                    if consequence_text:
-                        print_story("\n" + consequence_text)
             continue
         
         elif action_lower == 'help':
@@ -323,11 +343,8 @@ def main():
         
         else:
             last_player_action = user_action
-            story_text, commands = story_manager.process_action(user_action)
+            story_text, commands = narrate(story_manager, user_action)
             apply_commands(game_state, commands)
-            
-            if story_text:
-                print_story("\n" + story_text)
 
             if 'CHECK' in commands:
                 try:
@@ -335,14 +352,15 @@ def main():
                     difficulty = int(difficulty_str)
                     success, result_text, system_feedback = resolve_stat_check(game_state.player, stat, difficulty)
                     print_info(result_text)
-                    consequence_text, final_commands = story_manager.process_action(system_feedback)
+                    consequence_text, final_commands = narrate(story_manager, system_feedback)
                     apply_commands(game_state, final_commands)
-                    if consequence_text:
-                        print_story("\n" + consequence_text)
                 except (ValueError, TypeError) as e:
                     print_error(f"Invalid stat check format from AI: CHECK {commands['CHECK']}. Error: {e}")
                 except Exception as e:
                     print_error(f"An unexpected error occurred during stat check: {e}")
 
+    # Make sure queued autosaves reach the disk before exiting.
+    file_handler.flush_saves()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
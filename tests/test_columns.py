@@ -0,0 +1,64 @@
+import unittest
+from dataclasses import dataclass
+from game.columns import ColumnStore, columnar
+
+@columnar("score", "stamp")
+@dataclass
+class Item:
+    name: str
+    score: float = 1.0
+    stamp: float = 0.0
+
+class TestColumnStore(unittest.TestCase):
+
+    def test_attached_fields_live_in_columns(self):
+        """Test that attached objects read and write their store row, and keep values when detached."""
+        store = ColumnStore(("score", "stamp"), capacity=1)
+        items = [Item(f"item {i}", score=float(i)) for i in range(5)]
+        store.attach_many(items)
+        self.assertEqual(len(store), 5)
+        items[3].score += 0.5
+        self.assertEqual(store.data["score"][items[3]._slot], 3.5)
+        store.detach(items[3])
+        self.assertEqual(items[3].score, 3.5)
+        self.assertEqual(len(store), 4)
+        # Freed rows are reused.
+        newcomer = Item("new", score=9.0)
+        store.attach(newcomer)
+        self.assertEqual(newcomer._slot, 3)
+        self.assertEqual(newcomer.score, 9.0)
+
+    def test_decay_matches_per_object_formula(self):
+        """Test that vectorized decay gives exactly max(0, value - (now - stamp) * rate)."""
+        items = [Item(f"item {i}", score=i * 0.37, stamp=100.0 + i * 1.3) for i in range(50)]
+        expected = [max(0, item.score - (120.0 - item.stamp) * 0.05) for item in items]
+        store = ColumnStore(("score", "stamp"))
+        store.attach_many(items)
+        store.detach(items[0])
+        store.decay("score", "stamp", 0.05, 120.0)
+        self.assertEqual(items[0].score, 0.0)
+        self.assertEqual([item.score for item in items[1:]], expected[1:])
+
+    def test_touch_boosts_rows(self):
+        """Test that touch increments values and stamps rows in one call."""
+        items = [Item(f"item {i}") for i in range(4)]
+        store = ColumnStore(("score", "stamp"))
+        store.attach_many(items)
+        store.touch(store.slots(items[1:3]), "score", 1.0, "stamp", 50.0)
+        self.assertEqual([(item.score, item.stamp) for item in items], [(1.0, 0.0), (2.0, 50.0), (2.0, 50.0), (1.0, 0.0)])
+
+    def test_columnar_classes_are_slotted(self):
+        """Test that columnar classes have no per-instance __dict__ and still behave as dataclasses."""
+        item = Item("sword", score=2.0)
+        self.assertFalse(hasattr(item, "__dict__"))
+        with self.assertRaises(AttributeError):
+            item.colour = "red"
+        self.assertEqual(item, Item("sword", score=2.0))
+        store = ColumnStore(("score", "stamp"))
+        store.attach(item)
+        self.assertEqual(item, Item("sword", score=2.0))
+        store.detach(item)
+        self.assertEqual((item.score, item.stamp), (2.0, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
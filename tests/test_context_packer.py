@@ -0,0 +1,56 @@
+import unittest
+from game.context_packer import ContextCandidate, ContextPacker
+from game.tokens import TokenCounter
+
+class TestContextPacker(unittest.TestCase):
+
+    def setUp(self):
+        self.counter = TokenCounter()
+        self.packer = ContextPacker(self.counter)
+
+    def test_density_packing_prefers_priority_per_token(self):
+        """Test that short, high-priority candidates win over long, low-value ones."""
+        long_text = "The old mill by the river has been abandoned for years and nobody goes there. " * 5
+        candidates = [
+            ContextCandidate("memory", long_text, priority=2.0, order=0),
+            ContextCandidate("memory", "The king is dead.", priority=1.5, order=1),
+            ContextCandidate("memory", "The bridge is out.", priority=1.0, order=2),
+        ]
+        budget = self.counter.count("The king is dead.") + self.counter.count("The bridge is out.")
+        packed, report = self.packer.pack(candidates, {"memory": budget})
+        self.assertEqual([c.text for c in packed["memory"]], ["The king is dead.", "The bridge is out."])
+        self.assertEqual([c.text for c in report.dropped], [long_text])
+        self.assertIn("dropped 1 memory", report.summary())
+
+    def test_history_stays_contiguous(self):
+        """Test that history is taken newest first, stops at the first miss and is presented in order."""
+        history = ["First turn.", "A very long second turn. " * 20, "Third turn.", "Fourth turn."]
+        candidates = [ContextCandidate("history", entry, priority=-age, order=-age)
+                      for age, entry in enumerate(reversed(history))]
+        budget = self.counter.count("Third turn.") + self.counter.count("Fourth turn.") + 2
+        packed, report = self.packer.pack(candidates, {"history": budget})
+        self.assertEqual([c.text for c in packed["history"]], ["Third turn.", "Fourth turn."])
+        self.assertEqual(len(report.dropped), 2)
+
+    def test_oversized_latest_history_is_truncated(self):
+        """Test that a single oversized history entry is cut down rather than dropped."""
+        entry = "The dragon roars and the walls shake. " * 50
+        packed, report = self.packer.pack([ContextCandidate("history", entry, priority=0)], {"history": 20})
+        self.assertEqual(len(packed["history"]), 1)
+        self.assertLessEqual(packed["history"][0].tokens, 20)
+        self.assertTrue(entry.endswith(packed["history"][0].text))
+        self.assertEqual(len(report.truncated), 1)
+
+    def test_unused_budget_spills_over(self):
+        """Test that a section's unused budget is offered to other sections."""
+        candidates = [
+            ContextCandidate("memory", "The blacksmith forges a blade.", priority=1.0),
+            ContextCandidate("memory", "The baker sells bread at dawn.", priority=1.0),
+        ]
+        one = self.counter.count("The blacksmith forges a blade.")
+        packed, report = self.packer.pack(candidates, {"memory": one, "reminders": one * 2})
+        self.assertEqual(len(packed["memory"]), 2)
+        self.assertEqual(report.dropped, [])
+
+if __name__ == '__main__':
+    unittest.main()
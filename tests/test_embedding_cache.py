@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from game.embedding_cache import EmbeddingCache
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype='float32')
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def test_repeated_queries_skip_the_encoder(self):
+        """Test that whitespace variants of a query hit the cache and count hits and misses."""
+        cache = EmbeddingCache(maxsize=8)
+        encoder = CountingEncoder()
+        first = cache.encode(encoder, "model-a", "look around")
+        second = cache.encode(encoder, "model-a", "  look   around\n")
+        self.assertEqual(encoder.calls, 1)
+        self.assertIs(first, second)
+        self.assertEqual(first.shape, (1, 2))
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 1))
+
+    def test_keys_include_model_and_case(self):
+        """Test that other models and differently cased text are encoded separately."""
+        cache = EmbeddingCache(maxsize=8)
+        encoder = CountingEncoder()
+        cache.encode(encoder, "model-a", "look around")
+        cache.encode(encoder, "model-b", "look around")
+        cache.encode(encoder, "model-a", "Look around")
+        self.assertEqual(encoder.calls, 3)
+
+if __name__ == '__main__':
+    unittest.main()
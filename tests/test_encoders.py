@@ -0,0 +1,94 @@
+import unittest
+import os
+from unittest.mock import patch
+import numpy as np
+from game import encoders
+from game.encoders import Encoder, EncoderConfig, load_encoder, parity
+from game.model_registry import ModelRegistry
+
+class FakeModel:
+    def __init__(self, noise=0.0):
+        self.noise = noise
+        self.batch_sizes = []
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.batch_sizes.append(batch_size)
+        rows = [np.random.default_rng(len(text)).standard_normal(8) for text in texts]
+        return np.array(rows) + self.noise * np.arange(8)
+
+    def get_sentence_embedding_dimension(self):
+        return 8
+
+class TestEncoders(unittest.TestCase):
+
+    def test_config_from_env(self):
+        """Test that the encoder config is read from ENCODER_* variables and validated."""
+        with patch.dict(os.environ, {"ENCODER_BACKEND": "onnx-int8", "ENCODER_THREADS": "4", "ENCODER_VERIFY": "0"}):
+            config = EncoderConfig.from_env()
+        self.assertEqual((config.backend, config.threads, config.batch_size, config.verify), ("onnx-int8", 4, 64, False))
+        with self.assertRaises(ValueError):
+            EncoderConfig(backend="tensorrt")
+
+    def test_encoder_uses_configured_batch_size(self):
+        """Test that the wrapper batches with its batch size and returns float32."""
+        model = FakeModel()
+        embeddings = Encoder(model, "torch", batch_size=16).encode(("a", "bb"))
+        self.assertEqual(model.batch_sizes, [16])
+        self.assertEqual((embeddings.shape, embeddings.dtype), ((2, 8), np.float32))
+
+    def test_parity_falls_back_to_torch(self):
+        """Test that a backend is kept within tolerance and replaced by PyTorch outside it."""
+        self.assertAlmostEqual(parity(Encoder(FakeModel(), "torch"), Encoder(FakeModel(), "onnx")), 1.0, places=6)
+        with patch.object(encoders, "_load_torch", side_effect=lambda *args: FakeModel()), \
+             patch.object(encoders, "_load_backend", side_effect=lambda *args: FakeModel(noise=0.001)):
+            self.assertEqual(load_encoder("tiny", config=EncoderConfig(backend="onnx")).backend, "onnx")
+        with patch.object(encoders, "_load_torch", side_effect=lambda *args: FakeModel()), \
+             patch.object(encoders, "_load_backend", side_effect=lambda *args: FakeModel(noise=5.0)), \
+             patch("builtins.print") as printed:
+            self.assertEqual(load_encoder("tiny", config=EncoderConfig(backend="onnx")).backend, "torch")
+        self.assertIn("WARN", printed.call_args[0][0])
+
+    def test_missing_backend_falls_back_to_torch(self):
+        """Test that a backend whose packages are missing loads PyTorch instead."""
+        with patch.object(encoders, "_load_torch", side_effect=lambda *args: FakeModel()), \
+             patch.object(encoders, "_load_backend", side_effect=ImportError("No module named 'onnxruntime'")), \
+             patch("builtins.print"):
+            self.assertEqual(load_encoder("tiny", config=EncoderConfig(backend="onnx")).backend, "torch")
+
+    def test_registry_caches_backends_separately(self):
+        """Test that each backend gets its own registry entry."""
+        reg = ModelRegistry()
+        with patch.object(encoders, "load_encoder", side_effect=lambda name, revision, config, *args: Encoder(FakeModel(), config.backend)):
+            torch_encoder = reg.get_encoder("tiny")
+            int8_encoder = reg.get_encoder("tiny", config=EncoderConfig(backend="torch-int8", verify=False))
+            self.assertIs(reg.get_encoder("tiny"), torch_encoder)
+        self.assertIsNot(torch_encoder, int8_encoder)
+        self.assertTrue(reg.is_loaded("encoder", "tiny"))
+        self.assertTrue(reg.is_loaded("encoder:torch-int8", "tiny"))
+
+    def test_registry_verifies_against_shared_torch_encoder(self):
+        """Test that verifying a backend reuses the registry's PyTorch encoder instead of loading another."""
+        reg = ModelRegistry()
+        with patch.object(encoders, "_load_torch", side_effect=lambda *args: FakeModel()) as load_torch, \
+             patch.object(encoders, "_load_backend", side_effect=lambda *args: FakeModel(noise=0.001)):
+            torch_encoder = reg.get_encoder("tiny")
+            self.assertEqual(reg.get_encoder("tiny", config=EncoderConfig(backend="onnx")).backend, "onnx")
+        self.assertEqual(load_torch.call_count, 1)
+        with patch.object(encoders, "_load_backend", side_effect=lambda *args: FakeModel(noise=5.0)), \
+             patch("builtins.print"):
+            self.assertIs(reg.get_encoder("tiny", config=EncoderConfig(backend="onnx-int8")), torch_encoder)
+
+    def test_registry_warms_and_evicts_configured_backend(self):
+        """Test that warm() loads the ENCODER_BACKEND encoder and encoder lookups see every backend."""
+        reg = ModelRegistry()
+        with patch.object(encoders, "load_encoder", side_effect=lambda name, revision, config, *args: Encoder(FakeModel(), config.backend)), \
+             patch.dict(os.environ, {"ENCODER_BACKEND": "onnx"}):
+            reg.warm(encoders=("tiny",), nlp=())
+        self.assertEqual(reg.loaded_models(), [("encoder:onnx", "tiny", None)])
+        self.assertTrue(reg.is_loaded("encoder", "tiny"))
+        self.assertFalse(reg.is_loaded("encoder:torch-int8", "tiny"))
+        self.assertEqual(reg.evict(kind="encoder"), 1)
+        self.assertFalse(reg.is_loaded("encoder", "tiny"))
+
+if __name__ == '__main__':
+    unittest.main()
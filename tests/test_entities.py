@@ -0,0 +1,78 @@
+import queue
+import re
+import unittest
+from types import SimpleNamespace
+
+from game.entities import EntityExtractor
+from game.memory import MemoryManager
+
+class FakeNLP:
+    """Treats capitalized words after the first as PERSON entities and records how pipe() is called."""
+    pipe_names = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+    def __init__(self):
+        self.calls = []
+
+    def pipe(self, texts, batch_size=None, n_process=1, disable=()):
+        texts = list(texts)
+        self.calls.append({"texts": texts, "batch_size": batch_size, "n_process": n_process, "disable": list(disable)})
+        for text in texts:
+            ents = [SimpleNamespace(text=word, label_="PERSON") for word in re.findall(r"(?<!^)\b[A-Z][a-z]+", text)]
+            ents += [SimpleNamespace(text=number, label_="CARDINAL") for number in re.findall(r"\d+", text)]
+            yield SimpleNamespace(ents=ents)
+
+class TestEntityExtractor(unittest.TestCase):
+    def test_extract_uses_ner_only(self):
+        """Test that extraction disables the components NER does not need and keeps entity types only."""
+        nlp = FakeNLP()
+        extractor = EntityExtractor(nlp, batch_size=16, n_process=2)
+        self.assertEqual(extractor.extract(["The knight met Arthur and Arthur met 3 Saxons."]), [["Arthur", "Saxons"]])
+        call = nlp.calls[0]
+        self.assertEqual(call["disable"], ["tagger", "parser", "attribute_ruler", "lemmatizer"])
+        self.assertEqual((call["batch_size"], call["n_process"]), (16, 2))
+        self.assertEqual(extractor.stats()["docs"], 1)
+
+    def test_submit_delivers_results_in_background(self):
+        """Test that submitted texts are extracted off-thread and delivered to the outbox in order."""
+        extractor = EntityExtractor(FakeNLP())
+        outbox = queue.SimpleQueue()
+        self.assertEqual(extractor.submit(["Merlin waits.", "   ", "The road to Camelot."], outbox, kind="story"), 2)
+        extractor.join()
+        results = [outbox.get_nowait(), outbox.get_nowait()]
+        self.assertEqual([(r.text, r.kind, r.entities) for r in results],
+                         [("Merlin waits.", "story", []), ("The road to Camelot.", "story", ["Camelot"])])
+        self.assertGreater(extractor.stats()["docs_per_second"], 0)
+
+class TestMemoryEntities(unittest.TestCase):
+    def setUp(self):
+        self.memory_manager = MemoryManager()
+        self.memory_manager.entity_extractor = EntityExtractor(FakeNLP())
+
+    def test_entities_link_facts(self):
+        """Test that facts mentioning the same entity are connected through an entity node."""
+        self.memory_manager.add_to_memory_bank("The sword belongs to Arthur of Camelot.")
+        self.memory_manager.add_to_memory_bank("The wizard Merlin advises Arthur.")
+        self.memory_manager.apply_entities(wait=True)
+        graph = self.memory_manager.graph
+        self.assertEqual(graph.node_type("Arthur"), "entity")
+        self.assertTrue(graph.has_edge("Arthur", "Camelot"))
+        path = self.memory_manager.reason_about_facts("The sword belongs to Arthur of Camelot.", "The wizard Merlin advises Arthur.")
+        self.assertEqual(path, ["The sword belongs to Arthur of Camelot.", "Arthur", "The wizard Merlin advises Arthur."])
+
+    def test_story_turns_add_cooccurrence(self):
+        """Test that entities named together in a story turn are linked without a fact node."""
+        self.memory_manager.observe_story("You see Gawain duel Lancelot.")
+        self.memory_manager.apply_entities(wait=True)
+        self.assertTrue(self.memory_manager.graph.has_edge("Gawain", "Lancelot"))
+        self.assertFalse(self.memory_manager.graph.has_node("You see Gawain duel Lancelot."))
+
+    def test_removed_fact_adds_nothing(self):
+        """Test that an extraction finishing after its fact was removed leaves the graph alone."""
+        fact = self.memory_manager.add_to_memory_bank("The ferry belongs to Osric.")
+        self.memory_manager.entity_extractor.join()
+        self.memory_manager._delete_fact(fact)
+        self.assertEqual(self.memory_manager.apply_entities(), 1)
+        self.assertFalse(self.memory_manager.graph.has_node("Osric"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import os
 import pickle
+from unittest.mock import patch
+from game.entities import Extraction
 from game.game_state import GameState
 import utils.file_handler as file_handler
 
@@ -16,9 +18,11 @@ class TestFileHandler(unittest.TestCase):
 
     def tearDown(self):
         """Clean up dummy files and directories after tests."""
-        test_filepath = os.path.join(self.test_save_dir, f"{self.test_filename}.json")
-        if os.path.exists(test_filepath):
-            os.remove(test_filepath)
+        file_handler.flush_saves()
+        for suffix in (".json", ".vectors.npy", ".faiss", ".journal"):
+            test_filepath = os.path.join(self.test_save_dir, f"{self.test_filename}{suffix}")
+            if os.path.exists(test_filepath):
+                os.remove(test_filepath)
         if os.path.exists(self.test_save_dir):
             # Check if the directory is empty before trying to remove it
             if not os.listdir(self.test_save_dir):
@@ -40,4 +44,117 @@ class TestFileHandler(unittest.TestCase):
         self.assertIsNotNone(gs_loaded)
         self.assertEqual(gs_loaded.player.name, "Tester")
         self.assertIn("test_item", gs_loaded.player.inventory)
-        self.assertEqual(gs_loaded.get_current_story(), "A test event happened.")
\ No newline at end of file
+        self.assertEqual(gs_loaded.get_current_story(), "A test event happened.")
+
+    def test_load_uses_vector_sidecar(self):
+        """Test that loading a save reuses the persisted vectors instead of re-encoding."""
+        gs_to_save = GameState()
+        gs_to_save.memory_manager.add_to_memory_bank("The dragon sleeps under the mountain.")
+        gs_to_save.memory_manager.add_to_memory_bank("The mayor owes the guild money.")
+        self.assertTrue(file_handler.save_game(gs_to_save, self.test_filename))
+
+        with patch.object(gs_to_save.memory_manager.model, "encode", side_effect=AssertionError("re-encoded on load")):
+            gs_loaded = file_handler.load_game(self.test_filename)
+        self.assertIsNotNone(gs_loaded)
+        self.assertEqual(gs_loaded.memory_manager.index.ntotal, 2)
+
+    def test_float16_sidecar(self):
+        """Test that a float16 vector sidecar is written and loaded without re-encoding."""
+        import numpy as np
+        from game.vector_index import IndexConfig
+        gs_to_save = GameState()
+        gs_to_save.memory_manager.index_config = IndexConfig(sidecar_dtype="float16")
+        gs_to_save.memory_manager.add_to_memory_bank("The dragon sleeps under the mountain.")
+        self.assertTrue(file_handler.save_game(gs_to_save, self.test_filename))
+        file_handler.flush_saves()
+        embeddings = np.load(os.path.join(self.test_save_dir, f"{self.test_filename}.vectors.npy"))
+        self.assertEqual(embeddings.dtype, np.float16)
+
+        with patch.object(gs_to_save.memory_manager.model, "encode", side_effect=AssertionError("re-encoded on load")):
+            gs_loaded = file_handler.load_game(self.test_filename)
+        self.assertEqual(gs_loaded.memory_manager.index.ntotal, 1)
+
+    def test_stale_sidecar_is_ignored(self):
+        """Test that a sidecar whose fingerprint does not match the bank triggers a re-encode."""
+        gs = GameState()
+        gs.memory_manager.add_to_memory_bank("The dragon sleeps under the mountain.")
+        meta, embeddings, index_bytes = gs.memory_manager.export_vectors()
+        meta = dict(meta, model="some-other-encoder")
+        self.assertFalse(gs.memory_manager.load_vectors(meta, index_bytes, embeddings))
+
+    def test_autosave_appends_to_journal(self):
+        """Test that autosave appends turn records and that loading replays them."""
+        gs = GameState()
+        gs._save_snapshot()
+        self.assertTrue(file_handler.autosave(gs, self.test_filename))
+        file_handler.flush_saves()
+        journal_path = os.path.join(self.test_save_dir, f"{self.test_filename}.journal")
+        base_path = os.path.join(self.test_save_dir, f"{self.test_filename}.json")
+        base_mtime = os.path.getmtime(base_path)
+
+        gs.add_to_story("You enter the tavern.")
+        gs.player.health = 55
+        gs.memory_manager.add_to_memory_bank("The bard sings of a lost crown.")
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+        gs.add_to_story("You order an ale.")
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+        file_handler.flush_saves()
+
+        with open(journal_path) as f:
+            self.assertEqual(len(f.read().splitlines()), 3)  # header + two turns
+        self.assertEqual(os.path.getmtime(base_path), base_mtime)
+
+        gs_loaded = file_handler.load_game(self.test_filename)
+        self.assertEqual(gs_loaded.story_history, ["You enter the tavern.", "You order an ale."])
+        self.assertEqual(gs_loaded.player.health, 55)
+        self.assertEqual([f.fact for f in gs_loaded.memory_manager.memory_bank], ["The bard sings of a lost crown."])
+
+    def test_journal_keeps_relevance_and_entities(self):
+        """Test that retrieval boosts and merged entities survive a reload from the journal."""
+        gs = GameState()
+        gs.memory_manager.add_to_memory_bank("The bard sings of a lost crown.")
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+        gs.memory_manager.search_memory_bank("crown", k=1)
+        gs.memory_manager._merge_entities(Extraction("Aldric greets Mira.", "story", ["Aldric", "Mira"]))
+        gs.story_history.append("Aldric greets Mira.")
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+
+        gs_loaded = file_handler.load_game(self.test_filename)
+        self.assertEqual(gs_loaded.memory_manager.memory_bank[0].relevance, gs.memory_manager.memory_bank[0].relevance)
+        self.assertGreater(gs_loaded.memory_manager.memory_bank[0].relevance, 1.0)
+        self.assertTrue(gs_loaded.memory_manager.graph.has_edge("Aldric", "Mira"))
+
+    def test_journal_records_undo(self):
+        """Test that undo is journaled and survives a reload."""
+        gs = GameState()
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+        gs.add_to_story("A mistake.")
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+        gs.undo()
+        file_handler.autosave(gs, self.test_filename)
+
+        gs_loaded = file_handler.load_game(self.test_filename)
+        self.assertEqual(gs_loaded.story_history, [])
+
+    def test_journal_compaction(self):
+        """Test that the journal is folded into the base save once it grows long enough."""
+        gs = GameState()
+        gs._save_snapshot()
+        file_handler.autosave(gs, self.test_filename)
+        for turn in range(file_handler.JOURNAL_COMPACT_EVERY + 1):
+            gs.add_to_story(f"Turn {turn}.")
+            gs._save_snapshot()
+            file_handler.autosave(gs, self.test_filename)
+
+        file_handler.flush_saves()
+        journal_path = os.path.join(self.test_save_dir, f"{self.test_filename}.journal")
+        with open(journal_path) as f:
+            self.assertLess(len(f.read().splitlines()), 3)
+        gs_loaded = file_handler.load_game(self.test_filename)
+        self.assertEqual(gs_loaded.story_history, gs.story_history)
@@ -19,3 +19,57 @@ class TestGameState(unittest.TestCase):
         gs.add_to_story("Second line.")
         self.assertEqual(gs.get_current_story(), "Second line.")
         self.assertEqual(gs.get_full_story(), "First line.\nSecond line.")
+
+    def test_undo_redo(self):
+        """Test that undo and redo step through per-turn deltas."""
+        gs = GameState()
+        gs._save_snapshot()
+        gs.add_to_story("Turn one.")
+        gs.player.health -= 10
+        gs.player.inventory.append("rope")
+        gs.memory_manager.add_to_memory_bank("The innkeeper is called Bram.")
+        gs._save_snapshot()
+        gs.add_to_story("Turn two.")
+        gs.current_location_key = "village_square"
+        gs._save_snapshot()
+
+        self.assertTrue(gs.undo())
+        self.assertEqual(gs.story_history, ["Turn one."])
+        self.assertEqual(gs.current_location_key, "tavern")
+
+        self.assertTrue(gs.undo())
+        self.assertEqual(gs.story_history, [])
+        self.assertEqual(gs.player.health, 80)
+        self.assertEqual(gs.player.inventory, [])
+        self.assertEqual(gs.memory_manager.memory_bank, [])
+        self.assertFalse(gs.undo())
+
+        self.assertTrue(gs.redo())
+        self.assertTrue(gs.redo())
+        self.assertEqual(gs.story_history, ["Turn one.", "Turn two."])
+        self.assertEqual(gs.player.inventory, ["rope"])
+        self.assertEqual(gs.current_location_key, "village_square")
+        results = gs.memory_manager.search_memory_bank("Who is the innkeeper?")
+        self.assertEqual(results[0][0].fact, "The innkeeper is called Bram.")
+        self.assertFalse(gs.redo())
+
+    def test_checkpoint_without_changes_keeps_redo(self):
+        """Test that an unchanged turn does not discard the redo history."""
+        gs = GameState()
+        gs._save_snapshot()
+        gs.add_to_story("Turn one.")
+        gs._save_snapshot()
+        gs.undo()
+        gs._save_snapshot()
+        self.assertTrue(gs.redo())
+        self.assertEqual(gs.get_current_story(), "Turn one.")
+
+    def test_undo_discards_uncheckpointed_changes(self):
+        """Test that undo also rolls back changes made since the last checkpoint."""
+        gs = GameState()
+        gs._save_snapshot()
+        gs.add_to_story("Turn one.")
+        gs._save_snapshot()
+        gs.add_to_story("Half a turn.")
+        self.assertTrue(gs.undo())
+        self.assertEqual(gs.story_history, [])
@@ -0,0 +1,91 @@
+import unittest
+import random
+from unittest.mock import patch
+import networkx as nx
+from game import knowledge_graph
+from game.knowledge_graph import KnowledgeGraph
+
+def _random_ops(seed, steps=600):
+    rng = random.Random(seed)
+    ops = []
+    for _ in range(steps):
+        a, b = f"n{rng.randrange(80)}", f"n{rng.randrange(80)}"
+        roll = rng.random()
+        ops.append(("add", a, b) if roll < 0.75 else ("remove_edge", a, b) if roll < 0.93 else ("remove_node", a, None))
+    return ops
+
+class TestKnowledgeGraph(unittest.TestCase):
+
+    def _replay(self, ops):
+        graph, reference = KnowledgeGraph(), nx.Graph()
+        for op, a, b in ops:
+            if op == "add" and a != b:
+                graph.add_edge(a, b)
+                reference.add_edge(a, b)
+            elif op == "remove_edge" and reference.has_edge(a, b):
+                graph.remove_edge(a, b)
+                reference.remove_edge(a, b)
+            elif op == "remove_node" and reference.has_node(a):
+                graph.remove_node(a)
+                reference.remove_node(a)
+        return graph, reference
+
+    def test_isolated_node_after_compact(self):
+        """Test that a node added after compaction without edges is reported as unreachable."""
+        graph = KnowledgeGraph()
+        graph.add_edge("a", "t")
+        graph.compact()
+        graph.add_node("b", type="fact")
+        self.assertIsNone(graph.shortest_path("b", "a"))
+        self.assertIsNone(graph.shortest_path("a", "b"))
+        self.assertEqual(graph.shortest_path("a", "t"), ["a", "t"])
+
+    def test_matches_networkx(self):
+        """Test that edits, degrees and shortest path lengths match networkx, buffered or compacted."""
+        for min_changes in (5, 100000):
+            with patch.object(knowledge_graph, "COMPACT_MIN_CHANGES", min_changes):
+                graph, reference = self._replay(_random_ops(min_changes))
+            self.assertEqual(set(graph.nodes), set(reference.nodes))
+            self.assertEqual({frozenset(e) for e in graph.edges}, {frozenset(e) for e in reference.edges})
+            for node in reference.nodes:
+                self.assertEqual(graph.degree(node), reference.degree(node))
+                self.assertEqual(set(graph.neighbors(node)), set(reference.neighbors(node)))
+            rng = random.Random(1)
+            nodes = sorted(reference.nodes)
+            for _ in range(200):
+                a, b = rng.choice(nodes), rng.choice(nodes)
+                path = graph.shortest_path(a, b)
+                if nx.has_path(reference, a, b):
+                    self.assertEqual(len(path) - 1, nx.shortest_path_length(reference, a, b))
+                    self.assertTrue(all(reference.has_edge(u, v) for u, v in zip(path, path[1:])))
+                else:
+                    self.assertIsNone(path)
+
+    def test_binary_round_trip_shares_labels(self):
+        """Test that serialization keeps nodes, types and edges and stores shared labels by position."""
+        graph = KnowledgeGraph()
+        facts = ["The sword is in the stone.", "The stone is in the forest."]
+        graph.add_nodes_from(facts, type="fact")
+        graph.add_nodes_from(["stone", "forest"], type="tag")
+        graph.add_edges_from([(facts[0], "stone"), (facts[1], "stone"), (facts[1], "forest")])
+        data = graph.to_bytes(shared_labels=facts)
+        self.assertNotIn(b"sword", data)
+        restored = KnowledgeGraph.from_dict(graph.to_dict(shared_labels=facts), shared_labels=facts)
+        self.assertEqual(restored.node_type(facts[0]), "fact")
+        self.assertEqual(restored.node_type("forest"), "tag")
+        self.assertEqual(restored.shortest_path(facts[0], "forest"), [facts[0], "stone", facts[1], "forest"])
+        self.assertTrue(nx.utils.graphs_equal(restored.to_networkx(), graph.to_networkx()))
+
+    def test_reads_node_link_data(self):
+        """Test that graphs saved as networkx node-link data still load."""
+        legacy = nx.Graph()
+        legacy.add_node("A fact.", type="fact")
+        legacy.add_node("tag", type="tag")
+        legacy.add_edge("A fact.", "tag")
+        for edges in ("edges", "links"):
+            graph = KnowledgeGraph.from_dict(nx.node_link_data(legacy, edges=edges))
+            self.assertTrue(graph.has_edge("tag", "A fact."))
+            self.assertEqual(graph.node_type("A fact."), "fact")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -154,5 +154,171 @@ class TestMemoryManager(unittest.TestCase):
         self.assertEqual(self.memory_manager.memory_bank[0].fact, "Fact 2")
         self.assertEqual(len(self.memory_manager.story_cards), 0)
 
+    def test_exact_duplicates_are_ignored(self):
+        """Test that re-adding a stored fact returns the existing one and adds nothing."""
+        first = self.memory_manager.add_to_memory_bank("The sky is blue.")
+        again = self.memory_manager.add_to_memory_bank("The sky is blue.", tags=["nature"])
+        self.assertIs(again, first)
+        self.assertEqual(len(self.memory_manager.memory_bank), 1)
+        self.assertEqual(self.memory_manager.index.ntotal, 1)
+
+    def test_semantic_dedup_reject(self):
+        """Test that near-duplicates are rejected in reject mode and kept when dedup is off."""
+        self.memory_manager.dedup_mode = "reject"
+        self.memory_manager.add_to_memory_bank("The king is named Arthur.")
+        self.assertIsNone(self.memory_manager.add_to_memory_bank("The king is named Arthur!"))
+        self.assertIsNotNone(self.memory_manager.add_to_memory_bank("The queen is named Guinevere."))
+        self.assertEqual(len(self.memory_manager.memory_bank), 2)
+
+        self.memory_manager.dedup_mode = None
+        self.memory_manager.add_to_memory_bank("The king is named Arthur!")
+        self.assertEqual(len(self.memory_manager.memory_bank), 3)
+
+    def test_semantic_dedup_merge(self):
+        """Test that merge mode folds a near-duplicate's tags into the stored fact, undoably."""
+        self.memory_manager.dedup_mode = "merge"
+        stored = self.memory_manager.add_to_memory_bank("The king is named Arthur.", tags=["king"])
+        self.memory_manager.track_changes()
+        merged = self.memory_manager.add_to_memory_bank("The king is named Arthur!", tags=["arthur"])
+        self.assertIs(merged, stored)
+        self.assertEqual(stored.tags, ["king", "arthur"])
+        self.assertTrue(self.memory_manager.graph.has_edge(stored.fact, "arthur"))
+
+        for change in reversed(self.memory_manager.drain_changes()):
+            self.memory_manager.apply_change(change, reverse=True)
+        self.assertEqual(stored.tags, ["king"])
+        self.assertFalse(self.memory_manager.graph.has_node("arthur"))
+
+    def test_add_many_matches_single_inserts(self):
+        """Test that bulk ingestion stores the same facts, vectors and graph as one-by-one inserts."""
+        facts = [f"Villager {i} keeps {i % 7} goats." for i in range(50)]
+        facts += [(f"The {name} guards the gate.", ["guard"]) for name in ("ogre", "troll")]
+        facts.append("Villager 3 keeps 3 goats.")
+        report = self.memory_manager.add_many(facts, tags=["village"], batch_size=16)
+        self.assertEqual((report.added, report.duplicates), (52, 1))
+        self.assertGreater(report.facts_per_second, 0)
+
+        single = MemoryManager(fuzzy_threshold=80)
+        for item in facts:
+            text, tags = (item, ["village"]) if isinstance(item, str) else item
+            single.add_to_memory_bank(text, tags=tags)
+        self.assertEqual([f.fact for f in self.memory_manager.memory_bank], [f.fact for f in single.memory_bank])
+        self.assertEqual([f.tags for f in self.memory_manager.memory_bank], [f.tags for f in single.memory_bank])
+        self.assertEqual(self.memory_manager.index.ntotal, 52)
+        self.assertEqual({frozenset(e) for e in self.memory_manager.graph.edges}, {frozenset(e) for e in single.graph.edges})
+        results = self.memory_manager.search_memory_bank("Who guards the gate?", tags=["guard"])
+        self.assertEqual(len(results), 2)
+
+    def test_add_many_dedup_within_batch(self):
+        """Test that semantic dedup also catches near-duplicates inside the same batch."""
+        self.memory_manager.dedup_mode = "merge"
+        self.memory_manager.add_to_memory_bank("The king is named Arthur.", tags=["king"])
+        report = self.memory_manager.add_many([
+            ("The king is named Arthur!", ["arthur"]),
+            ("The queen is named Guinevere.", ["queen"]),
+            ("The queen is named Guinevere!", ["guinevere"]),
+        ])
+        self.assertEqual((report.added, report.merged), (1, 2))
+        tags = {f.fact: f.tags for f in self.memory_manager.memory_bank}
+        self.assertEqual(tags["The king is named Arthur."], ["king", "arthur"])
+        self.assertEqual(tags["The queen is named Guinevere."], ["queen", "guinevere"])
+
+    def test_prune_removes_ids_without_reencoding(self):
+        """Test that pruning deletes by fact id and never runs the encoder."""
+        from unittest.mock import patch
+        self.memory_manager.add_many([f"Fact {i} about the harbour." for i in range(100)])
+        ids = [f.fact_id for f in self.memory_manager.memory_bank]
+        self.assertEqual(len(set(ids)), 100)
+        for fact in self.memory_manager.memory_bank[::10]:
+            fact.relevance = 0.0
+        with patch.object(self.memory_manager.model, "encode", wraps=self.memory_manager.model.encode) as encode:
+            self.memory_manager.prune_memories(fact_threshold=0.5, card_threshold=0.5)
+            self.assertEqual(encode.call_count, 0)
+        self.assertEqual(len(self.memory_manager.memory_bank), 90)
+        self.assertEqual(self.memory_manager.index.ntotal, 90)
+        self.assertEqual([f.fact_id for f in self.memory_manager.memory_bank], [i for n, i in enumerate(ids) if n % 10])
+        results = self.memory_manager.search_memory_bank("Fact 13 about the harbour.", k=1)
+        self.assertEqual(results[0][0].fact, "Fact 13 about the harbour.")
+        pruned_hits = [fact.fact for fact, _ in self.memory_manager.search_memory_bank("Fact 20 about the harbour.", k=90)]
+        self.assertNotIn("Fact 20 about the harbour.", pruned_hits)
+
+    def test_rare_tags_fill_k(self):
+        """Test that tag-filtered searches return every match for rare tags, nearest first."""
+        facts = [(f"The miller sells flour to house {i}.", ["village"]) for i in range(300)]
+        facts += [("The dragon hoards gold under the mountain.", ["dragon", "lore"]),
+                  ("A dragon was seen over the lake.", ["dragon"]),
+                  ("Dragons fear the silver bells.", ["Dragon", "lore"])]
+        self.memory_manager.add_many(facts)
+        results = self.memory_manager.search_memory_bank("Who sells flour?", k=5, tags=["dragon"])
+        self.assertEqual(len(results), 3)
+        results = self.memory_manager.search_memory_bank("Where does the dragon keep its gold?", k=5, tags=["DRAGON", "lore"])
+        self.assertEqual([f.fact for f, _ in results][0], "The dragon hoards gold under the mountain.")
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.memory_manager.search_memory_bank("gold", tags=["unknown"]), [])
+
+        for fact in self.memory_manager.memory_bank:
+            fact.relevance = 0.0 if "lore" in fact.tags else 1.0
+        self.memory_manager.prune_memories(fact_threshold=0.5, card_threshold=0.0)
+        results = self.memory_manager.search_memory_bank("gold", tags=["dragon"])
+        self.assertEqual([f.fact for f, _ in results], ["A dragon was seen over the lake."])
+
+    def test_relevance_columns_survive_removal_and_reload(self):
+        """Test that relevance kept in numpy columns is saved, and restored when a prune is undone."""
+        from game.memory import MemoryManager as Manager
+        self.memory_manager.add_many(["Fact A", "Fact B"])
+        fact_a, fact_b = self.memory_manager.memory_bank
+        fact_a.relevance, fact_b.relevance = 0.25, 3.0
+        self.memory_manager.track_changes()
+        self.memory_manager.prune_memories(fact_threshold=0.5, card_threshold=0.0)
+        self.assertEqual(fact_a.relevance, 0.25)
+        for change in reversed(self.memory_manager.drain_changes()):
+            self.memory_manager.apply_change(change, reverse=True)
+        self.assertEqual(sorted(f.relevance for f in self.memory_manager.memory_bank), [0.25, 3.0])
+
+        loaded = Manager.from_dict(self.memory_manager.to_dict())
+        self.assertEqual(sorted(f.relevance for f in loaded.memory_bank), [0.25, 3.0])
+        weakest = min(loaded.memory_bank, key=lambda f: f.relevance)
+        weakest.last_accessed = time.time() - 100
+        loaded.decay_relevance_scores()
+        self.assertEqual(weakest.relevance, 0)
+
+    def test_to_dict_copies_and_interns_tags(self):
+        """Test that explicit to_dict output matches asdict and that loaded tags are shared strings."""
+        from dataclasses import asdict
+        from game.memory import MemoryFact, StoryCard
+        fact = MemoryFact("The bridge is out.", tags=["road", "river"], fact_id=7)
+        self.assertEqual(fact.to_dict(), {"fact": "The bridge is out.", "relevance": 1.0, "last_accessed": fact.last_accessed,
+                                          "tags": ["road", "river"], "fact_id": 7})
+        self.assertIsNot(fact.to_dict()["tags"], fact.tags)
+        card = StoryCard("Bridge", "An old bridge.", triggers={"bridge": 1.0}, dependencies=["Road"])
+        self.assertEqual(card.to_dict(), asdict(StoryCard("Bridge", "An old bridge.", triggers={"bridge": 1.0},
+                                                          dependencies=["Road"], last_activated=card.last_activated)))
+        first = MemoryFact.from_dict({"fact": "a", "tags": ["".join(["ri", "ver"])]})
+        second = MemoryFact.from_dict({"fact": "b", "tags": ["".join(["riv", "er"])]})
+        self.assertIs(first.tags[0], second.tags[0])
+
+    def test_repeated_search_reuses_query_embedding(self):
+        """Test that searching the same query twice encodes it once and returns the same facts."""
+        from game.embedding_cache import EmbeddingCache
+        manager = MemoryManager(query_cache=EmbeddingCache())
+        manager.add_to_memory_bank("The lighthouse keeper hides a key.")
+        manager.add_to_memory_bank("Wolves gather at the northern pass.")
+        first = [f.fact for f, _ in manager.search_memory_bank("look around the lighthouse", k=1)]
+        second = [f.fact for f, _ in manager.search_memory_bank("look around the  lighthouse", k=1)]
+        self.assertEqual(first, second)
+        self.assertEqual((manager.query_cache.stats()["hits"], manager.query_cache.stats()["misses"]), (1, 1))
+
+    def test_knowledge_graph_survives_reload(self):
+        """Test that the compact graph is saved without fact text and still answers path queries."""
+        self.memory_manager.add_to_memory_bank("The sword is in the stone.", tags=["sword", "stone"])
+        self.memory_manager.add_to_memory_bank("The stone is in the forest.", tags=["stone", "forest"])
+        data = self.memory_manager.to_dict()
+        self.assertEqual(data["graph"]["format"], "csr")
+        loaded = MemoryManager.from_dict(data)
+        self.assertEqual(loaded.reason_about_facts("The sword is in the stone.", "The stone is in the forest."),
+                         ["The sword is in the stone.", "stone", "The stone is in the forest."])
+        loaded.prune_memories(fact_threshold=2.0, card_threshold=0.0)
+        self.assertEqual(loaded.graph.number_of_nodes(), 0)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
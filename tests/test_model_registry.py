@@ -0,0 +1,61 @@
+import unittest
+import threading
+from game.model_registry import ModelRegistry, registry
+from game.memory import MemoryManager
+
+class TestModelRegistry(unittest.TestCase):
+
+    def test_loader_runs_once_per_key(self):
+        """Test that a model is loaded once and then served from the cache."""
+        reg = ModelRegistry()
+        calls = []
+        def loader():
+            calls.append(1)
+            return object()
+
+        first = reg.get_or_load(("encoder", "tiny", None), loader)
+        second = reg.get_or_load(("encoder", "tiny", None), loader)
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(reg.is_loaded("encoder", "tiny"))
+
+    def test_concurrent_lookups_share_one_load(self):
+        """Test that threads racing on the same key wait for a single load."""
+        reg = ModelRegistry()
+        calls = []
+        started = threading.Event()
+        def loader():
+            calls.append(1)
+            started.wait(0.1)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(reg.get_or_load(("nlp", "slow", None), loader))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        started.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_evict(self):
+        """Test that evicting a model forces the next lookup to reload it."""
+        reg = ModelRegistry()
+        reg.get_or_load(("encoder", "a", None), object)
+        reg.get_or_load(("nlp", "b", None), object)
+        self.assertEqual(reg.evict(kind="encoder"), 1)
+        self.assertEqual(reg.loaded_models(), [("nlp", "b", None)])
+        self.assertEqual(reg.evict(), 1)
+        self.assertEqual(reg.loaded_models(), [])
+
+    def test_memory_managers_share_models(self):
+        """Test that every MemoryManager reuses the registry's models."""
+        first = MemoryManager()
+        second = MemoryManager.from_dict(first.to_dict())
+        self.assertIs(first.model, second.model)
+        self.assertIs(first.nlp, second.nlp)
+        self.assertTrue(registry.is_loaded("encoder", first.model_name))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+
+from game.rate_limits import BACKGROUND, FOREGROUND, RateLimiter, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refills_over_period(self):
+        """Test that a drained bucket refills at capacity per period."""
+        bucket = TokenBucket(60, 60.0, now=0.0)
+        bucket.take(60, now=0.0)
+        self.assertAlmostEqual(bucket.wait_time(10, now=0.0), 10.0)
+        self.assertEqual(bucket.wait_time(10, now=10.0), 0.0)
+
+    def test_oversized_request_leaves_debt(self):
+        """Test that a request larger than the bucket waits for a full bucket and delays the next one."""
+        bucket = TokenBucket(100, 10.0, now=0.0)
+        self.assertEqual(bucket.wait_time(250, now=0.0), 0.0)
+        bucket.take(250, now=0.0)
+        self.assertAlmostEqual(bucket.wait_time(1, now=0.0), 15.1)
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_charges_and_settles_tokens(self):
+        """Test that a call reserves its estimate and settle() corrects it to the reported usage."""
+        clock = FakeClock()
+        limiter = RateLimiter({"RPM": 10, "TPM": 1000, "RPD": 100}, clock=clock)
+        reservation = limiter.acquire(400)
+        self.assertEqual(limiter.stats()["available"], {"RPM": 9, "TPM": 600, "RPD": 99})
+        limiter.settle(reservation, 250)
+        self.assertEqual(limiter.stats()["available"]["TPM"], 750)
+        self.assertEqual(limiter.wait_estimate(800), 3.0)
+
+    def test_times_out_instead_of_failing_late(self):
+        """Test that a call that cannot fit within its timeout is refused and reported."""
+        limiter = RateLimiter({"RPM": 1}, periods={"RPM": 60.0})
+        self.assertIsNotNone(limiter.acquire(0))
+        waits = []
+        self.assertIsNone(limiter.acquire(0, timeout=0.05, on_wait=waits.append))
+        self.assertEqual(len(waits), 1)
+        self.assertGreater(waits[0], 50)
+        self.assertEqual(limiter.stats()["timeouts"], 1)
+
+    def test_foreground_goes_first(self):
+        """Test that queued calls are granted by priority, then arrival order."""
+        limiter = RateLimiter({"RPM": 1}, periods={"RPM": 0.2})
+        limiter.acquire(0)
+        order = []
+        def call(name, priority):
+            limiter.acquire(0, priority)
+            order.append(name)
+        threads = [threading.Thread(target=call, args=("background", BACKGROUND))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=call, args=("foreground", FOREGROUND)))
+        threads[1].start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, ["foreground", "background"])
+        self.assertEqual(limiter.stats()["throttled"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from utils.save_writer import SaveWriter
+
+class TestSaveWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.writer = SaveWriter()
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.directory)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        with open(self._path(name), "rb") as f:
+            return f.read()
+
+    def test_replace_is_atomic_and_leaves_no_temp_file(self):
+        """Test that a replace writes the whole file and cleans up its temp file."""
+        self.writer.replace(self._path("save.json"), b'{"turn": 1}')
+        self.assertTrue(self.writer.flush(5))
+        self.assertEqual(self._read("save.json"), b'{"turn": 1}')
+        self.assertEqual(os.listdir(self.directory), ["save.json"])
+
+    def test_bursts_are_coalesced(self):
+        """Test that queued writes to the same file collapse into the latest state."""
+        gate = threading.Event()
+        entered = threading.Event()
+        # Hold the writer thread on a first job so the burst queues up behind it.
+        original_write = self.writer._write
+        def slow_write(path, job):
+            entered.set()
+            gate.wait(5)
+            original_write(path, job)
+        self.writer._write = slow_write
+
+        self.writer.replace(self._path("blocker"), b"x")
+        self.assertTrue(entered.wait(5))
+        for turn in range(10):
+            self.writer.replace(self._path("save.json"), f"turn {turn}".encode())
+        self.writer.append(self._path("save.journal"), b"a\n")
+        self.writer.append(self._path("save.journal"), b"b\n")
+        gate.set()
+        self.assertTrue(self.writer.flush(5))
+
+        self.assertEqual(self._read("save.json"), b"turn 9")
+        self.assertEqual(self._read("save.journal"), b"a\nb\n")
+        stats = self.writer.stats()
+        self.assertEqual(stats["coalesced"], 10)
+        self.assertEqual(stats["writes"], 3)
+
+    def test_append_after_replace_extends_it(self):
+        """Test that appends queued behind a replace end up after its contents."""
+        self.writer.append(self._path("save.journal"), b"stale\n")
+        self.writer.flush(5)
+        self.writer.replace(self._path("save.journal"), b"header\n")
+        self.writer.append(self._path("save.journal"), b"record\n")
+        self.writer.flush(5)
+        self.assertEqual(self._read("save.journal"), b"header\nrecord\n")
+
+    def test_errors_are_reported(self):
+        """Test that a failed write is counted and surfaced instead of raising."""
+        self.writer.replace(os.path.join(self.directory, "missing", "save.json"), b"{}")
+        self.writer.flush(5)
+        self.assertEqual(self.writer.stats()["errors"], 1)
+        self.assertIsNotNone(self.writer.take_error())
+        self.assertIsNone(self.writer.take_error())
+
+if __name__ == '__main__':
+    unittest.main()
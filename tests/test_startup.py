@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+from game.lazy import LazyModule, is_loaded, lazy_import
+from utils.startup_profile import parse_importtime, parse_loaded, profile_imports
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestLazyImport(unittest.TestCase):
+    def test_imports_on_first_attribute(self):
+        """Test that a lazy module is only imported when one of its attributes is used."""
+        sys.modules.pop("colorsys", None)
+        colorsys = lazy_import("colorsys")
+        self.assertIsInstance(colorsys, LazyModule)
+        self.assertNotIn("colorsys", sys.modules)
+        self.assertFalse(is_loaded(colorsys))
+        self.assertEqual(colorsys.rgb_to_hsv(1, 0, 0), (0.0, 1.0, 1))
+        self.assertIn("colorsys", sys.modules)
+        self.assertTrue(is_loaded(colorsys))
+
+    def test_missing_module_fails_on_use(self):
+        """Test that a missing package only raises when it is actually used."""
+        missing = lazy_import("storyforge_no_such_module")
+        with self.assertRaises(ImportError):
+            missing.anything
+
+class TestStartupProfile(unittest.TestCase):
+    def test_parse_importtime(self):
+        """Test that -X importtime lines are parsed with their nesting depth."""
+        output = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       230 |        230 |   _io\n"
+                  "import time:       524 |       1322 | _frozen_importlib_external\n"
+                  "Some other stderr line\n")
+        timings = parse_importtime(output)
+        self.assertEqual([(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings],
+                         [("_io", 230, 230, 1), ("_frozen_importlib_external", 524, 1322, 0)])
+
+    def test_game_modules_defer_heavy_dependencies(self):
+        """Test that importing the story manager leaves the model and API libraries unimported."""
+        timings, seconds, loaded = profile_imports("game.story_manager", cwd=ROOT)
+        self.assertTrue(any(t.module == "game.story_manager" for t in timings))
+        self.assertEqual(loaded, [])
+        self.assertLess(seconds, 5.0)
+
+    def test_loaded_line_ignores_module_output(self):
+        """Test that only the probe's marked line counts, so a clean startup reports no heavy modules."""
+        self.assertEqual(parse_loaded("Starting main.py\nHEAVY:\n"), [])
+        self.assertEqual(parse_loaded("HEAVY:faiss,spacy\nsomething printed later\n"), ["faiss", "spacy"])
+
+    def test_main_defers_heavy_dependencies(self):
+        """Test that profiling main itself, which prints on import, reports no heavy modules."""
+        timings, seconds, loaded = profile_imports("main", cwd=ROOT)
+        self.assertTrue(any(t.module == "main" for t in timings))
+        self.assertEqual(loaded, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,4 +32,53 @@ class TestStoryManager(unittest.TestCase):
         ai_response = "You stumble out the door into the light. [LOCATION: village_square]"
         cleaned_text, commands = self.story_manager._parse_ai_response(ai_response)
         self.assertEqual(cleaned_text, "You stumble out the door into the light.")
-        self.assertEqual(commands['LOCATION'], "village_square")
\ No newline at end of file
+        self.assertEqual(commands['LOCATION'], "village_square")
+
+    def test_process_action_streams(self):
+        """Test that a streamed response reaches on_text without tags and commands arrive as they complete."""
+        chunks = [MagicMock(text=t) for t in ("The door creaks ", "open. [LOC", "ATION: village_square] You step out.")]
+        response = MagicMock()
+        response.__iter__.return_value = iter(chunks)
+        response.text = "".join(chunk.text for chunk in chunks)
+        del response.usage_metadata
+        self.story_manager.model.generate_content.return_value = response
+        shown, commands_seen = [], []
+        story_text, commands = self.story_manager.process_action("open the door", on_text=shown.append,
+                                                                 on_command=lambda key, value: commands_seen.append((key, value)))
+        self.assertTrue(self.story_manager.model.generate_content.call_args.kwargs["stream"])
+        self.assertEqual(shown, ["The door creaks ", "open. ", " You step out."])
+        self.assertEqual(commands_seen, [("LOCATION", "village_square")])
+        self.assertEqual(story_text, "The door creaks open.  You step out.")
+        self.assertEqual(commands, {"LOCATION": "village_square"})
+
+    def test_build_context_counts_tokens_locally(self):
+        """Test that building the context makes no count_tokens API calls."""
+        self.game_state.add_to_story("You wake up in the tavern.")
+        context = self.story_manager._build_context("look around")
+        self.assertIn("> look around", context)
+        self.story_manager.model.count_tokens.assert_not_called()
+
+    def test_build_context_uses_retrieval_budget(self):
+        """Test that only retrieved memories within budget reach the prompt, and drops are reported."""
+        memory = self.game_state.memory_manager
+        for i in range(60):
+            memory.add_to_memory_bank(f"Villager number {i} remembers " + "a long and winding tale about the harvest festival and the river spirits. " * 40)
+        context = self.story_manager._build_context("Ask about the harvest festival")
+        included = [fact.fact for fact in memory.memory_bank if fact.fact in context]
+        self.assertGreater(len(included), 0)
+        self.assertLess(len(included), 60)
+        self.assertTrue(self.story_manager.last_pack_report.dropped)
+
+    def test_build_context_includes_only_triggered_lore(self):
+        """Test that world info enters the prompt only when its triggers appear in the story or location."""
+        from game.world_db import WorldInfoEntry
+        world = self.game_state.world
+        world.add_world_info(WorldInfoEntry("Dragons", "Dragons sleep beneath the mountains.", triggers=["dragon"]))
+        world.add_world_info(WorldInfoEntry("Hearth", "Every hearth holds a household spirit.", triggers=["hearth"]))
+        world.add_world_info(WorldInfoEntry("Elves", "Elves never forget a debt.", triggers=["elf", "elves"]))
+        self.game_state.add_to_story("A traveller mentions a dragon.")
+        context = self.story_manager._build_context("listen")
+        self.assertIn("Dragons sleep beneath the mountains.", context)
+        # The tavern's description mentions its hearth.
+        self.assertIn("Every hearth holds a household spirit.", context)
+        self.assertNotIn("Elves never forget a debt.", context)
@@ -0,0 +1,44 @@
+import re
+import unittest
+
+from game.stream_parser import COMMAND_PATTERN, CommandStreamParser
+
+RESPONSE = ("The goblin [lunges] at you with a rusty blade! [HEALTH: -5] You spot a key [ITEM: +rusty_key,1] "
+            "glinting by the door. [CHECK: dex 12] Beyond it lies the square.[LOCATION: village_square]")
+
+def stream(parser, chunks):
+    text, commands = [], []
+    for chunk in chunks:
+        delta, completed = parser.feed(chunk)
+        text.append(delta)
+        commands.extend(completed)
+    delta, completed = parser.close()
+    return "".join(text + [delta]), commands + completed
+
+class TestCommandStreamParser(unittest.TestCase):
+
+    def test_matches_single_pass_for_any_chunking(self):
+        """Test that text and commands do not depend on where the stream is split."""
+        expected_text = re.sub(COMMAND_PATTERN, '', RESPONSE)
+        for size in (1, 2, 3, 7, 16, len(RESPONSE)):
+            parser = CommandStreamParser()
+            text, commands = stream(parser, [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)])
+            self.assertEqual(text, expected_text)
+            self.assertEqual(commands, [("HEALTH", "-5"), ("ITEM", "+rusty_key,1"), ("CHECK", ("DEX", 12)), ("LOCATION", "village_square")])
+            self.assertEqual(parser.text, RESPONSE)
+
+    def test_commands_complete_incrementally(self):
+        """Test that a command is reported by the chunk that closes it, and only held text waits for it."""
+        parser = CommandStreamParser()
+        self.assertEqual(parser.feed("You fall. [HEAL"), ("You fall. ", []))
+        self.assertEqual(parser.feed("TH: -3"), ("", []))
+        self.assertEqual(parser.feed("] Ouch."), (" Ouch.", [("HEALTH", "-3")]))
+
+    def test_unfinished_tag_is_released_as_text(self):
+        """Test that an opening bracket that never closes is shown once the stream ends."""
+        parser = CommandStreamParser()
+        self.assertEqual(parser.feed("A sign reads [ITEM"), ("A sign reads ", []))
+        self.assertEqual(parser.close(), ("[ITEM", []))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from game.tokens import TokenCounter
+from game.lru_cache import LRUCache
+
+class TestTokenCounter(unittest.TestCase):
+
+    def test_estimates_are_cached_by_content(self):
+        """Test that counting the same fragment twice hits the cache."""
+        counter = TokenCounter()
+        first = counter.count("The innkeeper slides a frothy mug across the bar.")
+        second = counter.count("The innkeeper slides a frothy mug across the bar.")
+        self.assertEqual(first, second)
+        self.assertEqual(counter.cache.hits, 1)
+        self.assertEqual(counter.cache.misses, 1)
+
+    def test_estimate_scales_with_length(self):
+        """Test that longer text is estimated as more tokens."""
+        counter = TokenCounter()
+        self.assertEqual(counter.count(""), 0)
+        short = counter.count("A goblin appears.")
+        self.assertGreater(counter.count("A goblin appears. " * 10), short * 9)
+
+    def test_calibration_tracks_real_counts(self):
+        """Test that real usage counts pull the estimates toward them."""
+        counter = TokenCounter()
+        text = "You walk into the village square, where merchants hawk their wares."
+        actual = int(counter.raw_count(text) * 1.3)
+        counter.calibrate(text, actual)
+        self.assertEqual(counter.count(text), actual)
+        counter.calibrate(text, actual)
+        self.assertEqual(counter.samples, 2)
+        self.assertAlmostEqual(counter.ratio, actual / counter.raw_count(text))
+
+    def test_calibration_ignores_missing_counts(self):
+        """Test that empty usage metadata does not disturb the ratio."""
+        counter = TokenCounter()
+        counter.calibrate("Some text.", 0)
+        self.assertEqual(counter.ratio, 1.0)
+        self.assertEqual(counter.samples, 0)
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted first."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import random
+from thefuzz import fuzz
+from game.trigger_index import TriggerIndex
+
+class TestTriggerIndex(unittest.TestCase):
+
+    def test_filters_unrelated_triggers(self):
+        """Test that triggers sharing too few character pairs with the text are ruled out."""
+        index = TriggerIndex(threshold=90)
+        for trigger in ["haunted mansion", "silver dragon", "oakhaven"]:
+            index.add(trigger)
+        candidates = index.candidates("you see a haunted mansoin on the hill")
+        self.assertIn("haunted mansion", candidates)
+        self.assertNotIn("silver dragon", candidates)
+        self.assertNotIn("oakhaven", candidates)
+
+    def test_match_agrees_with_thefuzz(self):
+        """Test that batched matching gives exactly the thefuzz partial_ratio decisions."""
+        rng = random.Random(11)
+        alphabet = "abcdefgh "
+        triggers = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12))) for _ in range(100)]
+        for threshold in (70, 80, 95):
+            index = TriggerIndex(threshold)
+            for trigger in triggers[:50]:
+                index.add(trigger)
+            for _ in range(30):
+                text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+                expected = {t for t in triggers if fuzz.partial_ratio(t, text) >= threshold}
+                self.assertEqual(index.match(text, triggers), expected)
+
+    def test_short_triggers_are_always_candidates(self):
+        """Test that triggers too short to filter safely are passed through."""
+        index = TriggerIndex(threshold=80)
+        index.add("key")
+        self.assertIn("key", index.candidates("nothing to see here"))
+
+    def test_matches_full_scan(self):
+        """Test that the prefilter never drops a trigger the fuzzy scorer would accept."""
+        rng = random.Random(7)
+        alphabet = "abcdefgh "
+        triggers = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 14))) for _ in range(150)]
+        for threshold in (60, 80, 90, 100):
+            index = TriggerIndex(threshold)
+            for trigger in triggers:
+                index.add(trigger)
+            for _ in range(100):
+                text = " ".join(rng.choice(triggers) for _ in range(rng.randint(0, 4)))
+                text += "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+                candidates = index.candidates(text)
+                for trigger in triggers:
+                    if fuzz.partial_ratio(trigger, text) >= threshold:
+                        self.assertIn(trigger, candidates, (threshold, trigger, text))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+import numpy as np
+from game.vector_index import IndexConfig, VectorIndex
+
+def _vectors(n, dim=32, seed=0):
+    # Clustered like real sentence embeddings, which IVF relies on.
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(42).standard_normal((40, dim))
+    vectors = (centers[rng.integers(0, 40, n)] + 0.3 * rng.standard_normal((n, dim))).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+class TestVectorIndex(unittest.TestCase):
+
+    def test_small_banks_use_exact_search(self):
+        """Test that an approximate kind still searches exactly below promote_at."""
+        index = VectorIndex(32, IndexConfig(kind="hnsw", promote_at=1000))
+        index.add(_vectors(200), np.arange(200))
+        _, positions = index.search(_vectors(1, seed=1), 5)
+        self.assertEqual(index.kind, "flat")
+        self.assertEqual(len(positions[0]), 5)
+
+    def test_promotion_keeps_recall(self):
+        """Test that each approximate backend takes over at promote_at and finds the true neighbours."""
+        data, queries = _vectors(4000), _vectors(50, seed=1)
+        exact = VectorIndex(32, IndexConfig(kind="flat"))
+        exact.add(data, np.arange(len(data)))
+        _, truth = exact.search(queries, 10)
+        for kind in ("hnsw", "ivf_flat", "ivf_pq", "auto"):
+            index = VectorIndex(32, IndexConfig(kind=kind, promote_at=2000, nprobe=8, pq_m=8))
+            index.add(data, np.arange(len(data)))
+            _, found = index.search(queries, 10)
+            self.assertEqual(index.kind, "hnsw" if kind == "auto" else kind)
+            recall = np.mean([len(set(f) & set(t)) / 10 for f, t in zip(found, truth)])
+            self.assertGreater(recall, 0.5 if kind == "ivf_pq" else 0.8, kind)
+
+    def test_removed_ids_are_tombstoned_then_compacted(self):
+        """Test that removed ids disappear from searches at once and are purged in a batch later."""
+        data = _vectors(3000)
+        index = VectorIndex(32, IndexConfig(kind="hnsw", promote_at=1000, compact_at=0.1))
+        index.add(data, np.arange(3000) * 10)
+        index.search(data[:1], 1)
+        index.remove([110, 120])
+        self.assertEqual((index.ntotal, index.tombstones), (2998, 2))
+        _, ids = index.search(data[11:12], 5)
+        self.assertNotIn(110, ids[0])
+        self.assertEqual(index.kind, "hnsw")
+        index.remove(np.arange(0, 3000, 2) * 10)
+        self.assertEqual(index.tombstones, 0)
+        self.assertEqual(index.ntotal, 1499)
+        np.testing.assert_array_equal(index.reconstruct(130), data[13])
+        # A removed id can come back, e.g. when a delete is undone.
+        index.add(data[11:12], np.array([110]))
+        self.assertEqual(index.search(data[11:12], 1)[1][0][0], 110)
+
+    def test_serialize_and_restore(self):
+        """Test that a promoted index is saved and restored without being rebuilt."""
+        data = _vectors(3000)
+        config = IndexConfig(kind="ivf_flat", promote_at=1000)
+        index = VectorIndex(32, config)
+        index.add(data, np.arange(3000))
+        index.search(data[:1], 1)
+        restored = VectorIndex.restore(32, config, np.arange(3000), index.serialize(), data)
+        self.assertEqual(restored.kind, "ivf_flat")
+        np.testing.assert_array_equal(restored.search(data[:5], 3)[1], index.search(data[:5], 3)[1])
+        self.assertIsNone(VectorIndex.restore(32, config, np.arange(3000), None, data[:10]))
+
+    def test_id_restricted_search_is_exact(self):
+        """Test that searches limited to a subset of ids return its true nearest members."""
+        data, queries = _vectors(3000), _vectors(20, seed=1)
+        index = VectorIndex(32, IndexConfig(kind="hnsw", promote_at=1000))
+        index.add(data, np.arange(3000))
+        for subset in (np.arange(0, 3000, 97), np.arange(0, 3000, 3)):
+            subset_vectors = data[subset]
+            truth = np.argsort(((queries[:, None, :] - subset_vectors[None]) ** 2).sum(-1), axis=1)[:, :5]
+            _, found = index.search(queries, 5, ids=subset)
+            self.assertTrue(set(found.ravel()) <= set(subset.tolist()))
+            recall = np.mean([len(set(f) & set(subset[t])) / 5 for f, t in zip(found, truth)])
+            self.assertGreater(recall, 0.95 if len(subset) < 300 else 0.8)
+        _, found = index.search(queries[:1], 5, ids=np.array([4, 8]))
+        self.assertEqual(sorted(found[0][:2]), [4, 8])
+        self.assertEqual(list(found[0][2:]), [-1, -1, -1])
+
+    def test_quantized_storage_reranks_with_restored_vectors(self):
+        """Test that a quantized store shrinks at promote_at and re-ranks against exact sidecar vectors."""
+        data, queries = _vectors(3000), _vectors(30, seed=1)
+        exact = VectorIndex(32, IndexConfig(kind="flat"))
+        exact.add(data, np.arange(3000))
+        _, truth = exact.search(queries, 5)
+        config = IndexConfig(kind="flat", storage="pq", pq_m=16, pq_bits=6, promote_at=1000)
+        index = VectorIndex(32, config)
+        index.add(data, np.arange(3000))
+        _, lossy = index.search(queries, 5)
+        self.assertEqual(index.storage, "pq")
+        restored = VectorIndex.restore(32, config, np.arange(3000), index.serialize(), data.astype(np.float16))
+        self.assertEqual(restored.storage, "pq")
+        _, reranked = restored.search(queries, 5)
+        recall = lambda found: np.mean([len(set(f) & set(t)) / 5 for f, t in zip(found, truth)])
+        self.assertGreater(recall(reranked), recall(lossy))
+        self.assertGreater(recall(reranked), 0.9)
+        np.testing.assert_allclose(restored.reconstruct(7), data[7], atol=1e-3)
+        with self.assertRaises(ValueError):
+            IndexConfig(storage="int4")
+
+    def test_ivf_pq_reranks_from_float32_store(self):
+        """Test that IVF-PQ results are re-scored with the exact vectors of a float32 store."""
+        data, queries = _vectors(4000), _vectors(50, seed=1)
+        exact = VectorIndex(32, IndexConfig(kind="flat"))
+        exact.add(data, np.arange(4000))
+        distances, truth = exact.search(queries, 10)
+        index = VectorIndex(32, IndexConfig(kind="ivf_pq", promote_at=2000, nprobe=8, pq_m=8))
+        index.add(data, np.arange(4000))
+        found_distances, found = index.search(queries, 10)
+        recall = np.mean([len(set(f) & set(t)) / 10 for f, t in zip(found, truth)])
+        self.assertGreater(recall, 0.8)
+        np.testing.assert_allclose(found_distances[:, 0], distances[:, 0], rtol=1e-4, atol=1e-5)
+
+    def test_hnsw_purge_filters_dead_entries_without_rebuilding(self):
+        """Test that purging from an HNSW graph neither rebuilds it in search() nor in serialize()."""
+        data = _vectors(3000)
+        config = IndexConfig(kind="hnsw", promote_at=1000)
+        index = VectorIndex(32, config)
+        index.add(data, np.arange(3000))
+        index.search(data[:1], 1)
+        graph = index._ann
+        index.remove(range(0, 300))
+        index.compact()
+        # Re-added with another vector, so the graph's copy of it is stale.
+        index.add(data[2000:2001], np.array([5]))
+        found = index.search(data[:300], 1)[1][:, 0]
+        self.assertFalse(np.isin(found, np.arange(300)[np.arange(300) != 5]).any())
+        self.assertEqual(index.search(data[2000:2001], 2)[1][0].tolist()[:2], [2000, 5])
+        self.assertEqual(index.search(data[2000:2001], 1, ids=np.arange(5, 1500))[1][0][0], 5)
+        self.assertIs(index._ann, graph)
+        saved = index.serialize()
+        self.assertIs(index._ann, graph)
+        self.assertEqual(index.stats()["dead_graph_entries"], 300)
+
+        ids = np.concatenate([[5], np.arange(300, 3000)])
+        vectors = np.vstack([data[2000:2001], data[300:]])
+        restored = VectorIndex.restore(32, config, ids, saved, vectors)
+        self.assertEqual(restored.kind, "hnsw")
+        np.testing.assert_array_equal(restored.search(data[:50], 3)[1], index.search(data[:50], 3)[1])
+
+    def test_hnsw_rebuilds_in_background(self):
+        """Test that a graph with too many dead entries is replaced off-thread and kept in sync."""
+        data = _vectors(3000)
+        index = VectorIndex(32, IndexConfig(kind="hnsw", promote_at=1000, compact_at=0.1))
+        index.add(data[:2000], np.arange(2000))
+        index.search(data[:1], 1)
+        graph = index._ann
+        index.remove(range(0, 500))
+        index.compact()
+        index.search(data[:1], 1)
+        self.assertIs(index._ann, graph)
+        self.assertTrue(index.stats()["rebuilding"])
+        # Changes made while the replacement is being built are replayed onto it.
+        index.add(data[2000:], np.arange(2000, 3000))
+        index.remove(range(500, 600))
+        index.compact()
+        index._rebuild[0].result(timeout=30)
+        found = index.search(data[:700], 1)[1][:, 0]
+        self.assertIsNot(index._ann, graph)
+        self.assertEqual(index.stats()["dead_graph_entries"], 100)
+        self.assertFalse(np.isin(found, np.arange(600)).any())
+        self.assertEqual(index.search(data[2500:2501], 1)[1][0][0], 2500)
+
+    def test_ivf_retrains_in_background(self):
+        """Test that an IVF index that doubles keeps answering while its retrained replacement is built."""
+        data = _vectors(5000)
+        index = VectorIndex(32, IndexConfig(kind="ivf_flat", promote_at=1000, nprobe=16))
+        index.add(data[:2000], np.arange(2000))
+        index.search(data[:1], 1)
+        first = index._ann
+        index.add(data[2000:], np.arange(2000, 5000))
+        self.assertEqual(index.search(data[4000:4001], 1)[1][0][0], 4000)
+        self.assertIs(index._ann, first)
+        self.assertTrue(index.stats()["rebuilding"])
+        index.add(data[:1] + 1.0, np.array([5000]))
+        index._rebuild[0].result(timeout=30)
+        self.assertEqual(index.search(data[:1] + 1.0, 1)[1][0][0], 5000)
+        self.assertIsNot(index._ann, first)
+        self.assertEqual(index._ann.ntotal, 5001)
+        self.assertFalse(index.stats()["rebuilding"])
+
+    def test_ivf_pq_small_banks(self):
+        """Test that IVF-PQ refuses a promote_at too small to train on and builds with fewer bits if it shrinks."""
+        with self.assertRaises(ValueError):
+            IndexConfig(kind="ivf_pq", promote_at=100)
+        data = _vectors(300)
+        index = VectorIndex(32, IndexConfig(kind="ivf_pq", promote_at=256))
+        index.add(data, np.arange(300))
+        self.assertEqual(index.search(data[7:8], 1)[1][0][0], 7)
+        self.assertEqual(index.kind, "ivf_pq")
+        small = index._build("ivf_pq", "pq", data[:150], np.arange(150))
+        self.assertEqual(small.search(data[7:8], 1)[1][0][0], 7)
+
+    def test_pq_storage_small_banks(self):
+        """Test that PQ storage refuses a promote_at too small to train on and encodes a shrunken bank with fewer bits."""
+        with self.assertRaises(ValueError):
+            IndexConfig(storage="pq", promote_at=100)
+        data = _vectors(300)
+        index = VectorIndex(32, IndexConfig(kind="flat", storage="pq", promote_at=256))
+        index.add(data, np.arange(300))
+        self.assertEqual(index.search(data[7:8], 1)[1][0][0], 7)
+        self.assertEqual(index.storage, "pq")
+        store = index._make_store("pq", data[:150], np.arange(150))
+        self.assertEqual(store.ntotal, 150)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from game.memory import MemoryManager
+from game.warmup import Warmup
+
+class TestWarmup(unittest.TestCase):
+
+    def test_loads_models_in_background(self):
+        """Test that the encoder and spaCy load off-thread and the encoder sees the default world's text."""
+        encoder, nlp = MagicMock(), MagicMock()
+        with patch("game.warmup.get_encoder", return_value=encoder), patch("game.warmup.get_nlp", return_value=nlp), \
+             patch.dict(os.environ, {"GEMINI_API_KEY": ""}):
+            warmup = Warmup(entities=False).start()
+            self.assertIs(warmup.result("encoder", timeout=5), encoder)
+            self.assertIs(warmup.result("nlp", timeout=5), nlp)
+        self.assertIsNone(warmup.result("llm"))
+        self.assertTrue(warmup.done())
+        texts = encoder.encode.call_args[0][0]
+        self.assertTrue(any("tavern" in text for text in texts))
+        self.assertEqual(set(warmup.stats()["seconds"]), {"encoder", "nlp"})
+
+    def test_failed_task_is_recorded(self):
+        """Test that a load failure is kept in stats() instead of raising."""
+        with patch("game.warmup.get_encoder", side_effect=OSError("no such model")), patch("game.warmup.get_nlp"), \
+             patch.dict(os.environ, {"GEMINI_API_KEY": ""}):
+            warmup = Warmup(entities=False).start()
+            self.assertIsNone(warmup.result("encoder", timeout=5))
+        self.assertEqual(warmup.stats()["errors"], {"encoder": "no such model"})
+
+    def test_world_is_handed_out_once(self):
+        """Test that the prepared world goes to one game state and later callers get a fresh one."""
+        with patch("game.warmup.get_encoder"), patch("game.warmup.get_nlp"), patch.dict(os.environ, {"GEMINI_API_KEY": ""}):
+            warmup = Warmup(entities=False).start()
+        first, second = warmup.take_world(), warmup.take_world()
+        self.assertIsNot(first, second)
+        self.assertEqual(first.name, second.name)
+
+    def test_memory_manager_defers_models(self):
+        """Test that building a MemoryManager does not wait for models, only using them does."""
+        encoder = MagicMock()
+        with patch("game.memory.get_encoder", return_value=encoder) as get_encoder, patch("game.memory.get_nlp") as get_nlp:
+            memory_manager = MemoryManager(extract_entities=False)
+            get_encoder.assert_not_called()
+            get_nlp.assert_not_called()
+            self.assertIs(memory_manager.model, encoder)
+            self.assertIs(memory_manager.model, encoder)
+        get_encoder.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
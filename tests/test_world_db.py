@@ -0,0 +1,40 @@
+import unittest
+from game.world_db import World, WorldInfoEntry
+
+class TestWorldInfo(unittest.TestCase):
+
+    def setUp(self):
+        self.world = World(name="Aethelgard", genre="High Fantasy", description="A test world.")
+        self.world.add_world_info(WorldInfoEntry("Dragons", "Dragons sleep beneath the Ashen Peaks.", triggers=["dragon", "Ashen Peaks"]))
+        self.world.add_world_info(WorldInfoEntry("Guild", "The Thieves' Guild runs the docks.", triggers=["thieves guild"]))
+        self.world.add_world_info(WorldInfoEntry("Calendar", "A year has thirteen moons."))
+
+    def test_only_triggered_entries_are_found(self):
+        """Test that entries are found by whole-word, case-insensitive triggers."""
+        names = [wi.name for wi in self.world.find_world_info("A DRAGON circles overhead.")]
+        self.assertEqual(names, ["Dragons", "Calendar"])
+        names = [wi.name for wi in self.world.find_world_info("The dragonfly lands on the dock.")]
+        self.assertEqual(names, ["Calendar"])
+
+    def test_phrase_triggers_match_across_punctuation(self):
+        """Test that multi-word triggers match the same words with different punctuation."""
+        names = [wi.name for wi in self.world.find_world_info("You meet the Thieves' Guild at the ashen peaks.")]
+        self.assertEqual(names, ["Dragons", "Guild", "Calendar"])
+
+    def test_index_follows_list_changes(self):
+        """Test that entries appended directly to world_info, or edited and reindexed, are picked up."""
+        self.world.world_info.append(WorldInfoEntry("Moons", "Two moons light the night.", triggers=["moon"]))
+        self.assertIn("Moons", [wi.name for wi in self.world.find_world_info("the moon rises")])
+        self.world.world_info[0].triggers = ["wyrm"]
+        self.world.reindex_world_info()
+        self.assertIn("Dragons", [wi.name for wi in self.world.find_world_info("a wyrm!")])
+        self.assertNotIn("Dragons", [wi.name for wi in self.world.find_world_info("a dragon!")])
+
+    def test_round_trip_keeps_triggers(self):
+        """Test that a world loaded from a save finds the same entries."""
+        loaded = World.from_dict(self.world.to_dict())
+        self.assertEqual([wi.name for wi in loaded.find_world_info("guild of thieves, thieves guild")],
+                         ["Guild", "Calendar"])
+
+if __name__ == '__main__':
+    unittest.main()
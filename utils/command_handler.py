@@ -1,6 +1,7 @@
 import shlex
 from utils.display import print_info, print_error, print_story, print_location, prompt_input, print_responsibility_warning
 from game.safety import VALID_LEVELS
+from game.rate_limits import get_rate_limiter
 import utils.file_handler as file_handler
 
 def handle_command(user_action, game_state, story_manager, last_player_action):
@@ -106,6 +107,17 @@ def handle_command(user_action, game_state, story_manager, last_player_action):
                 fact = parts[2]
                 game_state.memory_manager.add_to_memory_bank(fact)
                 print_info(f"Noted: '{fact}'")
+            elif sub_cmd == 'import' and len(parts) > 2:
+                # Keep the path's original case.
+                path = user_action.split(' ', 2)[2].strip()
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        facts = [line.strip() for line in f if line.strip()]
+                except OSError as e:
+                    print_error(f"Could not read {path}: {e}")
+                else:
+                    report = game_state.memory_manager.add_many(facts)
+                    print_info(f"Imported {path}: {report.summary()}")
             elif sub_cmd == 'show':
                 print_info("\n--- Memory Bank ---")
                 if game_state.memory_manager.memory_bank:
@@ -115,9 +127,9 @@ def handle_command(user_action, game_state, story_manager, last_player_action):
                     print("The memory bank is empty.")
                 print_info("-------------------")
             else:
-                print_error("Usage: /memory [add <fact>|show]")
+                print_error("Usage: /memory [add <fact>|import <file>|show]")
         else:
-            print_error("Usage: /memory [add <fact>|show]")
+            print_error("Usage: /memory [add <fact>|import <file>|show]")
         return True, last_player_action
 
     elif action_lower.startswith('card '):
@@ -171,6 +183,13 @@ def handle_command(user_action, game_state, story_manager, last_player_action):
         print_info(f"Total API Calls: {game_state.api_calls}")
         print_info(f"Total Input Tokens: {game_state.total_input_tokens}")
         print_info(f"Total Output Tokens: {game_state.total_output_tokens}")
+        save_stats = file_handler.save_stats()
+        print_info(f"Background Saves: {save_stats['writes']} written, {save_stats['coalesced']} coalesced, {save_stats['errors']} failed")
+        print_info(f"Save Latency: last {save_stats['last_latency_ms']:.1f} ms, avg {save_stats['avg_latency_ms']:.1f} ms, max {save_stats['max_latency_ms']:.1f} ms")
+        query_stats = game_state.memory_manager.query_cache.stats()
+        print_info(f"Query Embedding Cache: {query_stats['hits']} hits, {query_stats['misses']} misses ({query_stats['hit_rate']:.0%}), {query_stats['size']}/{query_stats['maxsize']} cached")
+        limiter_stats = get_rate_limiter(game_state.api_tier).stats()
+        print_info(f"Rate Limiter ({game_state.api_tier}): {limiter_stats['requests']} calls, {limiter_stats['throttled']} queued, {limiter_stats['seconds_waited']:.1f}s waited, {limiter_stats['timeouts']} timed out")
         print_info("----------------------------")
         return True, last_player_action
 
@@ -1,4 +1,5 @@
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
 from rich.prompt import Prompt
@@ -12,6 +13,34 @@ def print_story(text: str):
     """Prints the main story text in a standard color, with markdown support."""
     console.print(Panel(Markdown(text), title="Story", style="bold white", border_style="bright_white"))
 
+class StoryStream:
+    """
+    A story panel that fills in while the response streams, redrawn at most
+    refresh_per_second times. Use it as a context manager; finish() replaces the
+    streamed text with the final version before the panel is left on screen.
+    """
+    def __init__(self, refresh_per_second: int = 12):
+        self.text = ""
+        self.live = Live(self._render(), console=console, refresh_per_second=refresh_per_second, transient=False)
+
+    def _render(self):
+        return Panel(Markdown(self.text.strip() or "..."), title="Story", style="bold white", border_style="bright_white")
+
+    def write(self, text: str):
+        self.text += text
+        self.live.update(self._render())
+
+    def finish(self, text: str):
+        self.text = text
+        self.live.update(self._render(), refresh=True)
+
+    def __enter__(self) -> "StoryStream":
+        self.live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.live.stop()
+
 def print_info(text: str):
     """Prints informational text (e.g., save confirmations, help) in a bright color."""
     console.print(Text(text, style="bright_white"))
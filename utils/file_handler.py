@@ -1,32 +1,187 @@
 import os
+import io
 import json
+import uuid
+import atexit
+import numpy as np
 from game.game_state import GameState
 from .display import print_info, print_error
+from .save_writer import SaveWriter
 
 SAVE_DIRECTORY = "saves"
+# Number of journal records appended before the journal is folded into a new base save.
+JOURNAL_COMPACT_EVERY = 50
 
-def save_game(game_state: GameState, filename: str):
-    """Saves the entire GameState object to a file using JSON."""
+# Per-save journal bookkeeping: filename -> {"owner": GameState, "records": int}
+_journals = {}
+
+# All save I/O goes through one background writer so the turn loop never waits on disk.
+_writer = SaveWriter()
+atexit.register(_writer.close)
+
+def _journal_path(filename: str) -> str:
+    return os.path.join(SAVE_DIRECTORY, f"{filename}.journal")
+
+def _sidecar_paths(filename: str):
+    """Returns the paths of the binary vector sidecar files that accompany a save."""
+    base = os.path.join(SAVE_DIRECTORY, filename)
+    return f"{base}.vectors.npy", f"{base}.faiss"
+
+def _capture_vector_sidecar(game_state: GameState, filename: str):
+    """
+    Captures the memory bank's embeddings and FAISS index as bytes and queues them for writing.
+    Returns the metadata to store in the JSON file, or None if there is nothing to write.
+    """
+    embeddings_path, index_path = _sidecar_paths(filename)
+    exported = game_state.memory_manager.export_vectors()
+    if exported is None:
+        for path in (embeddings_path, index_path):
+            _writer.delete(path)
+        return None
+    meta, embeddings, index_bytes = exported
+    buffer = io.BytesIO()
+    np.save(buffer, embeddings)
+    _writer.replace(embeddings_path, buffer.getvalue())
+    _writer.replace(index_path, index_bytes.tobytes())
+    return meta
+
+def _read_vector_sidecar(meta, filename: str):
+    """Memory-maps the vector sidecar for a save. Returns None if it is missing."""
+    if not meta:
+        return None
+    embeddings_path, index_path = _sidecar_paths(filename)
+    embeddings = np.load(embeddings_path, mmap_mode="r") if os.path.exists(embeddings_path) else None
+    index_bytes = np.memmap(index_path, dtype="uint8", mode="r") if os.path.exists(index_path) else None
+    if embeddings is None and index_bytes is None:
+        return None
+    return meta, index_bytes, embeddings
+
+def _queue_base(game_state: GameState, filename: str, journal_id=None):
+    """
+    Captures the full JSON save and its vector sidecar and queues them for writing.
+    The sidecar is queued first, so the JSON never points at vectors that are not on disk.
+    """
     if not os.path.exists(SAVE_DIRECTORY):
         os.makedirs(SAVE_DIRECTORY)
-        
+
     filepath = os.path.join(SAVE_DIRECTORY, f"{filename}.json")
+    data = game_state.to_dict()
+    data["vector_sidecar"] = _capture_vector_sidecar(game_state, filename)
+    data["journal_id"] = journal_id
+    _writer.replace(filepath, json.dumps(data, indent=4).encode("utf-8"))
+    return filepath
+
+def _report_write_error() -> bool:
+    """Surfaces a failed background write on the main thread. Returns True if there was one."""
+    error = _writer.take_error()
+    if error:
+        print_error(f"\nError saving game: {error}")
+        return True
+    return False
+
+def save_game(game_state: GameState, filename: str):
+    """Saves the entire GameState object to a file using JSON, plus a binary vector sidecar."""
     try:
-        with open(filepath, "w") as f:
-            json.dump(game_state.to_dict(), f, indent=4)
+        filepath = _queue_base(game_state, filename)
+        # A full save supersedes any journal left for this name.
+        _journals.pop(filename, None)
+        _writer.delete(_journal_path(filename))
+        # An explicit save waits for the disk so the confirmation is truthful.
+        _writer.flush()
+        if _report_write_error():
+            return False
         print_info(f"\nGame saved successfully to {filepath}")
         return True
     except Exception as e:
         print_error(f"\nError saving game: {e}")
         return False
 
+def autosave(game_state: GameState, filename: str = "autosave"):
+    """
+    Persists the latest turn without waiting on disk. Usually this only appends the
+    turn's changes to <filename>.journal, so its cost does not grow with the campaign.
+    Besides the undoable changes, each record carries the relevance boosts from
+    retrieval and card activation and the entities merged into the graph that turn.
+    The journal is compacted into a fresh base save every JOURNAL_COMPACT_EVERY
+    records, and whenever a different GameState starts saving under this name.
+    """
+    if _report_write_error():
+        # The journal on disk may be missing records; start over from a full base.
+        _journals.pop(filename, None)
+    journal = _journals.get(filename)
+    if journal is None or journal["owner"] is not game_state or journal["records"] >= JOURNAL_COMPACT_EVERY:
+        return _compact_journal(game_state, filename)
+
+    records = game_state.drain_journal()
+    if not records:
+        return True
+    try:
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        _writer.append(_journal_path(filename), data.encode("utf-8"))
+        journal["records"] += len(records)
+        return True
+    except Exception as e:
+        print_error(f"\nError writing autosave journal: {e}")
+        return False
+
+def _compact_journal(game_state: GameState, filename: str):
+    """Queues a new base save and an empty journal that belongs to it."""
+    journal_id = uuid.uuid4().hex
+    # Everything recorded so far is part of the new base.
+    game_state.enable_journal()
+    try:
+        _queue_base(game_state, filename, journal_id)
+        # The header ties the journal to its base, so a crash between the two writes
+        # can never replay records that the base already contains.
+        _writer.replace(_journal_path(filename), (json.dumps({"base": journal_id}) + "\n").encode("utf-8"))
+        _journals[filename] = {"owner": game_state, "records": 0}
+        return True
+    except Exception as e:
+        _journals.pop(filename, None)
+        print_error(f"\nError saving game: {e}")
+        return False
+
+def flush_saves(timeout=None) -> bool:
+    """Waits for queued saves to reach the disk. Call before quitting."""
+    flushed = _writer.flush(timeout)
+    _report_write_error()
+    return flushed
+
+def save_stats():
+    """Returns the background writer's counters and save latencies."""
+    return _writer.stats()
+
+def _replay_journal(game_state: GameState, filename: str, journal_id) -> int:
+    """Applies the journal that belongs to the loaded base. Returns the number of records replayed."""
+    path = _journal_path(filename)
+    if not journal_id or not os.path.exists(path):
+        return 0
+    with open(path, "r") as f:
+        lines = f.read().splitlines()
+    if not lines or json.loads(lines[0]).get("base") != journal_id:
+        return 0
+    replayed = 0
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A torn final line from an interrupted append; everything before it is intact.
+            break
+        game_state.apply_journal_record(record)
+        replayed += 1
+    return replayed
+
 def load_game(filename: str):
-    """Loads a GameState object from a file. Returns GameState or None."""
+    """Loads a GameState object from a file, replaying its journal if it has one. Returns GameState or None."""
     filepath = os.path.join(SAVE_DIRECTORY, f"{filename}.json")
+    # Make sure queued writes for this save have landed before reading it back.
+    _writer.flush()
     try:
         with open(filepath, "r") as f:
             data = json.load(f)
-            game_state = GameState.from_dict(data)
+        vectors = _read_vector_sidecar(data.get("vector_sidecar"), filename)
+        game_state = GameState.from_dict(data, vectors=vectors)
+        _replay_journal(game_state, filename, data.get("journal_id"))
         print_info(f"\nGame loaded successfully from {filepath}")
         return game_state
     except FileNotFoundError:
@@ -40,7 +195,7 @@ def list_save_files():
     """Lists all available save files."""
     if not os.path.exists(SAVE_DIRECTORY):
         return []
-    
+
     files = os.listdir(SAVE_DIRECTORY)
     save_files = [f.replace(".json", "") for f in files if f.endswith(".json")]
     return save_files
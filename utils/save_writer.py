@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+class _WriteJob:
+    def __init__(self, mode: str, data: bytes, submitted: float):
+        self.mode = mode  # "replace", "append" or "delete"
+        self.data = data
+        self.submitted = submitted
+
+def _fsync_directory(path: str):
+    """Makes a rename durable by syncing the containing directory (a no-op where unsupported)."""
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_atomic(path: str, data: bytes):
+    """Replaces path with data so readers only ever see the old or the new contents."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(path)
+
+def append_durable(path: str, data: bytes):
+    """Appends data to path and waits until it reaches the disk."""
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+class SaveWriter:
+    """
+    Writes save files on a dedicated background thread.
+    Callers hand over immutable byte captures and return immediately. Bursts of
+    writes to the same file are coalesced: a replace supersedes anything pending for
+    that path, and consecutive appends are merged into one write. Files are written
+    in the order they were (last) submitted, so a base save always lands before the
+    journal that extends it.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: Dict[str, _WriteJob] = {}
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.writes = 0
+        self.bytes_written = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+            self._thread.start()
+
+    def _submit(self, path: str, mode: str, data: bytes):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SaveWriter is closed")
+            now = time.perf_counter()
+            pending = self._pending.get(path)
+            if pending is not None and mode == "append" and pending.mode in ("append", "replace"):
+                # Extend the pending write in place; it keeps its position in the queue.
+                pending.data += data
+                self.coalesced += 1
+            else:
+                if pending is not None:
+                    if pending.mode == "delete" and mode == "append":
+                        mode = "replace"
+                    del self._pending[path]
+                    self.coalesced += 1
+                    now = pending.submitted
+                self._pending[path] = _WriteJob(mode, data, now)
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def replace(self, path: str, data: bytes):
+        """Queues an atomic whole-file write."""
+        self._submit(path, "replace", data)
+
+    def append(self, path: str, data: bytes):
+        """Queues an append to path."""
+        self._submit(path, "append", data)
+
+    def delete(self, path: str):
+        """Queues the removal of path."""
+        self._submit(path, "delete", b"")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch, self._pending = self._pending, {}
+                self._busy = True
+            for path, job in batch.items():
+                self._write(path, job)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _write(self, path: str, job: _WriteJob):
+        try:
+            if job.mode == "replace":
+                write_atomic(path, job.data)
+            elif job.mode == "append":
+                append_durable(path, job.data)
+            elif os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{path}: {e}"
+            return
+        latency = time.perf_counter() - job.submitted
+        self.writes += 1
+        self.bytes_written += len(job.data)
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._total_latency += latency
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything submitted so far is on disk. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Flushes outstanding writes and stops the writer thread."""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        return flushed
+
+    def take_error(self) -> Optional[str]:
+        """Returns and clears the most recent write error, if any."""
+        error, self.last_error = self.last_error, None
+        return error
+
+    def stats(self) -> Dict[str, float]:
+        """Returns counters and save latencies (submission to durable write, in milliseconds)."""
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "pending": pending,
+            "last_latency_ms": self.last_latency * 1000,
+            "avg_latency_ms": (self._total_latency / self.writes * 1000) if self.writes else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+# Dependencies that should only be imported once they are used, never at startup.
+HEAVY_MODULES = ("torch", "sentence_transformers", "faiss", "spacy", "networkx", "thefuzz",
+                 "rapidfuzz", "google.generativeai", "onnxruntime")
+# Marks the probe's own output line; the profiled module may print to stdout too.
+LOADED_PREFIX = "HEAVY:"
+
+@dataclass
+class ImportTiming:
+    """One line of python -X importtime output."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # 0 for modules imported directly by the profiled code
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parses the stderr of python -X importtime, skipping everything else."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        indent = len(name) - len(name.lstrip())
+        # Nested imports are indented two more spaces per level, after a single separator space.
+        timings.append(ImportTiming(name.strip(), int(fields[0]), int(fields[1]), max(0, (indent - 1) // 2)))
+    return timings
+
+def profile_imports(target: str = "main", cwd: Optional[str] = None):
+    """
+    Imports target in a fresh interpreter under -X importtime. Returns the timings, the
+    wall-clock seconds from interpreter start to the end of the import, and the heavy
+    modules the import left in sys.modules.
+    """
+    probe = ("import sys; import {0}; "
+             "print({1!r} + ','.join(name for name in {2!r} if name in sys.modules))").format(target, LOADED_PREFIX, HEAVY_MODULES)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=cwd,
+                            stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr), seconds, parse_loaded(result.stdout)
+
+def parse_loaded(output: str) -> List[str]:
+    """The heavy modules listed on the probe's marked stdout line."""
+    marked = [line for line in output.splitlines() if line.startswith(LOADED_PREFIX)]
+    if not marked:
+        return []
+    return [name for name in marked[-1][len(LOADED_PREFIX):].strip().split(",") if name]
+
+def format_report(timings: Sequence[ImportTiming], seconds: float, loaded: Sequence[str], top: int = 20) -> str:
+    """The slowest top-level imports by cumulative time, followed by totals."""
+    total_us = sum(timing.self_us for timing in timings)
+    lines = [f"{'cumulative':>12} {'self':>10}  module"]
+    roots = sorted((timing for timing in timings if timing.depth == 0), key=lambda timing: timing.cumulative_us, reverse=True)
+    for timing in roots[:top]:
+        lines.append(f"{timing.cumulative_us / 1000:10.1f}ms {timing.self_us / 1000:8.1f}ms  {timing.module}")
+    lines.append(f"{len(timings)} modules imported in {total_us / 1e6:.3f}s; "
+                 f"{seconds:.3f}s from interpreter start to the first prompt's code.")
+    lines.append("Heavy dependencies loaded at startup: " + (", ".join(loaded) if loaded else "none"))
+    return "\n".join(lines)
+
+def main(top: int = 20) -> int:
+    """Entry point for main.py --profile-startup."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        timings, seconds, loaded = profile_imports("main", cwd=root)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    print("--- Startup import profile (python -X importtime) ---")
+    print(format_report(timings, seconds, loaded, top))
+    return 0